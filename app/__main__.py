@@ -0,0 +1,56 @@
+"""
+Serve the API with uvicorn, choosing the subsystems built before serving. Run from the repository root:
+    python -m app --port 8181 --warmup spacy
+    python -m app --port 8181 --warmup all
+    python -m app --port 8181 --workers 4
+
+Without --warmup (or APP_WARMUP), every subsystem is imported and built on the first request of its routes.
+
+With --workers (or APP_WORKERS), a master process loads the Spacy pipelines, then forks the workers, which share
+them copy-on-write instead of loading a copy each. `kill -HUP <master pid>` replaces the workers one at a time,
+`kill -TERM <master pid>` stops them gracefully. More than one worker needs TASK_STORE_BACKEND=sqlite, so a task
+created by one worker can be polled on any other.
+"""
+import argparse
+import os
+
+import uvicorn
+
+from app.mycrews.helper.prefork import APP_WORKERS, PreforkMaster
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--host", default="0.0.0.0")
+    parser.add_argument("--port", type=int, default=8181)
+    parser.add_argument("--warmup", default=os.getenv("APP_WARMUP", ""),
+                        help="Comma-separated subsystems built before serving among spacy, llm, crews and entity_crew, or all")
+    parser.add_argument("--workers", type=int, default=APP_WORKERS,
+                        help="Worker processes forked by a master after loading the Spacy pipelines (0 serves in this process)")
+    args = parser.parse_args()
+
+    # Read by app.main when it is imported
+    os.environ["APP_WARMUP"] = args.warmup
+    if args.workers <= 0:
+        uvicorn.run("app.main:app", host=args.host, port=args.port)
+        return
+
+    from app.mycrews.helper.task_store import TASK_STORE_BACKEND
+    if args.workers > 1 and TASK_STORE_BACKEND != "sqlite":
+        parser.error("--workers above 1 requires TASK_STORE_BACKEND=sqlite, so tasks are shared between workers")
+    import app.main as api
+
+    def start_job_workers():
+        if api.job_workers is not None:
+            api.job_workers.start()
+
+    def stop_job_workers():
+        if api.job_workers is not None:
+            api.job_workers.stop()
+
+    # Only loaded in the master: the other subsystems start threads and connections, which do not survive a fork
+    master = PreforkMaster(api.app, args.workers, args.host, args.port, prepare=api.subsystems["spacy"].get,
+                           on_started=start_job_workers, on_stopped=stop_job_workers)
+    master.run()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,72 @@
+"""
+Benchmark of the batch Spacy entity recognizer against the one-call-per-document loop.
+
+Run from the repository root:
+    python -m app.benchmarks.batch_ner_benchmark --docs 2000 --batch-size 64 --n-process 1
+"""
+import argparse
+import random
+import time
+
+from app.mycrews.helper.spacy_entity_recognizer import spacy_entity_recognizer, spacy_entity_recognizer_batch
+
+# Small pool of sentences used to build synthetic documents
+SENTENCES = {
+    "pt": [
+        "Maria Silva trabalha na Petrobras desde 2010.",
+        "O presidente visitou Brasília e depois seguiu para São Paulo.",
+        "A Universidade de São Paulo firmou parceria com a Embrapa.",
+        "João Pereira mora no Rio de Janeiro com a família.",
+    ],
+    "en": [
+        "Elon Musk founded SpaceX in California.",
+        "The United Nations met in New York last week.",
+        "Amazon opened a new office in Seattle.",
+    ],
+}
+
+def build_documents(count: int, sentences_per_doc: int, seed: int = 42) -> list:
+    # Mostly Portuguese documents, as in production traffic
+    rng = random.Random(seed)
+    documents = []
+    for _ in range(count):
+        lang = "pt" if rng.random() < 0.8 else "en"
+        text = " ".join(rng.choice(SENTENCES[lang]) for _ in range(sentences_per_doc))
+        documents.append({"text": text, "lang": lang, "types": []})
+    return documents
+
+def run_loop(documents: list) -> float:
+    start = time.perf_counter()
+    for document in documents:
+        spacy_entity_recognizer(document["text"], document["lang"], document["types"])
+    return time.perf_counter() - start
+
+def run_batch(documents: list, batch_size: int, n_process: int) -> float:
+    start = time.perf_counter()
+    spacy_entity_recognizer_batch(documents, batch_size, n_process)
+    return time.perf_counter() - start
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--docs", type=int, default=2000)
+    parser.add_argument("--sentences-per-doc", type=int, default=3)
+    parser.add_argument("--batch-size", type=int, default=64)
+    parser.add_argument("--n-process", type=int, default=1)
+    args = parser.parse_args()
+
+    documents = build_documents(args.docs, args.sentences_per_doc)
+
+    # Warm up both models so the first measurement does not pay for lazy initialization
+    spacy_entity_recognizer_batch(documents[:10])
+
+    loop_elapsed = run_loop(documents)
+    batch_elapsed = run_batch(documents, args.batch_size, args.n_process)
+
+    print(f"documents: {len(documents)}")
+    print(f"loop:  {loop_elapsed:.3f}s  {len(documents) / loop_elapsed:.1f} docs/sec")
+    print(f"batch: {batch_elapsed:.3f}s  {len(documents) / batch_elapsed:.1f} docs/sec "
+          f"(batch_size={args.batch_size}, n_process={args.n_process})")
+    print(f"speedup: {loop_elapsed / batch_elapsed:.2f}x")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,77 @@
+"""
+Wall time of creating and evaluating poems for many objectives: one objective after the other (N sequential
+/open/test calls), in two stages (every poem, then every evaluation) and pipelined like /open/batch (each poem
+evaluated as soon as it is created), both with bounded concurrency.
+
+Calls go through the functions of the API and its OpenAI client, against a local fake OpenAI server, without
+HTTP between the client and the API. "first result" is the time until the first objective had its evaluation.
+Run from the repository root:
+    python -m app.benchmarks.batch_poem_benchmark --objectives 100 --concurrency 16 --latency 0.1 --jitter 0.1
+"""
+import argparse
+import asyncio
+import os
+import time
+
+from app.benchmarks.fake_openai_server import add_arguments, server_settings, start_in_thread
+
+MODES = ("sequential", "staged", "pipelined")
+
+async def run_mode(mode: str, objectives: list, concurrency: int) -> dict:
+    from app.main import create_poem, evaluate_batch_poem
+    from app.mycrews.helper.batch_pipeline import pipelined_map
+
+    start = time.perf_counter()
+    first = []
+
+    def record(*_):
+        if not first:
+            first.append(time.perf_counter() - start)
+
+    if mode == "sequential":
+        for objective in objectives:
+            await evaluate_batch_poem(await create_poem(objective))
+            record()
+    elif mode == "staged":
+        poems = await pipelined_map(objectives, (create_poem,), concurrency)
+        await pipelined_map(poems, (evaluate_batch_poem,), concurrency, on_stage=record)
+    else:
+        await pipelined_map(objectives, (create_poem, evaluate_batch_poem), concurrency,
+                            on_stage=lambda index, stage, value: stage == 1 and record())
+    return {"mode": mode, "seconds": time.perf_counter() - start, "first_result_seconds": first[0] if first else None}
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--objectives", type=int, default=100, help="Objectives in the batch")
+    parser.add_argument("--concurrency", type=int, default=16, help="Calls in flight of the staged and pipelined modes")
+    parser.add_argument("--modes", default=",".join(MODES), help=f"Comma-separated modes among {', '.join(MODES)}")
+    parser.add_argument("--port", type=int, default=8198)
+    add_arguments(parser)
+    args = parser.parse_args()
+
+    server = start_in_thread(args.port, **server_settings(args))
+    # The OpenAI client reads the endpoint when it is built, on the first call
+    os.environ["OPENAI_BASE_URL"] = f"http://127.0.0.1:{args.port}/v1"
+    os.environ.setdefault("OPENAI_API_KEY", "fake")
+    objectives = [f"tema {index}" for index in range(args.objectives)]
+    try:
+        async def run_all():
+            # Builds the OpenAI client and opens its first connection out of the measures
+            from app.main import create_poem
+            await create_poem("aquecimento")
+            rows = []
+            for mode in args.modes.split(","):
+                rows.append(await run_mode(mode, objectives, args.concurrency))
+            return rows
+
+        rows = asyncio.run(run_all())
+    finally:
+        server.should_exit = True
+    sequential = next((row["seconds"] for row in rows if row["mode"] == "sequential"), None)
+    for row in rows:
+        speedup = f", {sequential / row['seconds']:.1f}x sequential" if sequential and row["mode"] != "sequential" else ""
+        print(f"{row['mode']}: {args.objectives} objectives in {row['seconds']:.2f}s, first result after "
+              f"{row['first_result_seconds']:.2f}s{speedup}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,69 @@
+"""
+Throughput and tail latency of concurrent single-text Spacy requests: one `nlp[lang](text)` call per request in
+the NER pool (as before) against the NERCoalescer, which batches the requests of each window in one
+`Language.pipe` call.
+
+Each client sends one short text, waits for its entities and sends the next one, for --duration seconds. Calls
+go straight to the coalescer in the event loop of this process, like the routes, without HTTP. The pool accepts
+every call (no 429), so the latencies include the queueing. Run from the repository root (needs the pt model):
+    python -m app.benchmarks.coalescing_benchmark --clients 50,200,500 --windows 0,2,5,10 --max-batch 32
+"""
+import argparse
+import asyncio
+import random
+import time
+
+from app.mycrews.helper.executor import NER_EXECUTOR_MAX_WORKERS, BoundedExecutor
+from app.mycrews.helper.metrics import ner_coalesced_batch_size
+from app.mycrews.helper.ner_coalescer import NERCoalescer
+from app.mycrews.helper.spacy_entity_recognizer import nlp
+
+# Short texts, like the ones clients send one per call
+SENTENCES = [
+    "Maria Silva trabalha na Petrobras em São Paulo.",
+    "O presidente do Banco do Brasil visitou Brasília na segunda-feira.",
+    "João Souza e Ana Pereira fundaram uma empresa em Curitiba.",
+    "A Embraer anunciou um contrato com a Azul em Campinas.",
+]
+
+def percentile(values: list, pct: float) -> float:
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))]
+
+async def client(coalescer: NERCoalescer, rng: random.Random, stop: float, latencies: list):
+    while time.perf_counter() < stop:
+        start = time.perf_counter()
+        await coalescer.recognize(rng.choice(SENTENCES), "pt", [])
+        latencies.append(time.perf_counter() - start)
+
+async def run(clients: int, window_ms: float, max_batch: int, duration: float, workers: int) -> dict:
+    executor = BoundedExecutor("benchmark", workers, clients * 2)
+    coalescer = NERCoalescer(executor, window_ms=window_ms, max_batch=max_batch)
+    batches = ner_coalesced_batch_size.count(lang="pt")
+    latencies = []
+    stop = time.perf_counter() + duration
+    await asyncio.gather(*(client(coalescer, random.Random(index), stop, latencies) for index in range(clients)))
+    executor.shutdown()
+    batches = ner_coalesced_batch_size.count(lang="pt") - batches
+    return {"requests_per_second": len(latencies) / duration, "p50_ms": percentile(latencies, 50) * 1000,
+            "p99_ms": percentile(latencies, 99) * 1000, "mean_batch": len(latencies) / batches if batches else 1.0}
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--clients", default="50,200,500", help="Comma-separated numbers of concurrent clients")
+    parser.add_argument("--windows", default="0,2,5,10", help="Comma-separated coalescing windows in ms (0 is one call per request)")
+    parser.add_argument("--max-batch", type=int, default=32)
+    parser.add_argument("--duration", type=float, default=5.0, help="Seconds per measure")
+    parser.add_argument("--workers", type=int, default=NER_EXECUTOR_MAX_WORKERS, help="Threads of the NER pool")
+    args = parser.parse_args()
+
+    nlp["pt"]("aquecimento")
+    for clients in (int(value) for value in args.clients.split(",")):
+        for window in (float(value) for value in args.windows.split(",")):
+            row = asyncio.run(run(clients, window, args.max_batch, args.duration, args.workers))
+            mode = f"window {window:g} ms" if window else "one call per request"
+            print(f"{clients} clients, {mode}: {row['requests_per_second']:.0f} req/s, p50 {row['p50_ms']:.1f} ms, "
+                  f"p99 {row['p99_ms']:.1f} ms, {row['mean_batch']:.1f} texts per batch")
+
+if __name__ == "__main__":
+    main()
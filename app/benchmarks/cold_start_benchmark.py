@@ -0,0 +1,81 @@
+"""
+Cold start of the API: time to import app.main, to start serving (startup events, APP_WARMUP) and to answer the
+first request of each route family, for several APP_WARMUP settings.
+
+Each setting runs in a fresh interpreter, which imports the API, starts it with the ASGI test client and sends
+one request per route in turn; the heavy modules loaded after the import are listed to catch eager imports.
+Crew and LLM routes are served by a local fake OpenAI server. Results are printed as JSON; --max-import-seconds
+makes the run fail when the lazy import gets slower, to track it in CI. Run from the repository root:
+    python -m app.benchmarks.cold_start_benchmark --warmups ,spacy,all --output cold_start.json
+    python -m app.benchmarks.cold_start_benchmark --warmups , --max-import-seconds 2
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+
+from app.benchmarks.fake_openai_server import start_in_thread
+
+# Code executed by every child interpreter, printing its measurements as JSON
+CHILD = r"""
+import json, sys, time
+HEAVY = ("crewai", "litellm", "openai", "spacy", "chromadb")
+start = time.perf_counter()
+import app.main as main
+result = {"import_s": time.perf_counter() - start, "imported": [name for name in HEAVY if name in sys.modules]}
+from fastapi.testclient import TestClient
+start = time.perf_counter()
+client = TestClient(main.app)
+client.__enter__()
+result["startup_s"] = time.perf_counter() - start
+headers = {"cache-control": "no-store"}
+for name, path, body in json.loads(sys.argv[1]):
+    start = time.perf_counter()
+    status = client.post(path, json=body, headers=headers).status_code
+    result[f"first_{name}_s"] = time.perf_counter() - start
+    result[f"first_{name}_status"] = status
+client.__exit__(None, None, None)
+print(json.dumps(result))
+"""
+
+# First request of each route family, in the order they are sent
+ROUTES = [
+    ("spacy", "/spacy/entityRecognizer", {"fulltext": "Maria Silva trabalha na Petrobras em São Paulo.", "async_execution": False}),
+    ("open", "/open/test", {"objective": "o mar", "async_execution": False}),
+    ("crew", "/crewai/test", {"objective": "o mar", "async_execution": False}),
+]
+
+def measure(warmup: str, port: int) -> dict:
+    env = {**os.environ, "APP_WARMUP": warmup, "OPENAI_BASE_URL": f"http://127.0.0.1:{port}/v1",
+           "OPENAI_API_KEY": os.environ.get("OPENAI_API_KEY", "fake"), "LOG_LEVEL": "WARNING"}
+    child = subprocess.run([sys.executable, "-c", CHILD, json.dumps(ROUTES)], env=env, capture_output=True, text=True)
+    if child.returncode:
+        raise RuntimeError(f"Cold start with APP_WARMUP={warmup!r} failed:\n{child.stderr[-2000:]}")
+    return {"warmup": warmup or "none (lazy)", **json.loads(child.stdout.strip().splitlines()[-1])}
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--warmups", default=",spacy,all", help="Comma-separated APP_WARMUP settings, an empty one is the lazy start (subsystems may be joined with +)")
+    parser.add_argument("--port", type=int, default=8197, help="Port of the fake OpenAI server")
+    parser.add_argument("--output", help="Also write the results to this JSON file")
+    parser.add_argument("--max-import-seconds", type=float, help="Fail when the lazy import of app.main takes longer")
+    args = parser.parse_args()
+
+    server = start_in_thread(args.port, latency=0.01, completion_tokens=20)
+    try:
+        results = [measure(warmup.replace("+", ","), args.port) for warmup in args.warmups.split(",")]
+    finally:
+        server.should_exit = True
+
+    report = json.dumps({"python": sys.version.split()[0], "results": results}, indent=2)
+    print(report)
+    if args.output:
+        with open(args.output, "w") as output:
+            output.write(report)
+    lazy = [result for result in results if result["warmup"] == "none (lazy)"]
+    if args.max_import_seconds is not None and lazy and lazy[0]["import_s"] > args.max_import_seconds:
+        sys.exit(f"Lazy import of app.main took {lazy[0]['import_s']:.2f}s, over {args.max_import_seconds}s")
+
+if __name__ == "__main__":
+    main()
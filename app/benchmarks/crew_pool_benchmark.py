@@ -0,0 +1,79 @@
+"""
+Throughput of concurrent crew kickoffs on a crew pool against the former module-level crew.
+
+The shared crew is either kicked off concurrently as before ("shared"), which mixes up the inputs of
+concurrent executions, or behind a lock ("locked"), the only safe way to share it, which serializes them.
+Every kickoff runs against a local fake OpenAI server. "mismatches" counts executions whose first task
+description does not hold their own theme. Run from the repository root:
+    python -m app.benchmarks.crew_pool_benchmark --kickoffs 64 --concurrency 16 --latency 0.2
+"""
+import argparse
+import os
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from app.benchmarks.fake_openai_server import add_arguments, server_settings, start_in_thread
+
+MODES = ("shared", "locked", "pool")
+
+def quiet(crew):
+    # Verbose console output of concurrent kickoffs is interleaved and would dominate the timings
+    crew.verbose = False
+    for agent in crew.agents:
+        agent.verbose = False
+    return crew
+
+def run_mode(mode: str, kickoffs: int, concurrency: int) -> dict:
+    from mycrews.crews import create_mycrew
+    from app.mycrews.helper.crew_pool import CrewPool
+
+    shared = quiet(create_mycrew())
+    lock = threading.Lock()
+    pool = CrewPool("benchmark", lambda: quiet(create_mycrew()), size=concurrency, warmup=concurrency)
+    if mode == "pool":
+        pool.warm_up()
+
+    def kickoff(index: int) -> bool:
+        theme = f"tema-{index}"
+        if mode == "pool":
+            result = pool.kickoff(inputs={"text": theme})
+        elif mode == "locked":
+            with lock:
+                result = shared.kickoff(inputs={"text": theme})
+        else:
+            result = shared.kickoff(inputs={"text": theme})
+        return theme in result.tasks_output[0].description
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        matches = list(executor.map(kickoff, range(kickoffs)))
+    elapsed = time.perf_counter() - start
+    return {"mode": mode, "kickoffs": kickoffs, "concurrency": concurrency, "seconds": round(elapsed, 2),
+            "kickoffs_per_second": round(kickoffs / elapsed, 2), "mismatches": matches.count(False)}
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--kickoffs", type=int, default=64)
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--port", type=int, default=8199)
+    parser.add_argument("--modes", default=",".join(MODES), help=f"Comma-separated modes among {', '.join(MODES)}")
+    add_arguments(parser)
+    args = parser.parse_args()
+
+    server = start_in_thread(args.port, **server_settings(args))
+    # The crew modules read the endpoint when they are imported, and are imported like main.py does
+    os.environ["OPENAI_BASE_URL"] = f"http://127.0.0.1:{args.port}/v1"
+    os.environ.setdefault("OPENAI_API_KEY", "fake")
+    sys.path.append("./app")
+    try:
+        for mode in args.modes.split(","):
+            result = run_mode(mode, args.kickoffs, args.concurrency)
+            print(f"{mode}: {result['kickoffs']} kickoffs at concurrency {result['concurrency']} in {result['seconds']}s "
+                  f"-> {result['kickoffs_per_second']} kickoffs/s, {result['mismatches']} mismatched inputs")
+    finally:
+        server.should_exit = True
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,160 @@
+"""
+End-to-end latency, throughput and memory of the API endpoints, offline.
+
+Boots a local fake OpenAI server and the FastAPI app (uvicorn) in their own processes, the app pointed at
+the fake server with OPENAI_BASE_URL and a fake key, then drives every endpoint at each concurrency level.
+Results are printed as one JSON document (p50/p95/p99 latency in ms, requests/s, responses by status, RSS
+of the app process in MB) to track between releases. Run from the repository root:
+    python -m app.benchmarks.endpoint_benchmark --concurrency 1,8,32 --requests 200 --latency 0.2 --output bench.json
+    python -m app.benchmarks.endpoint_benchmark --endpoints spacy/entityRecognizer,general/entityRecognizer --concurrency 16
+
+Requests are sent with "Cache-Control: no-store" so every call is computed, unless --cache is given.
+"""
+import argparse
+import asyncio
+import json
+import os
+import platform
+import subprocess
+import sys
+import time
+
+import httpx
+
+from app.benchmarks.fake_openai_server import add_arguments, server_settings
+
+TEXT = "Maria Silva trabalha na Petrobras em São Paulo desde 5 de março de 2010 e ganha R$ 12.500,00 por mês."
+
+# Path and JSON body of every endpoint driven by the benchmark
+ENDPOINTS = {
+    "open/test": ("/open/test", {"objective": "o mar", "async_execution": False}),
+    "crewai/test": ("/crewai/test", {"objective": "o mar", "async_execution": False}),
+    "crewai/entityRecognizer": ("/crewai/entityRecognizer", {"fulltext": TEXT, "async_execution": False}),
+    "spacy/entityRecognizer": ("/spacy/entityRecognizer", {"fulltext": TEXT, "async_execution": False}),
+    "general/entityRecognizer": ("/general/entityRecognizer", {"fulltext": TEXT, "entities": [], "lang": "pt"}),
+}
+
+def percentile(values: list, pct: float) -> float:
+    if not values:
+        return float("nan")
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))
+    return ordered[index]
+
+def rss_mb(pid: int) -> dict:
+    # Current and peak resident set size of a process, from /proc (Linux only)
+    try:
+        with open(f"/proc/{pid}/status") as status:
+            fields = dict(line.split(":", 1) for line in status if line.startswith(("VmRSS", "VmHWM")))
+    except OSError:
+        fields = {}
+    return {name: round(int(fields[field].split()[0]) / 1024, 1) if field in fields else None
+            for name, field in (("rss_mb", "VmRSS"), ("peak_rss_mb", "VmHWM"))}
+
+def wait_until_up(url: str, process: subprocess.Popen, timeout: float):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if process.poll() is not None:
+            raise RuntimeError(f"{' '.join(process.args)} exited with code {process.returncode}")
+        try:
+            if httpx.get(url, timeout=1).status_code < 500:
+                return
+        except httpx.HTTPError:
+            pass
+        time.sleep(0.2)
+    raise RuntimeError(f"{url} did not answer within {timeout}s")
+
+async def drive(client: httpx.AsyncClient, path: str, body: dict, headers: dict, requests: int, concurrency: int) -> dict:
+    latencies = []
+    statuses = {}
+    queue = asyncio.Queue()
+    for _ in range(requests):
+        queue.put_nowait(None)
+
+    async def worker():
+        while not queue.empty():
+            queue.get_nowait()
+            start = time.perf_counter()
+            try:
+                status = (await client.post(path, json=body, headers=headers)).status_code
+            except httpx.HTTPError as e:
+                status = type(e).__name__
+            latencies.append((time.perf_counter() - start) * 1000)
+            statuses[str(status)] = statuses.get(str(status), 0) + 1
+
+    start = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    elapsed = time.perf_counter() - start
+    return {"requests": requests, "seconds": round(elapsed, 3), "rps": round(requests / elapsed, 2),
+            "p50_ms": round(percentile(latencies, 50), 1), "p95_ms": round(percentile(latencies, 95), 1),
+            "p99_ms": round(percentile(latencies, 99), 1), "max_ms": round(max(latencies, default=float("nan")), 1),
+            "statuses": dict(sorted(statuses.items()))}
+
+async def run(args, app_server: subprocess.Popen) -> list:
+    headers = {} if args.cache else {"Cache-Control": "no-store"}
+    levels = [int(level) for level in args.concurrency.split(",")]
+    limits = httpx.Limits(max_connections=max(levels), max_keepalive_connections=max(levels))
+    results = []
+    async with httpx.AsyncClient(base_url=f"http://127.0.0.1:{args.port}", timeout=args.timeout, limits=limits) as client:
+        for name in args.endpoints.split(","):
+            path, body = ENDPOINTS[name]
+            if name == "crewai/entityRecognizer":
+                body = {**body, "routing": args.entity_routing}
+            # Warm-up calls load models and fill connection pools before measuring
+            await drive(client, path, body, headers, args.warmup, 1)
+            for concurrency in levels:
+                result = await drive(client, path, body, headers, args.requests, concurrency)
+                if app_server.poll() is not None:
+                    raise RuntimeError(f"The API exited with code {app_server.returncode} during {name} at concurrency {concurrency}")
+                results.append({"endpoint": name, "concurrency": concurrency, **result, **rss_mb(app_server.pid)})
+                print(json.dumps(results[-1]), file=sys.stderr)
+    return results
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--endpoints", default=",".join(ENDPOINTS), help=f"Comma-separated endpoints among {', '.join(ENDPOINTS)}")
+    parser.add_argument("--concurrency", default="1,8,32", help="Comma-separated concurrency levels")
+    parser.add_argument("--requests", type=int, default=200, help="Requests per endpoint and concurrency level")
+    parser.add_argument("--warmup", type=int, default=3, help="Unmeasured requests per endpoint")
+    parser.add_argument("--entity-routing", default="auto", help="Routing of /crewai/entityRecognizer requests: auto, spacy or crew")
+    parser.add_argument("--cache", action="store_true", help="Let the result cache answer repeated requests")
+    parser.add_argument("--timeout", type=float, default=300.0, help="Seconds before a request fails")
+    parser.add_argument("--port", type=int, default=8181, help="Port of the API")
+    parser.add_argument("--fake-port", type=int, default=8199, help="Port of the fake OpenAI server")
+    parser.add_argument("--output", help="Also write the JSON results to this file")
+    add_arguments(parser)
+    args = parser.parse_args()
+    for name in args.endpoints.split(","):
+        if name not in ENDPOINTS:
+            parser.error(f"Unknown endpoint '{name}'. Available options: {list(ENDPOINTS)}")
+
+    fake_settings = server_settings(args)
+    fake_flags = [token for name, value in fake_settings.items() for token in (f"--{name.replace('_', '-')}", str(value))]
+    env = {**os.environ, "OPENAI_BASE_URL": f"http://127.0.0.1:{args.fake_port}/v1", "OPENAI_API_KEY": "fake",
+           "OTEL_SDK_DISABLED": "true", "CREWAI_TELEMETRY_OPT_OUT": "true"}
+    fake_server = subprocess.Popen([sys.executable, "-m", "app.benchmarks.fake_openai_server", "--port", str(args.fake_port)] + fake_flags)
+    app_server = subprocess.Popen([sys.executable, "-m", "uvicorn", "app.main:app", "--port", str(args.port), "--log-level", "warning"],
+                                  env=env, stdout=subprocess.DEVNULL)
+    try:
+        wait_until_up(f"http://127.0.0.1:{args.fake_port}/docs", fake_server, 30)
+        wait_until_up(f"http://127.0.0.1:{args.port}/liveness", app_server, 300)
+        startup = rss_mb(app_server.pid)
+        results = asyncio.run(run(args, app_server))
+    finally:
+        for process in (app_server, fake_server):
+            process.terminate()
+            process.wait(timeout=30)
+
+    report = {
+        "settings": {"requests": args.requests, "warmup": args.warmup, "cache": args.cache, "entity_routing": args.entity_routing,
+                     "fake_server": fake_settings, "python": platform.python_version()},
+        "startup_rss_mb": startup["rss_mb"],
+        "results": results,
+    }
+    print(json.dumps(report, indent=2))
+    if args.output:
+        with open(args.output, "w") as output:
+            json.dump(report, output, indent=2)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,53 @@
+"""
+Throughput of the full Spacy pipeline against the entities-only pipeline on long Portuguese documents.
+
+The full pipeline is profiled per component to show where the time goes. Run from the repository root:
+    python -m app.benchmarks.entities_only_benchmark --docs 50 --paragraphs 40
+"""
+import argparse
+import time
+
+from app.benchmarks.batch_ner_benchmark import SENTENCES
+from app.mycrews.helper.pipeline_profiler import PipelineProfiler
+from app.mycrews.helper.spacy_entity_recognizer import models
+from app.mycrews.helper.spacy_model_registry import SpacyModelRegistry
+
+def build_documents(count: int, paragraphs: int) -> list:
+    paragraph = " ".join(SENTENCES["pt"])
+    return ["\n\n".join([paragraph] * paragraphs) for _ in range(count)]
+
+def measure(registry: SpacyModelRegistry, documents: list, profiler: PipelineProfiler) -> tuple:
+    pipeline = registry["pt"]
+    profiler.call(pipeline, documents[0], "warmup")
+    start = time.perf_counter()
+    entities = 0
+    for document in documents:
+        entities += len(profiler.call(pipeline, document, "pt").ents)
+    return time.perf_counter() - start, entities, pipeline.pipe_names
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--docs", type=int, default=50)
+    parser.add_argument("--paragraphs", type=int, default=40)
+    args = parser.parse_args()
+
+    documents = build_documents(args.docs, args.paragraphs)
+    characters = sum(len(document) for document in documents)
+
+    configurations = {
+        "full pipeline": SpacyModelRegistry(models),
+        "entities only": SpacyModelRegistry(models, entities_only=True),
+    }
+    baseline = None
+    for name, registry in configurations.items():
+        profiler = PipelineProfiler()
+        elapsed, entities, pipe_names = measure(registry, documents, profiler)
+        baseline = baseline or elapsed
+        print(f"{name}: {pipe_names}")
+        print(f"  {elapsed:.2f}s  {len(documents) / elapsed:.1f} docs/sec  {characters / elapsed / 1000:.0f}k chars/sec"
+              f"  entities={entities}  speedup={baseline / elapsed:.2f}x")
+        for component, values in sorted(profiler.stats()["pt"].items(), key=lambda item: -item[1]["total_s"]):
+            print(f"    {component:<16} {values['total_s']:.3f}s  {values['share'] * 100:5.1f}%")
+
+if __name__ == "__main__":
+    main()
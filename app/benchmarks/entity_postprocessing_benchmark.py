@@ -0,0 +1,70 @@
+"""
+Cost of turning Spacy entities into results, on entity-dense documents: the former post-processing (a dict per
+entity, a second loop renaming labels, list filters rebuilt on every call) against the single pass over a
+precomputed label table of `_extract_entities`, reading the token attribute arrays of the document.
+
+Documents are processed by the model once; only the post-processing is timed, with and without a type filter.
+Run from the repository root (needs the pt model):
+    python -m app.benchmarks.entity_postprocessing_benchmark --docs 200 --sentences-per-doc 20 --repeat 20
+"""
+import argparse
+import random
+import time
+
+from app.mycrews.helper.spacy_entity_recognizer import _extract_entities, nlp
+
+# Sentences where most tokens are entities
+SENTENCES = [
+    "Maria Silva, João Souza e Ana Pereira visitaram a Petrobras, a Vale e o Itaú em São Paulo.",
+    "Elon Musk e Jeff Bezos falaram sobre a SpaceX, a Tesla e a Amazon em Brasília.",
+    "O Banco do Brasil, a Embraer e a Natura abriram escritórios no Rio de Janeiro, em Curitiba e em Recife.",
+    "Pedro Alves encontrou Carla Mendes na Universidade de São Paulo e depois na Fiocruz.",
+]
+
+def former_extract_entities(doc, types: list, text: str) -> list:
+    # Post-processing before the label table, kept for comparison
+    entities = [{"value": ent.text, "type": ent.label_} for ent in doc.ents]
+    for ent in entities:
+        if ent["type"] == "EMAIL_ADDRESS":
+            ent["type"] = "EMAIL"
+        if ent["type"] == "PER":
+            ent["type"] = "PERSON"
+    ACCEPTED_TYPES = ["PERSON", "ORG", "LOCATION"]
+    entities = [ent for ent in entities if ent["type"] in ACCEPTED_TYPES]
+    if any(types):
+        types_upper = [t.upper() for t in types]
+        types_upper.append('FAILED')
+        entities = [ent for ent in entities if ent["type"] in types_upper]
+    return entities
+
+def run(extract, docs: list, texts: list, types: list, repeat: int) -> tuple:
+    start = time.perf_counter()
+    for _ in range(repeat):
+        entities = sum(len(extract(doc, types, text=text)) for doc, text in zip(docs, texts))
+    return time.perf_counter() - start, entities
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--docs", type=int, default=200)
+    parser.add_argument("--sentences-per-doc", type=int, default=20)
+    parser.add_argument("--repeat", type=int, default=20, help="Passes over the documents per measure")
+    parser.add_argument("--lang", default="pt")
+    args = parser.parse_args()
+
+    rng = random.Random(42)
+    texts = [" ".join(rng.choice(SENTENCES) for _ in range(args.sentences_per_doc)) for _ in range(args.docs)]
+    docs = list(nlp[args.lang].pipe(texts))
+    spans = sum(len(doc.ents) for doc in docs)
+    print(f"{args.docs} documents, {spans} entity spans ({spans / args.docs:.0f} per document)")
+
+    for types in ([], ["PERSON"], ["PERSON", "ORG", "LOCATION"]):
+        former, former_count = run(former_extract_entities, docs, texts, types, args.repeat)
+        current, current_count = run(_extract_entities, docs, texts, types, args.repeat)
+        if former_count != current_count:
+            print(f"  warning: {former_count} entities before, {current_count} now")
+        processed = spans * args.repeat
+        print(f"types={types or 'all'}: former {processed / former / 1e6:.2f}M spans/s, "
+              f"single pass {processed / current / 1e6:.2f}M spans/s ({former / current:.2f}x), {current_count} entities kept")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,123 @@
+"""
+Local stand-in for the OpenAI chat completions API, with configurable latency, token counts and errors.
+Prompts of CrewAI agents get a ReAct "Final Answer:" reply, so crews finish in one call per task, and
+the entity recognizer task gets a JSON list of entities.
+
+Run it from the repository root and point the API at it with OPENAI_BASE_URL:
+    python -m app.benchmarks.fake_openai_server --port 8199 --latency 0.2 --rate-limit-ratio 0.05
+    OPENAI_BASE_URL=http://localhost:8199/v1 OPENAI_API_KEY=fake uvicorn app.main:app --port 8181
+"""
+import argparse
+import asyncio
+import json
+import random
+import threading
+import time
+import uuid
+
+import uvicorn
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse, StreamingResponse
+
+def create_app(latency: float = 0.2, jitter: float = 0.0, rate_limit_ratio: float = 0.0, error_ratio: float = 0.0,
+               completion_tokens: int = 50, retry_after_ms: int = 100, seed: int = None) -> FastAPI:
+    """
+    Build the fake server.
+
+    Args:
+        latency (float): Seconds before every response.
+        jitter (float): Extra random latency, uniformly drawn between 0 and this many seconds.
+        rate_limit_ratio (float): Share of calls answered with 429 and a retry-after-ms header.
+        error_ratio (float): Share of calls answered with 500.
+        completion_tokens (int): Number of words (counted as tokens) in every completion.
+        retry_after_ms (int): Value of the retry-after-ms header of 429 responses.
+    """
+    app = FastAPI(title="Fake OpenAI API")
+    rng = random.Random(seed)
+    app.state.calls = 0
+
+    @app.post("/v1/chat/completions")
+    async def chat_completions(request: Request):
+        body = await request.json()
+        app.state.calls += 1
+        await asyncio.sleep(latency + rng.uniform(0, jitter))
+
+        if rng.random() < rate_limit_ratio:
+            return JSONResponse(status_code=429, headers={"retry-after-ms": str(retry_after_ms)},
+                                content={"error": {"message": "Rate limit reached", "type": "requests", "code": "rate_limit_exceeded"}})
+        if rng.random() < error_ratio:
+            return JSONResponse(status_code=500, content={"error": {"message": "Internal error", "type": "server_error"}})
+
+        prompt_tokens = sum(len(str(message.get("content", "")).split()) for message in body.get("messages", []))
+        usage = {"prompt_tokens": prompt_tokens, "completion_tokens": completion_tokens, "total_tokens": prompt_tokens + completion_tokens}
+        if body.get("stream"):
+            return StreamingResponse(stream_chunks(body, usage), media_type="text/event-stream")
+
+        content = " ".join(["palavra"] * completion_tokens)
+        if react_prompt(body):
+            if entities_prompt(body):
+                content = json.dumps({"entities": [{"text": "palavra", "type": "PERSON"}] * max(1, completion_tokens // 10)})
+            content = f"Thought: I now know the final answer\nFinal Answer: {content}"
+        return {
+            "id": f"chatcmpl-{uuid.uuid4().hex}",
+            "object": "chat.completion",
+            "created": int(time.time()),
+            "model": body.get("model", "fake"),
+            "choices": [{"index": 0, "message": {"role": "assistant", "content": content}, "finish_reason": "stop"}],
+            "usage": usage,
+        }
+
+    def react_prompt(body: dict) -> bool:
+        # CrewAI agents ask for ReAct formatted replies and retry until they get a "Final Answer:"
+        return any("Final Answer:" in str(message.get("content", "")) for message in body.get("messages", []))
+
+    def entities_prompt(body: dict) -> bool:
+        # The entity recognizer task expects a JSON object with an "entities" list
+        return any('"entities"' in str(message.get("content", "")) for message in body.get("messages", []))
+
+    async def stream_chunks(body: dict, usage: dict):
+        # One chunk per word, then the usage chunk when asked for and the [DONE] marker
+        completion_id = f"chatcmpl-{uuid.uuid4().hex}"
+        chunk = {"id": completion_id, "object": "chat.completion.chunk", "created": int(time.time()), "model": body.get("model", "fake")}
+        for index in range(completion_tokens):
+            content = "palavra" if index == 0 else " palavra"
+            yield f"data: {json.dumps({**chunk, 'choices': [{'index': 0, 'delta': {'content': content}, 'finish_reason': None}]})}\n\n"
+            await asyncio.sleep(0)
+        yield f"data: {json.dumps({**chunk, 'choices': [{'index': 0, 'delta': {}, 'finish_reason': 'stop'}]})}\n\n"
+        if (body.get("stream_options") or {}).get("include_usage"):
+            yield f"data: {json.dumps({**chunk, 'choices': [], 'usage': usage})}\n\n"
+        yield "data: [DONE]\n\n"
+
+    return app
+
+def start_in_thread(port: int, **settings) -> uvicorn.Server:
+    """Start the fake server in a daemon thread and wait until it accepts connections. Stop it with `server.should_exit = True`."""
+    server = uvicorn.Server(uvicorn.Config(create_app(**settings), host="127.0.0.1", port=port, log_level="warning"))
+    thread = threading.Thread(target=server.run, daemon=True)
+    thread.start()
+    while not server.started:
+        time.sleep(0.01)
+    return server
+
+def add_arguments(parser: argparse.ArgumentParser):
+    parser.add_argument("--latency", type=float, default=0.2, help="Seconds before every response")
+    parser.add_argument("--jitter", type=float, default=0.0, help="Extra random latency in seconds")
+    parser.add_argument("--rate-limit-ratio", type=float, default=0.0, help="Share of 429 responses")
+    parser.add_argument("--error-ratio", type=float, default=0.0, help="Share of 500 responses")
+    parser.add_argument("--completion-tokens", type=int, default=50)
+    parser.add_argument("--retry-after-ms", type=int, default=100)
+
+def server_settings(args) -> dict:
+    return {"latency": args.latency, "jitter": args.jitter, "rate_limit_ratio": args.rate_limit_ratio,
+            "error_ratio": args.error_ratio, "completion_tokens": args.completion_tokens, "retry_after_ms": args.retry_after_ms}
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8199)
+    add_arguments(parser)
+    args = parser.parse_args()
+    uvicorn.run(create_app(**server_settings(args)), host=args.host, port=args.port, log_level="warning")
+
+if __name__ == "__main__":
+    main()
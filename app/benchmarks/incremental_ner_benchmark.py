@@ -0,0 +1,71 @@
+"""
+Spacy time of a document sent again after small edits: the whole document through `spacy_entity_recognizer`
+against `spacy_entity_recognizer_incremental`, which only recognizes the changed paragraphs.
+
+The document is recognized once to fill the paragraph cache, then each round edits a few random paragraphs (a
+word replaced, and once in a while a paragraph inserted) and times both modes on the edited text. "agreement" is
+the share of entities (value, type and offsets) found by both modes, as paragraphs are recognized on their own.
+Run from the repository root (needs the pt model):
+    python -m app.benchmarks.incremental_ner_benchmark --paragraphs 200 --edits 2 --rounds 10
+"""
+import argparse
+import random
+import time
+
+from app.benchmarks.prompt_tokens_benchmark import SENTENCES
+
+def build_document(paragraphs: int, rng: random.Random) -> list:
+    return [" ".join(rng.choice(SENTENCES) for _ in range(rng.randint(3, 8))) for _ in range(paragraphs)]
+
+def edit(paragraphs: list, edits: int, rng: random.Random) -> list:
+    edited = list(paragraphs)
+    for _ in range(edits):
+        index = rng.randrange(len(edited))
+        words = edited[index].split()
+        words[rng.randrange(len(words))] = rng.choice(["Recife", "Natal", "revisado", "Vale"])
+        edited[index] = " ".join(words)
+    if rng.random() < 0.3:
+        edited.insert(rng.randrange(len(edited)), rng.choice(SENTENCES))
+    return edited
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--paragraphs", type=int, default=200, help="Paragraphs of the document")
+    parser.add_argument("--edits", type=int, default=2, help="Paragraphs edited per round")
+    parser.add_argument("--rounds", type=int, default=10)
+    parser.add_argument("--seed", type=int, default=7)
+    args = parser.parse_args()
+
+    from app.mycrews.helper.incremental_ner import spacy_entity_recognizer_incremental
+    from app.mycrews.helper.spacy_entity_recognizer import spacy_entity_recognizer
+
+    rng = random.Random(args.seed)
+    paragraphs = build_document(args.paragraphs, rng)
+    text = "\n\n".join(paragraphs)
+    spacy_entity_recognizer(text)
+    spacy_entity_recognizer_incremental(text)
+
+    full_seconds = incremental_seconds = 0.0
+    found = shared = recognized = 0
+    for _ in range(args.rounds):
+        paragraphs = edit(paragraphs, args.edits, rng)
+        text = "\n\n".join(paragraphs)
+        start = time.perf_counter()
+        full = spacy_entity_recognizer(text)
+        full_seconds += time.perf_counter() - start
+        start = time.perf_counter()
+        incremental, reuse = spacy_entity_recognizer_incremental(text)
+        incremental_seconds += time.perf_counter() - start
+
+        keys = lambda entities: {(entity["value"], entity["type"], entity["start"], entity["end"]) for entity in entities}
+        found += len(keys(full) | keys(incremental))
+        shared += len(keys(full) & keys(incremental))
+        recognized += reuse["recognized_paragraphs"]
+
+    print(f"{args.paragraphs} paragraphs ({len(text)} chars), {args.edits} edits per round, {args.rounds} rounds: "
+          f"full {full_seconds / args.rounds * 1000:.1f}ms, incremental {incremental_seconds / args.rounds * 1000:.1f}ms "
+          f"({full_seconds / incremental_seconds:.1f}x), {recognized / args.rounds:.1f} paragraphs recognized per round, "
+          f"{found / args.rounds:.0f} entities per round, agreement {shared / found if found else 1:.1%}")
+
+if __name__ == "__main__":
+    main()
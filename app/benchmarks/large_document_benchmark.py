@@ -0,0 +1,82 @@
+"""
+Memory and latency of the Spacy entity recognizer on a large synthetic document (10 MB by default):
+the whole text in one call against the chunked pipeline, from a string and from a stream of pieces.
+
+Every mode runs in its own process, so its peak RSS is not hidden by the previous one. Run from the
+repository root:
+    python -m app.benchmarks.large_document_benchmark --megabytes 10 --chunk-size 100000 --overlap 200
+    python -m app.benchmarks.large_document_benchmark --megabytes 10 --modes chunked-stream --n-process 2
+"""
+import argparse
+import json
+import random
+import resource
+import subprocess
+import sys
+import time
+
+from app.benchmarks.batch_ner_benchmark import SENTENCES
+
+MODES = ("whole", "chunked", "chunked-stream")
+
+def iter_document(megabytes: float, piece_size: int = 64 * 1024, seed: int = 42):
+    # Paragraphs of Portuguese sentences, generated piece by piece so the document never exists as a whole
+    rng = random.Random(seed)
+    remaining = int(megabytes * 1024 * 1024)
+    buffer = ""
+    while remaining > 0:
+        while len(buffer) < piece_size:
+            buffer += " ".join(rng.choice(SENTENCES["pt"]) for _ in range(rng.randint(3, 8))) + "\n\n"
+        piece, buffer = buffer[:min(piece_size, remaining)], buffer[piece_size:]
+        remaining -= len(piece)
+        yield piece
+
+def peak_rss_mb() -> float:
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+def run_mode(mode: str, args) -> dict:
+    from app.mycrews.helper.spacy_entity_recognizer import nlp, spacy_entity_recognizer_chunked
+
+    nlp["pt"]("Carregar o modelo.")
+    baseline = peak_rss_mb()
+    start = time.perf_counter()
+    if mode == "whole":
+        text = "".join(iter_document(args.megabytes))
+        nlp["pt"].max_length = len(text) + 1
+        entities = len(nlp["pt"](text).ents)
+    else:
+        text = "".join(iter_document(args.megabytes)) if mode == "chunked" else iter_document(args.megabytes)
+        entities = sum(1 for _ in spacy_entity_recognizer_chunked(text, "pt", [], chunk_size=args.chunk_size, overlap=args.overlap,
+                                                                  batch_size=args.batch_size, n_process=args.n_process))
+    elapsed = time.perf_counter() - start
+    return {"mode": mode, "seconds": round(elapsed, 2), "entities": entities, "baseline_rss_mb": round(baseline, 1),
+            "peak_rss_mb": round(peak_rss_mb(), 1), "peak_increase_mb": round(peak_rss_mb() - baseline, 1)}
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--megabytes", type=float, default=10)
+    parser.add_argument("--chunk-size", type=int, default=100000)
+    parser.add_argument("--overlap", type=int, default=200)
+    parser.add_argument("--batch-size", type=int, default=4)
+    parser.add_argument("--n-process", type=int, default=1)
+    parser.add_argument("--modes", default=",".join(MODES), help=f"Comma-separated modes among {', '.join(MODES)}")
+    parser.add_argument("--child", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        print(json.dumps(run_mode(args.child, args)))
+        return
+
+    for mode in args.modes.split(","):
+        command = [sys.executable, "-m", "app.benchmarks.large_document_benchmark", "--child", mode] + sys.argv[1:]
+        completed = subprocess.run(command, capture_output=True, text=True)
+        if completed.returncode < 0:
+            # Usually the kernel's OOM killer, which is what the whole-text mode runs into on large documents
+            print(json.dumps({"mode": mode, "error": f"killed by signal {-completed.returncode}"}))
+        elif completed.returncode != 0:
+            print(json.dumps({"mode": mode, "error": completed.stderr.strip().splitlines()[-1:]}))
+        else:
+            print(completed.stdout.strip().splitlines()[-1])
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,75 @@
+"""
+Load test measuring /liveness latency while NER and LLM calls are in flight.
+
+Start the API in another shell (from the repository root):
+    uvicorn app.main:app --port 8181
+
+Then run:
+    python -m app.benchmarks.liveness_load_benchmark --url http://localhost:8181 --ner-clients 8 --llm-clients 4
+
+LLM load goes to the synchronous branch of /open/test, so point OPENAI_BASE_URL of the API at a
+local OpenAI-compatible server (or use --llm-clients 0) to avoid spending tokens.
+"""
+import argparse
+import asyncio
+import statistics
+import time
+
+import httpx
+
+LONG_TEXT = " ".join(["Maria Silva trabalha na Petrobras em São Paulo desde 2010."] * 400)
+
+def percentile(values: list, pct: float) -> float:
+    if not values:
+        return float("nan")
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))
+    return ordered[index]
+
+async def ner_client(client: httpx.AsyncClient, stop: asyncio.Event, counters: dict):
+    while not stop.is_set():
+        response = await client.post("/general/entityRecognizer", json={"fulltext": LONG_TEXT, "entities": []})
+        counters[response.status_code] = counters.get(response.status_code, 0) + 1
+
+async def llm_client(client: httpx.AsyncClient, stop: asyncio.Event, counters: dict):
+    while not stop.is_set():
+        response = await client.post("/open/test", json={"objective": "o mar", "async_execution": False})
+        counters[response.status_code] = counters.get(response.status_code, 0) + 1
+
+async def liveness_probe(client: httpx.AsyncClient, stop: asyncio.Event, latencies: list, interval: float):
+    while not stop.is_set():
+        start = time.perf_counter()
+        await client.get("/liveness")
+        latencies.append((time.perf_counter() - start) * 1000)
+        await asyncio.sleep(interval)
+
+async def run(args):
+    stop = asyncio.Event()
+    latencies = []
+    counters = {}
+    timeout = httpx.Timeout(300.0)
+    limits = httpx.Limits(max_connections=args.ner_clients + args.llm_clients + 1)
+    async with httpx.AsyncClient(base_url=args.url, timeout=timeout, limits=limits) as client:
+        workers = [asyncio.create_task(ner_client(client, stop, counters)) for _ in range(args.ner_clients)]
+        workers += [asyncio.create_task(llm_client(client, stop, counters)) for _ in range(args.llm_clients)]
+        probe = asyncio.create_task(liveness_probe(client, stop, latencies, args.interval))
+        await asyncio.sleep(args.duration)
+        stop.set()
+        await asyncio.gather(probe, *workers, return_exceptions=True)
+
+    print(f"liveness samples: {len(latencies)}")
+    print(f"liveness p50: {percentile(latencies, 50):.1f} ms  p99: {percentile(latencies, 99):.1f} ms  "
+          f"max: {max(latencies, default=float('nan')):.1f} ms  mean: {statistics.fmean(latencies) if latencies else float('nan'):.1f} ms")
+    print(f"background responses by status: {dict(sorted(counters.items()))}")
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--url", default="http://localhost:8181")
+    parser.add_argument("--ner-clients", type=int, default=8)
+    parser.add_argument("--llm-clients", type=int, default=0)
+    parser.add_argument("--duration", type=float, default=20.0, help="Seconds of load")
+    parser.add_argument("--interval", type=float, default=0.05, help="Seconds between liveness probes")
+    asyncio.run(run(parser.parse_args()))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,59 @@
+"""
+Requests/sec of the async pooled OpenAI client against the former blocking client, at a fixed concurrency.
+
+Both clients call a local fake OpenAI server that simulates latency and 429 responses. The blocking
+client is called from coroutines, as `create_poem` used to be, so it holds the event loop during every
+call. Run from the repository root:
+    python -m app.benchmarks.llm_client_benchmark --requests 200 --concurrency 32 --latency 0.2 --rate-limit-ratio 0.05
+"""
+import argparse
+import asyncio
+import time
+
+from openai import OpenAI
+
+from app.benchmarks.fake_openai_server import add_arguments, server_settings, start_in_thread
+from app.mycrews.helper.llm_client import AsyncLLMClient
+
+MESSAGES = [{"role": "assistant", "content": "You are a poet, write a creative and emotional poem about the theme: o mar"}]
+
+async def run_blocking(base_url: str, requests: int, concurrency: int) -> tuple:
+    client = OpenAI(api_key="fake", base_url=base_url, max_retries=10)
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def call():
+        async with semaphore:
+            client.chat.completions.create(messages=MESSAGES, model="o1-mini")
+
+    start = time.perf_counter()
+    results = await asyncio.gather(*(call() for _ in range(requests)), return_exceptions=True)
+    return time.perf_counter() - start, sum(isinstance(result, Exception) for result in results)
+
+async def run_async(base_url: str, requests: int, concurrency: int) -> tuple:
+    client = AsyncLLMClient(api_key="fake", base_url=base_url, max_concurrency=concurrency, max_retries=10)
+    start = time.perf_counter()
+    results = await asyncio.gather(*(client.complete(MESSAGES, model="o1-mini") for _ in range(requests)), return_exceptions=True)
+    elapsed = time.perf_counter() - start
+    await client.aclose()
+    return elapsed, sum(isinstance(result, Exception) for result in results)
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--port", type=int, default=8199)
+    parser.add_argument("--requests", type=int, default=200)
+    parser.add_argument("--concurrency", type=int, default=32)
+    add_arguments(parser)
+    args = parser.parse_args()
+
+    server = start_in_thread(args.port, **server_settings(args))
+    base_url = f"http://127.0.0.1:{args.port}/v1"
+    try:
+        for name, runner in (("blocking OpenAI client", run_blocking), ("async pooled client", run_async)):
+            elapsed, errors = asyncio.run(runner(base_url, args.requests, args.concurrency))
+            print(f"{name}: {args.requests} requests at concurrency {args.concurrency} in {elapsed:.2f}s "
+                  f"-> {args.requests / elapsed:.1f} req/s, {errors} errors")
+    finally:
+        server.should_exit = True
+
+if __name__ == "__main__":
+    main()
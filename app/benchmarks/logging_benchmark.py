@@ -0,0 +1,137 @@
+"""
+Per-request cost of logging: the former print calls against structured async logging, and crews with CREW_VERBOSE on and off.
+
+"logging" times the logging done by one crew request, with a crew output of --payload-kb kilobytes:
+    print    the former synchronous prints of the raw, JSON and task outputs and token usage
+    sync     structured records at INFO (payloads skipped) written by a StreamHandler in the calling thread
+    async    same records through the queue handler, written by the listener thread
+    sampled  same at DEBUG, payloads truncated and kept for LOG_PAYLOAD_SAMPLE_RATE of the requests
+Records go to --sink (a file by default, like a container log), so the cost of the writes is included.
+
+"crew" times sequential crew kickoffs against a local fake OpenAI server with verbose on and off.
+Run from the repository root:
+    python -m app.benchmarks.logging_benchmark --requests 2000 --payload-kb 16
+    python -m app.benchmarks.logging_benchmark --modes crew --kickoffs 20 --latency 0.05
+"""
+import argparse
+import contextlib
+import json
+import logging
+import os
+import sys
+import tempfile
+import time
+from types import SimpleNamespace
+
+from app.benchmarks.fake_openai_server import add_arguments, server_settings, start_in_thread
+from app.mycrews.helper import structured_logging
+from app.mycrews.helper.structured_logging import JsonFormatter, log_payload, setup_logging, stop_logging
+
+MODES = ("print", "sync", "async", "sampled", "crew")
+
+def fake_result(payload_kb: int) -> SimpleNamespace:
+    entities = [{"text": f"Maria Silva {index}", "type": "PER"} for index in range(payload_kb * 1024 // 40)]
+    raw = json.dumps({"entities": entities})
+    usage = SimpleNamespace(total_tokens=1200, prompt_tokens=1000, completion_tokens=200)
+    return SimpleNamespace(raw=raw, json_dict={"entities": entities}, pydantic=None, token_usage=usage,
+                           tasks_output=[SimpleNamespace(raw=raw)])
+
+def log_request(mode: str, logger: logging.Logger, result):
+    if mode == "print":
+        print("EntityRecognizerCrew started")
+        print(f"Raw Output: {result.raw}")
+        print(f"json_dict: {result.json_dict}")
+        print(f"JSON Output: {json.dumps(result.json_dict, indent=2)}")
+        print(f"Tasks Output: {result.tasks_output}")
+        print(f"Token Usage: {result.token_usage}")
+        return
+    # Same records as log_crew_result in main.py
+    logger.info("Crew entity_recognizer started")
+    logger.info("Crew %s finished", "entity_recognizer", extra={"fields": {"total_tokens": result.token_usage.total_tokens}})
+    log_payload(logger, "Crew entity_recognizer output", raw=result.raw, json_dict=result.json_dict, pydantic=result.pydantic,
+                tasks_output=[task.raw for task in result.tasks_output], token_usage=result.token_usage)
+
+def run_logging(mode: str, requests: int, payload_kb: int, sink: str, sample_rate: float) -> dict:
+    result = fake_result(payload_kb)
+    logger = logging.getLogger("benchmark")
+    root = logging.getLogger()
+    level = root.level
+    with open(sink, "w") as output, contextlib.redirect_stdout(output):
+        if mode == "sync":
+            handler = logging.StreamHandler(output)
+            handler.setFormatter(JsonFormatter())
+            root.addHandler(handler)
+            root.setLevel(logging.INFO)
+        elif mode in ("async", "sampled"):
+            setup_logging(level="DEBUG" if mode == "sampled" else "INFO", levels="", stream=output)
+            structured_logging.LOG_PAYLOAD_SAMPLE_RATE = sample_rate
+
+        start = time.perf_counter()
+        for _ in range(requests):
+            log_request(mode, logger, result)
+        # Time seen by requests; the listener thread may still be writing
+        elapsed = time.perf_counter() - start
+        stop_logging()
+        if mode == "sync":
+            root.removeHandler(handler)
+        root.setLevel(level)
+        output.flush()
+    return {"mode": mode, "requests": requests, "us_per_request": round(elapsed / requests * 1e6, 1),
+            "written_mb": round(os.path.getsize(sink) / 1024 / 1024, 2)}
+
+def run_crews(kickoffs: int, sink: str) -> list:
+    from mycrews.crews import create_mycrew
+
+    results = []
+    for verbose in (False, True):
+        crew = create_mycrew()
+        crew.verbose = verbose
+        for agent in crew.agents:
+            agent.verbose = verbose
+        crew.kickoff(inputs={"text": "aquecimento"})
+        with open(sink, "w") as output, contextlib.redirect_stdout(output):
+            start = time.perf_counter()
+            for index in range(kickoffs):
+                crew.kickoff(inputs={"text": f"tema-{index}"})
+            elapsed = time.perf_counter() - start
+        results.append({"mode": f"crew verbose={'on' if verbose else 'off'}", "requests": kickoffs,
+                        "us_per_request": round(elapsed / kickoffs * 1e6, 1),
+                        "written_mb": round(os.path.getsize(sink) / 1024 / 1024, 2)})
+    return results
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--modes", default=",".join(MODES), help=f"Comma-separated modes among {', '.join(MODES)}")
+    parser.add_argument("--requests", type=int, default=2000, help="Logged requests per logging mode")
+    parser.add_argument("--payload-kb", type=int, default=16, help="Size of the crew output logged by each request")
+    parser.add_argument("--sample-rate", type=float, default=0.1, help="LOG_PAYLOAD_SAMPLE_RATE of the sampled mode")
+    parser.add_argument("--kickoffs", type=int, default=20, help="Crew kickoffs per verbosity")
+    parser.add_argument("--sink", default=os.path.join(tempfile.gettempdir(), "logging_benchmark.log"), help="File receiving the logs")
+    parser.add_argument("--port", type=int, default=8199, help="Port of the fake OpenAI server")
+    add_arguments(parser)
+    args = parser.parse_args()
+
+    rows = []
+    modes = args.modes.split(",")
+    for mode in modes:
+        if mode not in MODES:
+            parser.error(f"Unknown mode '{mode}'. Available options: {list(MODES)}")
+        if mode != "crew":
+            rows.append(run_logging(mode, args.requests, args.payload_kb, args.sink, args.sample_rate))
+
+    if "crew" in modes:
+        server = start_in_thread(args.port, **server_settings(args))
+        # The crew modules read the endpoint when they are imported, and are imported like main.py does
+        os.environ["OPENAI_BASE_URL"] = f"http://127.0.0.1:{args.port}/v1"
+        os.environ.setdefault("OPENAI_API_KEY", "fake")
+        sys.path.append("./app")
+        try:
+            rows.extend(run_crews(args.kickoffs, args.sink))
+        finally:
+            server.should_exit = True
+
+    for row in rows:
+        print(f"{row['mode']}: {row['us_per_request']} us per request, {row['written_mb']} MB written for {row['requests']} requests")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,70 @@
+"""
+Throughput of the rule-based extractor (NUMBER, MONEY, MEASURE, DATE, EMAIL, URL), one call per document
+against the batch API, optionally next to the Spacy recognizer on the same documents.
+
+Run from the repository root:
+    python -m app.benchmarks.numeric_extractor_benchmark --docs 20000 --sentences-per-doc 3
+    python -m app.benchmarks.numeric_extractor_benchmark --docs 2000 --spacy
+"""
+import argparse
+import random
+import time
+
+from app.mycrews.helper.extract_numeric_values import extract_numeric_values, extract_numeric_values_batch
+
+# Sentences mixing every type served by the extractor with plain text
+SENTENCES = [
+    "Ela pagou vinte e cinco reais e cinquenta centavos pela entrada.",
+    "O contrato de R$ 1.234,56 foi assinado em 12/03/2024 às 14h30.",
+    "A distância foi de vinte e cinco km e a área mediu trezentos e cinco metros quadrados.",
+    "Envie o relatório para contato@empresa.com.br ou acesse https://empresa.com.br/relatorios.",
+    "A empresa faturou US$ 2 milhões no trimestre, alta de 15% sobre o anterior.",
+    "Maria Silva trabalha na Petrobras desde 5 de março de 2010.",
+    "O pacote pesava quarenta e cinco gramas e custou $10.50.",
+    "Nenhum valor aparece nesta frase sobre o clima de hoje.",
+]
+
+def build_texts(count: int, sentences_per_doc: int, seed: int = 42) -> list:
+    rng = random.Random(seed)
+    return [" ".join(rng.choice(SENTENCES) for _ in range(sentences_per_doc)) for _ in range(count)]
+
+def run_loop(texts: list) -> tuple:
+    start = time.perf_counter()
+    entities = sum(len(extract_numeric_values(text)) for text in texts)
+    return time.perf_counter() - start, entities
+
+def run_batch(texts: list, batch_size: int) -> tuple:
+    start = time.perf_counter()
+    entities = 0
+    for offset in range(0, len(texts), batch_size):
+        entities += sum(len(result) for result in extract_numeric_values_batch(texts[offset:offset + batch_size]))
+    return time.perf_counter() - start, entities
+
+def run_spacy(texts: list) -> tuple:
+    from app.mycrews.helper.spacy_entity_recognizer import spacy_entity_recognizer_batch
+
+    start = time.perf_counter()
+    results = spacy_entity_recognizer_batch([{"text": text, "lang": "pt"} for text in texts])
+    return time.perf_counter() - start, sum(len(result) for result in results)
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--docs", type=int, default=20000)
+    parser.add_argument("--sentences-per-doc", type=int, default=3)
+    parser.add_argument("--batch-size", type=int, default=256)
+    parser.add_argument("--spacy", action="store_true", help="Also time the Spacy batch recognizer (needs the pt model)")
+    args = parser.parse_args()
+
+    texts = build_texts(args.docs, args.sentences_per_doc)
+    megabytes = sum(len(text.encode("utf-8")) for text in texts) / 1024 / 1024
+
+    runs = [("one call per document", lambda: run_loop(texts)), (f"batch of {args.batch_size}", lambda: run_batch(texts, args.batch_size))]
+    if args.spacy:
+        runs.append(("spacy batch (PERSON/ORG/LOCATION only)", lambda: run_spacy(texts)))
+    for name, runner in runs:
+        elapsed, entities = runner()
+        print(f"{name}: {args.docs} docs ({megabytes:.1f} MB), {entities} entities in {elapsed:.3f}s "
+              f"-> {args.docs / elapsed:,.0f} docs/s, {megabytes / elapsed:.1f} MB/s")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,137 @@
+"""
+Memory and throughput of the API by number of workers: the pre-fork master of python -m app --workers, whose
+workers share the Spacy pipelines loaded before forking, against uvicorn --workers, whose workers each import the
+app and load their own pipelines (APP_WARMUP=spacy).
+
+Memory is summed over the server process and all its descendants once they are ready, and again after the load
+(pages written by a worker stop being shared): RSS counts shared pages once per process, PSS splits each one
+between the processes sharing it, so it is the actual memory used.
+Throughput comes from concurrent /spacy/entityRecognizer requests for a fixed duration. The load generator runs
+on the same host, so throughput only grows with workers while there are free cores. Run from the repository root:
+    python -m app.benchmarks.prefork_benchmark --workers 1,4,16 --duration 10 --concurrency 32
+"""
+import argparse
+import asyncio
+import os
+import subprocess
+import sys
+import time
+
+import httpx
+
+MODES = ("prefork", "uvicorn")
+
+TEXT = ("Maria Silva trabalha na Petrobras em São Paulo. O presidente do Banco do Brasil visitou Brasília na "
+        "segunda-feira. João Souza e Ana Pereira fundaram uma empresa em Curitiba. ") * 4
+
+def descendants(pid: int) -> list:
+    children = {}
+    for entry in os.listdir("/proc"):
+        if entry.isdigit():
+            try:
+                with open(f"/proc/{entry}/stat") as stat:
+                    parent = int(stat.read().rsplit(")", 1)[1].split()[1])
+            except (OSError, IndexError, ValueError):
+                continue
+            children.setdefault(parent, []).append(int(entry))
+    found, pending = [pid], [pid]
+    while pending:
+        for child in children.get(pending.pop(), []):
+            found.append(child)
+            pending.append(child)
+    return found
+
+def tree_memory(pid: int) -> dict:
+    # Kilobytes of RSS and PSS of the process and its descendants
+    totals = {"processes": 0, "rss_kb": 0, "pss_kb": 0}
+    for process in descendants(pid):
+        try:
+            with open(f"/proc/{process}/smaps_rollup") as rollup:
+                fields = dict(line.split(":", 1) for line in rollup if line[0].isupper())
+        except OSError:
+            continue
+        totals["processes"] += 1
+        totals["rss_kb"] += int(fields["Rss"].split()[0])
+        totals["pss_kb"] += int(fields["Pss"].split()[0])
+    return totals
+
+def start_server(mode: str, workers: int, port: int) -> subprocess.Popen:
+    env = dict(os.environ, TASK_STORE_BACKEND="sqlite", LOG_LEVEL="WARNING")
+    if mode == "prefork":
+        command = [sys.executable, "-m", "app", "--port", str(port), "--workers", str(workers)]
+    else:
+        env["APP_WARMUP"] = "spacy"
+        command = [sys.executable, "-m", "uvicorn", "app.main:app", "--port", str(port), "--workers", str(workers),
+                   "--log-level", "warning"]
+    return subprocess.Popen(command, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+
+def wait_ready(server: subprocess.Popen, workers: int, port: int, timeout: float = 300.0):
+    # Ready once every worker process answers and the memory of the tree stopped growing
+    deadline, last, stable_since = time.time() + timeout, None, None
+    while time.time() < deadline:
+        if server.poll() is not None:
+            raise RuntimeError(f"Server exited with code {server.returncode}")
+        memory = tree_memory(server.pid)
+        try:
+            answered = httpx.get(f"http://127.0.0.1:{port}/liveness", timeout=5).status_code == 200
+        except httpx.HTTPError:
+            answered = False
+        if answered and memory["processes"] >= workers and memory["rss_kb"] == last:
+            if time.time() - stable_since >= 2:
+                return
+        else:
+            stable_since = time.time()
+        last = memory["rss_kb"]
+        time.sleep(0.5)
+    raise RuntimeError(f"Server not ready after {timeout}s")
+
+async def load(port: int, duration: float, concurrency: int) -> dict:
+    latencies, errors = [], 0
+    async with httpx.AsyncClient(base_url=f"http://127.0.0.1:{port}", timeout=60,
+                                 limits=httpx.Limits(max_connections=concurrency)) as client:
+        # One request per worker at least, out of the measures
+        await asyncio.gather(*(client.post("/spacy/entityRecognizer", json={"fulltext": TEXT}) for _ in range(concurrency)))
+        deadline = time.perf_counter() + duration
+
+        async def user():
+            nonlocal errors
+            while time.perf_counter() < deadline:
+                start = time.perf_counter()
+                response = await client.post("/spacy/entityRecognizer", json={"fulltext": TEXT})
+                if response.status_code == 200:
+                    latencies.append(time.perf_counter() - start)
+                else:
+                    errors += 1
+
+        await asyncio.gather(*(user() for _ in range(concurrency)))
+    latencies.sort()
+    return {"requests_per_second": len(latencies) / duration, "errors": errors,
+            "p99_ms": latencies[int(len(latencies) * 0.99) - 1] * 1000 if latencies else None}
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--workers", default="1,4,16", help="Comma-separated numbers of workers")
+    parser.add_argument("--modes", default=",".join(MODES), help=f"Comma-separated modes among {', '.join(MODES)}")
+    parser.add_argument("--duration", type=float, default=10.0, help="Seconds of load for each run")
+    parser.add_argument("--concurrency", type=int, default=32, help="Requests in flight")
+    parser.add_argument("--port", type=int, default=8199)
+    args = parser.parse_args()
+
+    for workers in (int(value) for value in args.workers.split(",")):
+        for mode in args.modes.split(","):
+            server = start_server(mode, workers, args.port)
+            try:
+                wait_ready(server, workers, args.port)
+                memory = tree_memory(server.pid)
+                result = asyncio.run(load(args.port, args.duration, args.concurrency))
+                loaded = tree_memory(server.pid)
+            finally:
+                server.terminate()
+                server.wait(60)
+            p99 = f"{result['p99_ms']:.0f}ms" if result["p99_ms"] is not None else "n/a"
+            print(f"{mode} {workers} workers: {memory['processes']} processes, RSS {memory['rss_kb'] / 1024:.0f}MB, "
+                  f"PSS {memory['pss_kb'] / 1024:.0f}MB ({loaded['pss_kb'] / 1024:.0f}MB after load), {result['requests_per_second']:.1f} req/s, p99 {p99}, "
+                  f"{result['errors']} errors", flush=True)
+
+if __name__ == "__main__":
+    main()
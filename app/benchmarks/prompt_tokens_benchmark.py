@@ -0,0 +1,65 @@
+"""
+Prompt size of the entity recognizer crew by document size: prompt tokens counted before the kickoff (tiktoken)
+against the prompt tokens of its task reported by the LLM, and the size of the entity recognizer tool
+observation (raw Spacy output as JSON against the compact observation sent to the LLM).
+
+Crews run against a local fake OpenAI server, which counts prompt tokens as words and answers every prompt with
+a final answer, so each task makes a single LLM call. The token budget is disabled for the measure. Run from the
+repository root (needs the pt model):
+    python -m app.benchmarks.prompt_tokens_benchmark --words 100,1000,5000
+"""
+import argparse
+import json
+import os
+import sys
+
+from app.benchmarks.fake_openai_server import start_in_thread
+
+# Sentences repeated up to the document size, with a few entities each
+SENTENCES = [
+    "Maria Silva trabalha na Petrobras em São Paulo.",
+    "O presidente do Banco do Brasil visitou Brasília na segunda-feira.",
+    "João Souza e Ana Pereira fundaram uma empresa em Curitiba.",
+    "A Embraer anunciou um contrato com a Azul em Campinas.",
+]
+
+def document(words: int) -> str:
+    sentences, count = [], 0
+    while count < words:
+        sentence = SENTENCES[len(sentences) % len(SENTENCES)]
+        sentences.append(sentence)
+        count += len(sentence.split())
+    return " ".join(sentences)
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--words", default="100,1000,5000", help="Comma-separated document sizes in words")
+    parser.add_argument("--port", type=int, default=8196, help="Port of the fake OpenAI server")
+    args = parser.parse_args()
+
+    server = start_in_thread(args.port, latency=0.0, completion_tokens=20)
+    # The crew modules read the endpoint when they are imported, and are imported like main.py does
+    os.environ["OPENAI_BASE_URL"] = f"http://127.0.0.1:{args.port}/v1"
+    os.environ.setdefault("OPENAI_API_KEY", "fake")
+    sys.path.append("./app")
+    from mycrews.entity_recognizer_crew import create_entity_recognizer_crew
+    from app.mycrews.helper.crew_pool import CrewPool
+    from app.mycrews.helper.crew_prompts import check_prompt_budget, compact_observation
+    from app.mycrews.helper.spacy_entity_recognizer import spacy_entity_recognizer
+
+    try:
+        pool = CrewPool("benchmark", create_entity_recognizer_crew, size=1, warmup=1)
+        for words in (int(value) for value in args.words.split(",")):
+            text = document(words)
+            counted = check_prompt_budget(pool, {"text": text}, budget=0)
+            usage = []
+            pool.kickoff({"text": text}, on_finish=usage.extend)
+            entities = spacy_entity_recognizer(text)
+            raw, compact = json.dumps(entities, ensure_ascii=False), compact_observation(entities)
+            print(f"{words} words: {counted} prompt tokens counted, {usage[0]['prompt_tokens']} words in the task prompt, "
+                  f"tool observation {len(raw)} chars raw, {len(compact)} chars compact")
+    finally:
+        server.should_exit = True
+
+if __name__ == "__main__":
+    main()
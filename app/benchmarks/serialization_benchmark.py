@@ -0,0 +1,93 @@
+"""
+Time and payload size of entity responses: FastAPI response models (untyped dicts as before, typed entities)
+against FastJSONResponse (orjson when installed), with entities as objects or in the columnar format.
+
+Every mode is a route of an in-process app returning the same prebuilt entities, called through the ASGI test
+client, so the timings hold validation, encoding and the response itself, without inference. Entities mix Spacy
+entities and rule-based ones, like /general/entityRecognizer. Run from the repository root:
+    python -m app.benchmarks.serialization_benchmark --entities 10000 --requests 50
+"""
+import argparse
+import random
+import time
+from typing import List, Union
+
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from pydantic import BaseModel
+
+from app.mycrews.helper.entity_serialization import Entity, EntityColumns, FastJSONResponse, format_entities, orjson
+
+class UntypedResponse(BaseModel):
+    entities: List[dict]
+
+class TypedResponse(BaseModel):
+    entities: Union[List[Entity], EntityColumns]
+
+def build_entities(count: int, seed: int = 42) -> list:
+    rng = random.Random(seed)
+    entities, position = [], 0
+    for _ in range(count):
+        if rng.random() < 0.8:
+            value, entity_type, label = rng.choice([("Maria Silva", "PERSON", "PER"), ("Petrobras", "ORG", "ORG"), ("São Paulo", "LOCATION", "LOCATION")])
+            entity = {"value": value, "type": entity_type, "label": label, "start": position, "end": position + len(value)}
+        else:
+            entity = {"value": round(rng.uniform(1, 10000), 2), "type": "MONEY", "unit": "BRL", "symbol": "R$",
+                      "source": "R$ 1.234,56", "start": position, "end": position + 11}
+        entities.append(entity)
+        position = entity["end"] + rng.randint(5, 80)
+    return entities
+
+def create_app(entities: list) -> FastAPI:
+    app = FastAPI()
+    columns = format_entities(entities, "columns")
+
+    @app.get("/dicts", response_model=UntypedResponse)
+    def dicts():
+        return {"entities": entities}
+
+    @app.get("/typed", response_model=TypedResponse)
+    def typed():
+        return {"entities": entities}
+
+    @app.get("/typed-columns", response_model=TypedResponse)
+    def typed_columns():
+        return {"entities": columns}
+
+    @app.get("/fast", response_model=TypedResponse)
+    def fast():
+        return FastJSONResponse({"entities": entities})
+
+    @app.get("/fast-columns", response_model=TypedResponse)
+    def fast_columns():
+        return FastJSONResponse({"entities": format_entities(entities, "columns")})
+
+    return app
+
+# Mode -> route, in report order
+MODES = {
+    "response model, untyped dicts (before)": "/dicts",
+    "response model, typed entities": "/typed",
+    "response model, columns": "/typed-columns",
+    "FastJSONResponse, objects": "/fast",
+    "FastJSONResponse, columns": "/fast-columns",
+}
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--entities", type=int, default=10000, help="Entities per response")
+    parser.add_argument("--requests", type=int, default=50, help="Requests per mode")
+    args = parser.parse_args()
+
+    client = TestClient(create_app(build_entities(args.entities)))
+    print(f"{args.entities} entities per response, encoder: {'orjson ' + orjson.__version__ if orjson else 'json (orjson not installed)'}")
+    for mode, path in MODES.items():
+        body = client.get(path).content
+        start = time.perf_counter()
+        for _ in range(args.requests):
+            client.get(path)
+        elapsed = (time.perf_counter() - start) / args.requests
+        print(f"{mode}: {elapsed * 1000:.1f} ms per response, {len(body) / 1024:.0f} KB")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,51 @@
+"""
+Startup time and RSS of a worker with eagerly loaded models versus the lazy model registry.
+
+Each configuration runs in a fresh interpreter, which imports the Spacy helper (what a worker does
+at startup) and then serves one Portuguese request. Run from the repository root:
+    python -m app.benchmarks.startup_benchmark
+"""
+import json
+import os
+import subprocess
+import sys
+
+# Code executed by every child interpreter, printing its measurements as JSON
+CHILD = r"""
+import json, time
+def rss_mb():
+    import os
+    with open("/proc/self/statm") as statm:
+        return int(statm.read().split()[1]) * os.sysconf("SC_PAGE_SIZE") / 1024 / 1024
+start = time.perf_counter()
+from app.mycrews.helper.spacy_entity_recognizer import nlp, spacy_entity_recognizer
+startup = time.perf_counter() - start
+startup_rss = rss_mb()
+start = time.perf_counter()
+spacy_entity_recognizer("Maria Silva trabalha na Petrobras em São Paulo.", "pt")
+first_request = time.perf_counter() - start
+print(json.dumps({"startup_s": startup, "startup_rss_mb": startup_rss, "first_request_s": first_request,
+                  "rss_after_first_request_mb": rss_mb(), "loaded": nlp.loaded()}))
+"""
+
+# Eager reproduces the former behavior: every model fully loaded at import
+CONFIGURATIONS = {
+    "eager (all models, full pipelines)": {"SPACY_PRELOAD": "pt,en", "SPACY_EXCLUDE_PIPES": ""},
+    "lazy (on first use, parser/lemmatizer excluded)": {"SPACY_PRELOAD": "", "SPACY_EXCLUDE_PIPES": "parser,lemmatizer"},
+}
+
+def measure(env_overrides: dict) -> dict:
+    env = {**os.environ, **env_overrides}
+    output = subprocess.run([sys.executable, "-c", CHILD], env=env, capture_output=True, text=True, check=True).stdout
+    return json.loads(output.strip().splitlines()[-1])
+
+def main():
+    for name, env_overrides in CONFIGURATIONS.items():
+        result = measure(env_overrides)
+        print(f"{name}:")
+        print(f"  startup: {result['startup_s']:.2f}s  RSS {result['startup_rss_mb']:.0f} MB")
+        print(f"  first pt request: {result['first_request_s']:.2f}s  RSS {result['rss_after_first_request_mb']:.0f} MB"
+              f"  loaded={result['loaded']}")
+
+if __name__ == "__main__":
+    main()
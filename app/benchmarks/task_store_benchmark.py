@@ -0,0 +1,77 @@
+"""
+Insert and lookup throughput of the task store backends under concurrent workers.
+
+The SQLite backend is exercised by several processes sharing one database file, as uvicorn workers
+would; the memory backend only exists inside one process, so it is exercised by threads. Run from the
+repository root:
+    python -m app.benchmarks.task_store_benchmark --workers 4 --operations 5000
+"""
+import argparse
+import multiprocessing
+import os
+import tempfile
+import threading
+import time
+import uuid
+
+from app.mycrews.helper.task_store import MemoryTaskStore, SQLiteTaskStore
+
+RESULT = [{"value": "Maria Silva", "type": "PERSON"}, {"value": "Petrobras", "type": "ORG"}]
+
+def exercise(store, operations: int, barrier) -> tuple:
+    task_ids = [str(uuid.uuid4()) for _ in range(operations)]
+    barrier.wait()
+    start = time.perf_counter()
+    for task_id in task_ids:
+        store[task_id] = {"status": "completed", "result": RESULT}
+    inserted = time.perf_counter()
+    for task_id in task_ids:
+        store.get(task_id)
+    return inserted - start, time.perf_counter() - inserted
+
+def sqlite_worker(path: str, operations: int, barrier, results):
+    results.put(exercise(SQLiteTaskStore(path), operations, barrier))
+
+def run_sqlite(workers: int, operations: int) -> list:
+    path = os.path.join(tempfile.mkdtemp(), "task_store.sqlite3")
+    SQLiteTaskStore(path)  # Create the schema before the workers start
+    barrier = multiprocessing.Barrier(workers)
+    results = multiprocessing.Queue()
+    processes = [multiprocessing.Process(target=sqlite_worker, args=(path, operations, barrier, results)) for _ in range(workers)]
+    for process in processes:
+        process.start()
+    timings = [results.get() for _ in processes]
+    for process in processes:
+        process.join()
+    return timings
+
+def run_memory(workers: int, operations: int) -> list:
+    store = MemoryTaskStore(max_entries=workers * operations)
+    barrier = threading.Barrier(workers)
+    timings = []
+    threads = [threading.Thread(target=lambda: timings.append(exercise(store, operations, barrier))) for _ in range(workers)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return timings
+
+def report(name: str, timings: list, operations: int):
+    # Workers run at the same time, so the slowest one gives the wall time
+    insert_elapsed = max(timing[0] for timing in timings)
+    lookup_elapsed = max(timing[1] for timing in timings)
+    total = operations * len(timings)
+    print(f"{name} ({len(timings)} workers x {operations} operations):")
+    print(f"  insert: {total / insert_elapsed:,.0f} ops/sec   lookup: {total / lookup_elapsed:,.0f} ops/sec")
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--workers", type=int, default=4)
+    parser.add_argument("--operations", type=int, default=5000)
+    args = parser.parse_args()
+
+    report("memory (threads)", run_memory(args.workers, args.operations), args.operations)
+    report("sqlite WAL (processes)", run_sqlite(args.workers, args.operations), args.operations)
+
+if __name__ == "__main__":
+    main()
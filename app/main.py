@@ -1,41 +1,97 @@
-from http.client import HTTPException
-import json
-import re
+import logging
 import sys
 import os
+import asyncio
+import threading
+import time
 from typing import List, Union, Optional
 import uuid
-from fastapi import FastAPI, BackgroundTasks
+from fastapi import FastAPI, BackgroundTasks, Query, Request
 from pydantic import BaseModel
-from fastapi.responses import JSONResponse
+from fastapi.responses import JSONResponse, PlainTextResponse, StreamingResponse
 from dotenv import load_dotenv
-from openai import OpenAI
 
 # Add the current directory to the path
 sys.path.append("./app")
 
-from app.mycrews.helper.spacy_entity_recognizer import spacy_entity_recognizer
+from app.mycrews.helper.spacy_entity_recognizer import SPACY_BATCH_SIZE, SPACY_N_PROCESS, SPACY_PRELOAD, ENTITY_SCHEMA_VERSION, nlp, spacy_cache_params, pipeline_profiler, spacy_entity_recognizer, spacy_entity_recognizer_batch, spacy_entity_recognizer_chunked, spacy_entity_recognizer_with_coverage
+from app.mycrews.helper.extract_numeric_values import RULE_ENTITY_TYPES, extract_numeric_values
+from app.mycrews.helper.entity_router import ENTITY_ROUTING_DEFAULT, ENTITY_ROUTING_MIN_COVERAGE, ROUTING_MODES, SPACY_ENTITY_TYPES, escalation_reason, routing_stats
+from app.mycrews.helper.task_store import TASK_STORE_BACKEND, TASK_STORE_CLEANUP_INTERVAL_SECONDS, TASK_STORE_TTL_SECONDS, create_task_store
+from app.mycrews.helper.job_queue import JOB_QUEUE_ENABLED, JobQueue, JobWorkerPool, in_job_worker
+from app.mycrews.helper.result_cache import cache_key, result_cache
+from app.mycrews.helper.executor import ExecutorSaturatedError, llm_executor, ner_executor
+from app.mycrews.helper.ner_coalescer import ner_coalescer
+from app.mycrews.helper.streaming import crew_event_stream, iter_request_text, sse_event
 from app.mycrews.helper.commons import DateEntityEnum, NumericEntityEnum, TextEntityEnum, WebEntityEnum
-from mycrews.crews import mycrew
-from mycrews.entity_recognizer_crew import EntityRecognizerCrew
-from mycrews.entity_recognizer_tool import entity_recognizer_tool
+from app.mycrews.helper.crew_pool import CrewPoolTimeoutError
+from app.mycrews.helper.crew_prompts import CREW_OVER_BUDGET, TokenBudgetExceededError, check_prompt_budget, merge_entities, split_to_budget, sum_token_usage
+from app.mycrews.helper.metrics import RequestLatencyMiddleware, metrics
+from app.mycrews.helper.entity_serialization import ENTITY_FORMATS, FAST_JSON_RESPONSES, Entity, EntityColumns, FastJSONResponse, format_entities
+from app.mycrews.helper.structured_output import StructuredOutputError, read_structured_output
+from app.mycrews.helper.structured_logging import RequestContextMiddleware, log_payload, setup_logging, stop_logging, task_id_var
+from app.mycrews.helper.lazy_subsystem import LazySubsystem, parse_warmup
+from app.mycrews.helper.batch_pipeline import pipelined_map
+from app.mycrews.helper.incremental_ner import paragraph_cache, spacy_entity_recognizer_incremental
+from app.mycrews.helper.prefork import current_worker, worker_board, worker_heartbeat
+from mycrews.outputs import EntityRecognizerOutput
 
 # Load environment variables from .env file
 load_dotenv()
 
+# Structured logs written by a background thread, see LOG_LEVEL and LOG_FORMAT
+setup_logging()
+logger = logging.getLogger(__name__)
+
 # Access the OPENAI_API_KEY environment variable
 OPENAI_API_KEY = os.getenv("OPENAI_API_KEY")
 
 # Check if the API_KEY was successfully loaded
 if OPENAI_API_KEY:
-    print("OPENAI_API_KEY successfully loaded.")
+    logger.info("OPENAI_API_KEY successfully loaded.")
 else:
-    print("OPENAI_API_KEY not found in the .env file.")
+    logger.error("OPENAI_API_KEY not found in the .env file.")
+    stop_logging()
     exit(1)
 
-client = OpenAI(
-    api_key=OPENAI_API_KEY,  # This is the default and can be omitted
-)
+# Subsystems are imported and built on first use of their routes, so importing the API loads neither crewai nor
+# openai, and a worker only pays for the routes it serves. APP_WARMUP lists the ones built before serving instead
+# (comma separated among spacy, llm, crews and entity_crew, or all), see also `python -m app --warmup`.
+APP_WARMUP = os.getenv("APP_WARMUP", "")
+
+# Async OpenAI client with pooled connections, used by the poem agents
+def build_llm_client():
+    from app.mycrews.helper.llm_client import AsyncLLMClient
+    return AsyncLLMClient(
+        api_key=OPENAI_API_KEY,  # This is the default and can be omitted
+    )
+
+# Crew pools; their modules import crewai and build the first crews, see CREW_POOL_WARMUP
+def build_mycrew_pool():
+    from mycrews.crews import mycrew_pool
+    mycrew_pool.warm_up()
+    return mycrew_pool
+
+def build_entity_recognizer_pool():
+    from mycrews.entity_recognizer_crew import entity_recognizer_pool
+    entity_recognizer_pool.warm_up()
+    return entity_recognizer_pool
+
+# Spacy pipelines of the SPACY_PRELOAD languages (every language when empty), otherwise loaded on their first request
+def load_spacy_models():
+    for lang in SPACY_PRELOAD or nlp.keys():
+        nlp[lang]
+    return nlp
+
+llm_client = LazySubsystem("llm", build_llm_client)
+mycrew_pool = LazySubsystem("crews", build_mycrew_pool)
+entity_recognizer_pool = LazySubsystem("entity_crew", build_entity_recognizer_pool)
+subsystems = {subsystem.name: subsystem for subsystem in (LazySubsystem("spacy", load_spacy_models), llm_client, mycrew_pool, entity_recognizer_pool)}
+warmup_subsystems = parse_warmup(APP_WARMUP, subsystems)
+
+# Crew pools built so far: stats and metrics never build them
+def loaded_crew_pools() -> list:
+    return [pool for pool in (mycrew_pool.if_loaded(), entity_recognizer_pool.if_loaded()) if pool is not None]
 
 app = FastAPI(
     title="Entity Recognition and CrewAI API",
@@ -43,6 +99,45 @@ app = FastAPI(
     version="1.0.0",
 )
 
+# Reject calls when an execution pool is full instead of queueing them without bound
+@app.exception_handler(ExecutorSaturatedError)
+async def executor_saturated_handler(request, exc: ExecutorSaturatedError):
+    return JSONResponse(status_code=429, content={"message": str(exc)}, headers={"Retry-After": "1"})
+
+# Same for a crew pool whose crews all stayed busy for the acquire timeout
+@app.exception_handler(CrewPoolTimeoutError)
+async def crew_pool_timeout_handler(request, exc: CrewPoolTimeoutError):
+    return JSONResponse(status_code=429, content={"message": str(exc)}, headers={"Retry-After": "1"})
+
+# Reject crew requests whose prompts exceed the token budget before running anything, see CREW_PROMPT_TOKEN_BUDGET
+@app.exception_handler(TokenBudgetExceededError)
+async def token_budget_exceeded_handler(request, exc: TokenBudgetExceededError):
+    return JSONResponse(status_code=413, content={"message": str(exc), "prompt_tokens": exc.tokens, "budget": exc.budget})
+
+# Build the subsystems of APP_WARMUP before serving
+@app.on_event("startup")
+async def warm_up_subsystems():
+    for subsystem in warmup_subsystems:
+        await subsystem.aget()
+
+# Shutdown execution pools without waiting for calls still running
+@app.on_event("shutdown")
+def shutdown_executors():
+    ner_executor.shutdown(wait=False)
+    llm_executor.shutdown(wait=False)
+
+# Close the pooled connections of the OpenAI client
+@app.on_event("shutdown")
+async def close_llm_client():
+    client = llm_client.if_loaded()
+    if client is not None:
+        await client.aclose()
+
+# Write the queued log records before exiting
+@app.on_event("shutdown")
+def flush_logs():
+    stop_logging()
+
 # Request model for tasks
 class CrewRequest(BaseModel):
     objective: str
@@ -54,121 +149,429 @@ class CrewRequest(BaseModel):
 class CrewResponse(BaseModel):
     task_id: str
     status: str
-    result: Optional[str] = None
+    result: Union[str, dict, List[dict], None] = None
+    token_usage: Optional[dict] = None  # Tokens of the crew execution: "total" and one entry per task in "tasks"
 
-# Simple database to store results (simulation)
-task_storage = {}
+# Task store keeping the status and result of every task, see TASK_STORE_BACKEND
+task_storage = create_task_store()
 
-# Function to create a poem (Poet agent)
-def create_poem(theme: str) -> str:
+# Periodically remove expired results from the task store
+async def cleanup_task_storage():
+    while True:
+        await asyncio.sleep(TASK_STORE_CLEANUP_INTERVAL_SECONDS)
+        try:
+            await asyncio.to_thread(task_storage.purge_expired)
+            await asyncio.to_thread(result_cache.purge_expired)
+            if job_queue is not None:
+                await asyncio.to_thread(job_queue.purge_finished, TASK_STORE_TTL_SECONDS)
+        except Exception:
+            logger.exception("Task store cleanup failed")
+
+@app.on_event("startup")
+async def start_task_storage_cleanup():
+    app.state.task_storage_cleanup = asyncio.create_task(cleanup_task_storage())
+
+@app.on_event("shutdown")
+async def stop_task_storage_cleanup():
+    app.state.task_storage_cleanup.cancel()
+
+# Durable job queue and worker processes for background tasks, see JOB_QUEUE_ENABLED.
+# Workers write results to the task store themselves, so it has to be shared between processes.
+if JOB_QUEUE_ENABLED and TASK_STORE_BACKEND != "sqlite":
+    raise ValueError("JOB_QUEUE_ENABLED requires TASK_STORE_BACKEND=sqlite, so worker processes can store results.")
+job_queue = JobQueue() if JOB_QUEUE_ENABLED else None
+job_workers = JobWorkerPool() if JOB_QUEUE_ENABLED else None
+
+# Under a pre-fork master (python -m app --workers) the master runs the job workers, once for all its workers
+@app.on_event("startup")
+def start_job_workers():
+    if job_workers is not None and current_worker() is None:
+        job_workers.start()
+
+@app.on_event("shutdown")
+def stop_job_workers():
+    if job_workers is not None and current_worker() is None:
+        job_workers.stop()
+
+# Heartbeat of this worker read by its pre-fork master, which replaces workers whose event loop stays blocked
+@app.on_event("startup")
+async def start_worker_heartbeat():
+    if current_worker() is not None:
+        app.state.worker_heartbeat = asyncio.create_task(worker_heartbeat())
+
+@app.on_event("shutdown")
+async def stop_worker_heartbeat():
+    if current_worker() is not None:
+        app.state.worker_heartbeat.cancel()
+
+# Run a background task in the job queue when it is enabled, otherwise in FastAPI background tasks.
+# Lanes: "fast" for Spacy jobs and "llm" for LLM calls and crews.
+def submit_background_task(background_tasks: BackgroundTasks, lane: str, func, task_id: str, *args):
+    if job_queue is not None:
+        job_queue.enqueue(func, [task_id, *args], lane=lane, job_id=task_id)
+    else:
+        background_tasks.add_task(counted_background_task(lane, func), task_id, *args)
+
+# Background tasks of this process waiting or running, by lane (job queue depth is reported separately)
+background_task_depth = {"fast": 0, "llm": 0}
+background_task_depth_lock = threading.Lock()
+
+def update_background_task_depth(lane: str, delta: int):
+    with background_task_depth_lock:
+        background_task_depth[lane] = background_task_depth.get(lane, 0) + delta
+
+# Wrap a background task so it is counted from submission to its end, keeping it sync or async like FastAPI expects
+def counted_background_task(lane: str, func):
+    update_background_task_depth(lane, 1)
+    if asyncio.iscoroutinefunction(func):
+        async def run_async(*args):
+            try:
+                return await func(*args)
+            finally:
+                update_background_task_depth(lane, -1)
+        return run_async
+
+    def run(*args):
+        try:
+            return func(*args)
+        finally:
+            update_background_task_depth(lane, -1)
+    return run
+
+# Metrics: latency of every request by route template (unmatched paths share one label), and gauges read on scrape
+http_request_seconds = metrics.histogram("http_request_seconds", "Request latency by method, route and status, until the end of the response body (whole stream for SSE).", ("method", "route", "status"))
+metrics.gauge("executor_pending_calls", "Calls running or queued in the execution pools.",
+              lambda: {("ner",): ner_executor.pending, ("llm",): llm_executor.pending}, ("executor",))
+metrics.gauge("background_tasks_pending", "Background tasks of this process waiting or running, by lane.",
+              lambda: {(lane,): depth for lane, depth in background_task_depth.items()}, ("lane",))
+metrics.gauge("job_queue_jobs", "Jobs of the durable job queue by lane and status (queued or running).",
+              lambda: {} if job_queue is None else {(lane, status): lane_stats.get(status, 0) for lane, lane_stats in job_queue.stats().items() for status in ("queued", "running")},
+              ("lane", "status"))
+metrics.gauge("task_store_entries", "Tasks held by the task store.", lambda: len(task_storage))
+metrics.gauge("crew_pool_crews", "Crews of each pool by state (in_use or idle).",
+              lambda: {(pool.stats()["name"], state): pool.stats()[state] for pool in loaded_crew_pools() for state in ("in_use", "idle")},
+              ("pool", "state"))
+
+app.add_middleware(RequestLatencyMiddleware, histogram=http_request_seconds)
+# Request id of every request, for log correlation, and access logs
+app.add_middleware(RequestContextMiddleware)
+
+# New task id, also set as the task id of the records logged for the rest of the request and its background task
+def new_task_id() -> str:
+    task_id = str(uuid.uuid4())
+    task_id_var.set(task_id)
+    return task_id
+
+# Log a summary of a crew result, and its outputs at DEBUG for a sample of executions (see LOG_PAYLOAD_SAMPLE_RATE)
+def log_crew_result(crew_name: str, result):
+    logger.info("Crew %s finished", crew_name, extra={"fields": {"total_tokens": result.token_usage.total_tokens if result.token_usage else None}})
+    log_payload(logger, f"Crew {crew_name} output", raw=result.raw, json_dict=result.json_dict, pydantic=result.pydantic,
+                tasks_output=[task.raw for task in result.tasks_output], token_usage=result.token_usage)
+
+# Run one execution of a crew pool. Blocking. Returns its output and token usage: the total and the usage of each task
+def run_crew(pool, inputs: dict):
+    tasks = []
+    result = pool.kickoff(inputs, on_finish=tasks.extend)
+    return result, {"total": sum_token_usage([result.token_usage]), "tasks": tasks}
+
+# Entities recognized by the entity recognizer crew, and its token usage. Blocking. A text over the token budget is
+# run chunk by chunk when CREW_OVER_BUDGET is "chunk" (check_prompt_budget rejected it otherwise)
+def run_entity_recognizer_crew(pool, fulltext: str, types: List[str]):
+    texts = split_to_budget(pool, fulltext) if CREW_OVER_BUDGET == "chunk" else [fulltext]
+    results, usages = [], []
+    for text in texts:
+        result, token_usage = run_crew(pool, {'text': text})
+        log_crew_result("entity_recognizer", result)
+        results.append(crew_entities(result.raw, result.pydantic))
+        usages.append(token_usage)
+    token_usage = {"total": sum_token_usage([usage["total"] for usage in usages]), "tasks": [task for usage in usages for task in usage["tasks"]]}
+    if len(texts) > 1:
+        token_usage["chunks"] = len(texts)
+    return filter_entity_types(merge_entities(results), types), token_usage
+
+# Route to scrape the metrics in the Prometheus text format
+@app.get("/metrics", summary="Metrics", description="Endpoint to get request latencies, Spacy, LLM and crew timings, token usage, queue depths and task store size in the Prometheus text format.")
+def get_metrics():
+    return PlainTextResponse(metrics.render(), media_type="text/plain; version=0.0.4; charset=utf-8")
+
+# Models used by the poem agents
+POET_MODEL = "o1-mini"
+PHILOSOPHER_MODEL = "gpt-4o"
+
+# Read and write permissions of a request on the result cache. Endpoints can be opted out with
+# RESULT_CACHE_DISABLED_ENDPOINTS, and clients can bypass the cache with a Cache-Control header:
+# "no-cache" recomputes the result (and refreshes the cache), "no-store" does not touch the cache at all.
+def cache_policy(http_request: Request, endpoint: str) -> tuple:
+    if not result_cache.enabled_for(endpoint):
+        return False, False
+    directives = {directive.strip().lower() for directive in http_request.headers.get("cache-control", "").split(",")}
+    if "no-store" in directives:
+        return False, False
+    return "no-cache" not in directives, True
+
+# Prompt of the Poet agent
+def poem_messages(theme: str) -> List[dict]:
     prompt = f"You are a poet, write a creative and emotional poem about the theme: {theme}"
-    completion = client.chat.completions.create(
-        messages=[
-            {
-                "role": "assistant",
-                "content": prompt,
-            }
-        ],
-        model="o1-mini",
-    )
-    return completion.choices[0].message.content.strip()
+    return [
+        {
+            "role": "assistant",
+            "content": prompt,
+        }
+    ]
 
-# Function to evaluate the logic of the poem (Philosopher agent)
-def evaluate_poem(poem: str) -> str:
+# Prompt of the Philosopher agent
+def evaluation_messages(poem: str) -> List[dict]:
     prompt = f"You are a philosopher, please evaluate the logic, reason, and philosophical depth of the following poem. Write your comment in Brazilian Portuguese: {poem}"
-    completion = client.chat.completions.create(
-        messages=[
-            {
-                "role": "assistant",
-                "content": prompt,
-            }
-        ],
-        model="gpt-4o",
-    )
-    return completion.choices[0].message.content.strip()
+    return [
+        {
+            "role": "assistant",
+            "content": prompt,
+        }
+    ]
+
+# Function to create a poem (Poet agent)
+async def create_poem(theme: str) -> str:
+    return await (await llm_client.aget()).complete(messages=poem_messages(theme), model=POET_MODEL)
+
+# Function to evaluate the logic of the poem (Philosopher agent)
+async def evaluate_poem(poem: str) -> str:
+    return await (await llm_client.aget()).complete(messages=evaluation_messages(poem), model=PHILOSOPHER_MODEL)
 
 # Background function to process and store the result asynchronously
-def process_task_background(task_id: str, objective: str):
-    poem = create_poem(objective)
-    evaluation = evaluate_poem(poem)
+async def process_task_background(task_id: str, objective: str, result_key: Optional[str] = None):
+    poem = await create_poem(objective)
+    evaluation = await evaluate_poem(poem)
     result = f"Poem: {poem}\nEvaluation: {evaluation}"
     task_storage[task_id] = {"status": "completed", "result": result}
+    if result_key:
+        result_cache.set(result_key, result)
+
+# Batch poem settings: most objectives per batch, and poem and evaluation calls in flight per batch (by default and at most)
+OPEN_BATCH_MAX_OBJECTIVES = int(os.getenv("OPEN_BATCH_MAX_OBJECTIVES", "1000"))
+OPEN_BATCH_CONCURRENCY = int(os.getenv("OPEN_BATCH_CONCURRENCY", "16"))
+OPEN_BATCH_MAX_CONCURRENCY = int(os.getenv("OPEN_BATCH_MAX_CONCURRENCY", "64"))
+
+# Second stage of a batch item: evaluate its poem, with the same result as /open/test
+async def evaluate_batch_poem(poem: str) -> str:
+    evaluation = await evaluate_poem(poem)
+    return f"Poem: {poem}\nEvaluation: {evaluation}"
+
+# Summary of a batch, stored as its task result
+def batch_summary(item_ids: List[str], cached: int, failed: int, wall_seconds: Optional[float] = None) -> dict:
+    return {"item_ids": item_ids, "items": len(item_ids), "cached": cached, "failed": failed, "wall_seconds": wall_seconds}
+
+# Background function creating and evaluating the poems of a batch: each poem is evaluated as soon as it is created,
+# and every item has its own task in the task store. Items already completed (cached, or by an earlier attempt of
+# the job) are skipped.
+async def process_batch_background(batch_id: str, item_ids: List[str], objectives: List[str], result_keys: List[Optional[str]], concurrency: int, cached: int = 0):
+    start = time.perf_counter()
+    pending = [index for index, item_id in enumerate(item_ids) if (task_storage.get(item_id) or {}).get("status") != "completed"]
+
+    def on_stage(position: int, stage: int, value):
+        index = pending[position]
+        item = {"batch_id": batch_id, "objective": objectives[index]}
+        if isinstance(value, Exception):
+            logger.warning("Batch item %s failed: %s", item_ids[index], value)
+            task_storage[item_ids[index]] = {"status": "failed", "result": str(value), **item}
+        elif stage == 0:
+            task_storage[item_ids[index]] = {"status": "pending", "result": None, "stage": "evaluation", **item}
+        else:
+            task_storage[item_ids[index]] = {"status": "completed", "result": value, **item}
+            if result_keys[index]:
+                result_cache.set(result_keys[index], value)
+
+    results = await pipelined_map([objectives[index] for index in pending], (create_poem, evaluate_batch_poem), concurrency, on_stage)
+    failed = sum(isinstance(result, Exception) for result in results)
+    summary = batch_summary(item_ids, cached, failed, round(time.perf_counter() - start, 3))
+    task_storage[batch_id] = {"status": "failed" if failed and failed == len(item_ids) else "completed", "result": summary}
+    logger.info("Batch %s finished", batch_id, extra={"fields": {key: summary[key] for key in ("items", "cached", "failed", "wall_seconds")}})
 
 # Background function to process and store the result of the EntityRecognizerCrew asynchronously
-def process_task_crewairec_background(task_id: str, fulltext: str):
+def process_task_crewairec_background(task_id: str, fulltext: str, result_key: Optional[str] = None, types: List[str] = []):
     try:
-        result = EntityRecognizerCrew.kickoff(inputs={'text': fulltext})
-        print(f"Raw Output: {result.raw}")
-        if result.json_dict:
-            print(f"JSON Output: {json.dumps(result.json_dict, indent=2)}")
-        if result.pydantic:
-            print(f"Pydantic Output: {result.pydantic}")
-        print(f"Tasks Output: {result.tasks_output}")
-        print(f"Token Usage: {result.token_usage}")
-        json_result = json.loads(result.raw)  # Convert raw string to JSON
-        task_storage[task_id] = {"status": "completed", "result": json_result}
-    except json.JSONDecodeError as json_error:
-        raise HTTPException(status_code=500, detail=f"Error to parse result to json: {str(json_error)}")
+        logger.info("Crew entity_recognizer started")
+        entities, token_usage = run_entity_recognizer_crew(entity_recognizer_pool.get(), fulltext, types)
+        json_result = {"entities": entities}
+        task_storage[task_id] = {"status": "completed", "result": json_result, "served_by": "crew", "token_usage": token_usage}
+        if result_key:
+            result_cache.set(result_key, json_result)
     except Exception as e:
-        raise HTTPException(status_code=500, detail=f"Error processing request: {str(e)}")
+        logger.exception("Crew entity_recognizer failed")
+        # In a job worker the queue retries the job, and marks the task failed after its last attempt
+        if in_job_worker():
+            raise
+        task_storage[task_id] = {"status": "failed", "result": str(e), "served_by": "crew"}
 
 # Background function to process and store the result of the CrewAI task asynchronously
-def process_task_crewai_background(task_id: str, theme: str):
+def process_task_crewai_background(task_id: str, theme: str, result_key: Optional[str] = None):
     try:
-        print('mycrew started')
-        result = mycrew.kickoff(inputs={'text': theme})
-        task_storage[task_id] = {"status": "completed", "result": result.raw}
+        logger.info("Crew mycrew started")
+        result, token_usage = run_crew(mycrew_pool.get(), {'text': theme})
+        log_crew_result("mycrew", result)
+        task_storage[task_id] = {"status": "completed", "result": result.raw, "token_usage": token_usage}
+        if result_key:
+            result_cache.set(result_key, result.raw)
     except Exception as e:
+        logger.exception("Crew mycrew failed")
+        # In a job worker the queue retries the job, and marks the task failed after its last attempt
+        if in_job_worker():
+            raise
         task_storage[task_id] = {"status": "failed", "result": str(e)}
 
+# Background function to process and store the result of the Spacy entity recognizer asynchronously
+def process_task_spacy_background(task_id: str, fulltext: str, result_key: Optional[str] = None):
+    result = spacy_entity_recognizer(fulltext, "pt", [])
+    task_storage[task_id] = {"status": "completed", "result": result}
+    if result_key:
+        result_cache.set(result_key, result)
+
 # Route to check liveness
 @app.get("/liveness", summary="Liveness Check", description="Endpoint to check if the API is alive.")
 def check_liveness():
-    return {"status": "alive"}
+    worker = current_worker()
+    if worker is None:
+        return {"status": "alive"}
+    # Under a pre-fork master: this worker and every worker of the master, with its heartbeat
+    return {"status": "alive", "worker": worker, "workers": worker_board().snapshot()}
 
 # Route to execute a task with agents
 @app.post("/open/test", response_model=CrewResponse, summary="Execute Task with Agents", description="Endpoint to execute a task using agents to create and evaluate a poem.")
-async def execute_task(request: CrewRequest, background_tasks: BackgroundTasks):
-    task_id = str(uuid.uuid4())
+async def execute_task(request: CrewRequest, background_tasks: BackgroundTasks, http_request: Request):
+    task_id = new_task_id()
+    read_cache, write_cache = cache_policy(http_request, "open/test")
+    result_key = cache_key("open/test", request.objective, models=[POET_MODEL, PHILOSOPHER_MODEL])
+    cached = result_cache.get(result_key) if read_cache else None
+    if cached is not None:
+        task_storage[task_id] = {"status": "completed", "result": cached}
+        return CrewResponse(task_id=task_id, status="completed", result=cached)
     if request.async_execution:
         task_storage[task_id] = {"status": "pending", "result": None}
-        background_tasks.add_task(process_task_background, task_id, request.objective)
+        submit_background_task(background_tasks, "llm", process_task_background, task_id, request.objective, result_key if write_cache else None)
         return CrewResponse(task_id=task_id, status="pending", result=None)
     else:
-        poem = create_poem(request.objective)
-        evaluation = evaluate_poem(poem)
+        poem = await create_poem(request.objective)
+        evaluation = await evaluate_poem(poem)
         result = f"Poem: {poem}\nEvaluation: {evaluation}"
         task_storage[task_id] = {"status": "completed", "result": result}
+        if write_cache:
+            result_cache.set(result_key, result)
         return CrewResponse(task_id=task_id, status="completed", result=result)
 
+# Request and response models of the batch poem route: one task per objective, plus one for the batch
+class OpenBatchRequest(BaseModel):
+    objectives: List[str]  # Themes of the poems
+    concurrency: int = OPEN_BATCH_CONCURRENCY  # Poem and evaluation calls in flight, at most OPEN_BATCH_MAX_CONCURRENCY
+    async_execution: bool = True
+
+class OpenBatchItem(BaseModel):
+    task_id: str
+    objective: Optional[str] = None
+    status: str
+    stage: Optional[str] = None  # Stage of a pending item: "poem" or "evaluation"
+    result: Optional[str] = None
+
+class OpenBatchResponse(BaseModel):
+    task_id: str
+    status: str
+    items: List[OpenBatchItem]
+    cached: int = 0
+    failed: int = 0
+    wall_seconds: Optional[float] = None
+
+# Route to create and evaluate poems for many objectives: poems are created concurrently and each one is evaluated
+# as soon as it is ready. Items are stored as tasks of their own, readable on /agents/tasks/{task_id}.
+@app.post("/open/batch", response_model=OpenBatchResponse, summary="Batch Task with Agents", description="Endpoint to create and evaluate poems for many objectives, with bounded concurrency, each poem evaluated as soon as it is created.")
+async def execute_batch(request: OpenBatchRequest, background_tasks: BackgroundTasks, http_request: Request):
+    if not 0 < len(request.objectives) <= OPEN_BATCH_MAX_OBJECTIVES:
+        return JSONResponse(status_code=400, content={"message": f"A batch needs between 1 and {OPEN_BATCH_MAX_OBJECTIVES} objectives, got {len(request.objectives)}"})
+    if request.concurrency < 1:
+        return JSONResponse(status_code=400, content={"message": f"concurrency must be positive, got {request.concurrency}"})
+    batch_id = new_task_id()
+    read_cache, write_cache = cache_policy(http_request, "open/test")
+    models = [POET_MODEL, PHILOSOPHER_MODEL]
+    result_keys = [cache_key("open/test", objective, models=models) for objective in request.objectives]
+    item_ids = [str(uuid.uuid4()) for _ in request.objectives]
+    cached = 0
+    for item_id, objective, result_key in zip(item_ids, request.objectives, result_keys):
+        result = result_cache.get(result_key) if read_cache else None
+        cached += result is not None
+        item = {"batch_id": batch_id, "objective": objective}
+        task_storage[item_id] = {"status": "completed", "result": result, **item} if result is not None else \
+            {"status": "pending", "result": None, "stage": "poem", **item}
+    task_storage[batch_id] = {"status": "pending", "result": batch_summary(item_ids, cached, 0)}
+    args = (batch_id, item_ids, request.objectives, result_keys if write_cache else [None] * len(item_ids),
+            min(request.concurrency, OPEN_BATCH_MAX_CONCURRENCY), cached)
+    if request.async_execution:
+        submit_background_task(background_tasks, "llm", process_batch_background, *args)
+    else:
+        await process_batch_background(*args)
+    return get_batch(batch_id)
+
+# Status of a batch and of each of its items
+def get_batch(batch_id: str) -> OpenBatchResponse:
+    batch = task_storage.get(batch_id)
+    summary = batch["result"]
+    items = []
+    for item_id in summary["item_ids"]:
+        item = task_storage.get(item_id) or {"status": "expired", "result": None}
+        items.append(OpenBatchItem(task_id=item_id, objective=item.get("objective"), status=item["status"],
+                                   stage=item.get("stage"), result=item["result"]))
+    return OpenBatchResponse(task_id=batch_id, status=batch["status"], items=items, cached=summary["cached"],
+                             failed=summary["failed"], wall_seconds=summary["wall_seconds"])
+
+# Route to get the status of a batch and of each of its items
+@app.get("/open/batch/{task_id}", response_model=OpenBatchResponse, summary="Get Batch Result", description="Endpoint to get the status of a batch of poems and the status and result of each of its items.")
+async def get_batch_result(task_id: str):
+    batch = task_storage.get(task_id)
+    if batch is None or not isinstance(batch["result"], dict) or "item_ids" not in batch["result"]:
+        return JSONResponse(status_code=404, content={"message": "Batch not found"})
+    return get_batch(task_id)
+
+# Route to size the job worker pool: queue depth, wait time and run time by lane
+@app.get("/jobs/stats", summary="Job Queue Stats", description="Endpoint to get the depth, wait time and run time of the job queue by lane.")
+def job_stats():
+    if job_queue is None:
+        return {"enabled": False}
+    return {"enabled": True, "lanes": job_queue.stats(), "workers": job_workers.alive()}
+
+# Route to get the hit/miss counters of the result cache
+@app.get("/cache/stats", summary="Result Cache Stats", description="Endpoint to get the hit and miss counters of the result cache by endpoint.")
+def cache_stats():
+    # Paragraph entities of incremental recognition are cached apart, see NER_PARAGRAPH_CACHE_MAX_ENTRIES
+    return {**result_cache.stats(), "paragraphs": paragraph_cache.stats()}
+
 # Route to get the status and result of a task
 @app.get("/agents/tasks/{task_id}", response_model=CrewResponse, summary="Get Task Result", description="Endpoint to get the status and result of a specific task.")
 async def get_task_result(task_id: str):
-    if task_id not in task_storage:
+    task = task_storage.get(task_id)
+    if task is None:
         return JSONResponse(status_code=404, content={"message": "Task not found"})
-    task = task_storage[task_id]
-    return CrewResponse(task_id=task_id, status=task["status"], result=task["result"])
+    return CrewResponse(task_id=task_id, status=task["status"], result=task["result"], token_usage=task.get("token_usage"))
 
 # Route to execute a task with CrewAI
 @app.post("/crewai/test", response_model=CrewResponse, summary="Execute CrewAI Task", description="Endpoint to execute a task with CrewAI.")
-async def execute_task(request: CrewRequest, background_tasks: BackgroundTasks):
-    task_id = str(uuid.uuid4())
+async def execute_task(request: CrewRequest, background_tasks: BackgroundTasks, http_request: Request):
+    task_id = new_task_id()
+    read_cache, write_cache = cache_policy(http_request, "crewai/test")
+    pool = await mycrew_pool.aget()
+    result_key = cache_key("crewai/test", request.objective, models=pool.models())
+    cached = result_cache.get(result_key) if read_cache else None
+    if cached is not None:
+        task_storage[task_id] = {"status": "completed", "result": cached}
+        return CrewResponse(task_id=task_id, status="completed", result=cached)
+    await asyncio.to_thread(check_prompt_budget, pool, {'text': request.objective})
     if request.async_execution:
         task_storage[task_id] = {"status": "pending", "result": None}
-        background_tasks.add_task(process_task_crewai_background, task_id, request.objective)
+        submit_background_task(background_tasks, "llm", process_task_crewai_background, task_id, request.objective, result_key if write_cache else None)
         return CrewResponse(task_id=task_id, status="pending", result=None)
     else:
-        print('Started mycrew for testing')
-        result = mycrew.kickoff(inputs={'text': request.objective})
-        print(f"Raw Output: {result.raw}")
-        if result.json_dict:
-            print(f"JSON Output: {json.dumps(result.json_dict, indent=2)}")
-        if result.pydantic:
-            print(f"Pydantic Output: {result.pydantic}")
-        print(f"Tasks Output: {result.tasks_output}")
-        print(f"Token Usage: {result.token_usage}")
-        task_storage[task_id] = {"status": "completed", "result": result.raw}
-        return CrewResponse(task_id=task_id, status="completed", result=result.raw)
+        logger.info("Crew mycrew started")
+        result, token_usage = await llm_executor.run(run_crew, pool, {'text': request.objective})
+        log_crew_result("mycrew", result)
+        task_storage[task_id] = {"status": "completed", "result": result.raw, "token_usage": token_usage}
+        if write_cache:
+            result_cache.set(result_key, result.raw)
+        return CrewResponse(task_id=task_id, status="completed", result=result.raw, token_usage=token_usage)
 
 # Define request and response models for EntityRecognizerCrew
 class EntityRecognizerCrewRequest(BaseModel):
@@ -179,58 +582,278 @@ class EntityRecognizerCrewResponse(BaseModel):
     task_id: str
     status: str
     result: List[dict] | None = None
+    token_usage: Optional[dict] = None  # Tokens of the crew execution, see CrewResponse
 
-# Route to access EntityRecognizer crew
-@app.post("/crewai/entityRecognizer", response_model=EntityRecognizerCrewResponse, summary="Entity Recognizer Crew", description="Endpoint to recognize entities using EntityRecognizerCrew.")
-async def execute_task(request: EntityRecognizerCrewRequest, background_tasks: BackgroundTasks):
-    task_id = str(uuid.uuid4())
+# Request and response models of the routed entity recognizer, answered by Spacy or by the crew
+class EntityRecognizerRoutedRequest(EntityRecognizerCrewRequest):
+    routing: str = ENTITY_ROUTING_DEFAULT  # "auto", "spacy" or "crew", see entity_router
+    types: List[str] = []  # Entity types to return, all of them when empty
+    lang: str = "pt"  # Default language (Portuguese)
+
+class EntityRecognizerRoutedResponse(EntityRecognizerCrewResponse):
+    served_by: str  # "spacy" or "crew"
+    coverage: Optional[float] = None  # Entity coverage of the Spacy result, also given when a low coverage escalated to the crew
+
+# Entities of an EntityRecognizerCrew output, from its structured output or parsed from the raw output (see structured_output)
+def crew_entities(raw: str, output=None) -> List[dict]:
+    entities = read_structured_output(raw, EntityRecognizerOutput, output).entities
+    return [entity.model_dump(exclude_unset=True) for entity in entities]
+
+# Keep the entities of the requested types, all of them when no type is given
+def filter_entity_types(entities: List[dict], types: List[str]) -> List[dict]:
+    if not types:
+        return entities
+    types_upper = {t.upper() for t in types}
+    return [entity for entity in entities if str(entity.get("type", "")).upper() in types_upper]
+
+# Cache key of the crew results for a text, language and entity types, and the shape of the entities
+def crew_entities_key(pool, fulltext: str, lang: str, types: List[str]) -> str:
+    return cache_key("crewai/entityRecognizer", fulltext, models=pool.models(), lang=lang, types=types, schema=ENTITY_SCHEMA_VERSION)
+
+# Route to recognize entities, answered by Spacy in milliseconds when it can and by the EntityRecognizer crew otherwise
+@app.post("/crewai/entityRecognizer", response_model=EntityRecognizerRoutedResponse, summary="Entity Recognizer Crew", description="Endpoint to recognize entities using Spacy when it covers the request, escalating to EntityRecognizerCrew otherwise. The response tells which path served it.")
+async def execute_task(request: EntityRecognizerRoutedRequest, background_tasks: BackgroundTasks, http_request: Request):
+    task_id = new_task_id()
+    if request.routing not in ROUTING_MODES:
+        return JSONResponse(status_code=400, content={"message": f"Invalid routing '{request.routing}'. Available options: {list(ROUTING_MODES)}"})
+    read_cache, write_cache = cache_policy(http_request, "crewai/entityRecognizer")
+    types = sorted({t.upper() for t in request.types})
+
+    # Deterministic fast path: Spacy answers unless the crew is requested or Spacy can't handle the types or language
+    reason = "requested" if request.routing == "crew" else escalation_reason(request.lang, types)
+    coverage = None
+    if reason is not None and request.routing == "spacy":
+        return JSONResponse(status_code=400, content={"message": f"Spacy can't serve this request, unsupported {reason}. Supported types: {sorted(SPACY_ENTITY_TYPES)}, languages: {list(nlp.keys())}"})
+    if reason is None:
+        spacy_key = cache_key("crewai/entityRecognizer", request.fulltext, normalize=False, lang=request.lang, types=types,
+                              routing=request.routing, **spacy_cache_params(request.lang))
+        cached = result_cache.get(spacy_key) if read_cache else None
+        if cached is not None:
+            entities, coverage = cached["entities"], cached["coverage"]
+        else:
+            entities, coverage = await ner_executor.run(spacy_entity_recognizer_with_coverage, request.fulltext, request.lang, types)
+        # In auto mode, a low coverage means Spacy likely missed entities, so the crew gets the request
+        if request.routing == "spacy" or coverage >= ENTITY_ROUTING_MIN_COVERAGE:
+            if write_cache and cached is None:
+                result_cache.set(spacy_key, {"entities": entities, "coverage": coverage})
+            routing_stats.record("spacy", "requested" if request.routing == "spacy" else "auto")
+            task_storage[task_id] = {"status": "completed", "result": entities, "served_by": "spacy"}
+            return EntityRecognizerRoutedResponse(task_id=task_id, status="completed", result=entities, served_by="spacy", coverage=round(coverage, 4))
+        reason = "coverage"
+        coverage = round(coverage, 4)
+
+    routing_stats.record("crew", reason)
+    pool = await entity_recognizer_pool.aget()
+    result_key = crew_entities_key(pool, request.fulltext, request.lang, types)
+    cached = result_cache.get(result_key) if read_cache else None
+    if cached is not None:
+        task_storage[task_id] = {"status": "completed", "result": cached, "served_by": "crew"}
+        return EntityRecognizerRoutedResponse(task_id=task_id, status="completed", result=cached["entities"], served_by="crew", coverage=coverage)
+    await asyncio.to_thread(check_prompt_budget, pool, {'text': request.fulltext}, True)
     if request.async_execution:
-        task_storage[task_id] = {"status": "pending", "result": None}
-        background_tasks.add_task(process_task_crewairec_background, task_id, request.fulltext)
-        return EntityRecognizerCrewResponse(task_id=task_id, status="pending", result=None)
+        task_storage[task_id] = {"status": "pending", "result": None, "served_by": "crew"}
+        submit_background_task(background_tasks, "llm", process_task_crewairec_background, task_id, request.fulltext, result_key if write_cache else None, types)
+        return EntityRecognizerRoutedResponse(task_id=task_id, status="pending", result=None, served_by="crew", coverage=coverage)
     else:
         try:
-            print('EntityRecognizerCrew started')
-            result = EntityRecognizerCrew.kickoff(inputs={'text': request.fulltext})
-            print(f"Raw Output: {result.raw}")
-            print(f"json_dict: {result.json_dict}")
-            if result.json_dict:
-                print(f"JSON Output: {json.dumps(result.json_dict, indent=2)}")
-                task_storage[task_id] = {"status": "completed", "result": result.json_dict.entities}
-                return EntityRecognizerCrewResponse(task_id=task_id, status="completed", result=result.json_dict.entities)
-            if result.pydantic:
-                print(f"Pydantic Output: {result.pydantic}")
-                
-            print(f"Tasks Output: {result.tasks_output}")
-            print(f"Token Usage: {result.token_usage}")        
-
-            # If raw contains extra text, extract the first valid JSON block
-            match = re.search(r"\{.*\}", result.raw, re.DOTALL)  # Extract JSON from text
-            if match:
-                json_result = json.loads(match.group())  # Convert to JSON
-                return EntityRecognizerCrewResponse(task_id=task_id, status="completed", result=json_result["entities"])
-            else:
-                raise ValueError("No valid JSON found in CrewAI output.")
-
-        except json.JSONDecodeError as json_error:
-            raise HTTPException(status_code=500, detail=f"Error to parse result to json: {str(json_error)}")
+            logger.info("Crew entity_recognizer started")
+            entities, token_usage = await llm_executor.run(run_entity_recognizer_crew, pool, request.fulltext, types)
+            task_storage[task_id] = {"status": "completed", "result": entities, "served_by": "crew", "token_usage": token_usage}
+            if write_cache:
+                result_cache.set(result_key, {"entities": entities})
+            return EntityRecognizerRoutedResponse(task_id=task_id, status="completed", result=entities, served_by="crew", coverage=coverage, token_usage=token_usage)
+
+        except (ExecutorSaturatedError, CrewPoolTimeoutError):
+            raise
+        except StructuredOutputError as e:
+            # The crew ran but its output is unusable: an upstream (LLM) error, recorded like failed background tasks
+            logger.warning("Crew entity_recognizer failed: %s", e)
+            task_storage[task_id] = {"status": "failed", "result": str(e), "served_by": "crew"}
+            return JSONResponse(status_code=502, content={"task_id": task_id, "message": str(e)})
+        except Exception as e:
+            logger.exception("Crew entity_recognizer failed")
+            task_storage[task_id] = {"status": "failed", "result": str(e), "served_by": "crew"}
+            return JSONResponse(status_code=500, content={"task_id": task_id, "message": f"Error processing request: {str(e)}"})
+
+# Route to get the size and usage of the crew pools
+@app.get("/crewai/pools", summary="Crew Pool Stats", description="Endpoint to get how many crews each pool built, how many are in use and how often executions waited for one. Pools not used yet are not listed.")
+def crew_pool_stats():
+    return {"pools": [pool.stats() for pool in loaded_crew_pools()]}
+
+# Route to get how many entity requests each path (spacy or crew) served, and why
+@app.get("/crewai/entityRecognizer/routing", summary="Entity Routing Stats", description="Endpoint to get how many entity requests were served by Spacy or escalated to the crew, by reason.")
+def entity_routing_stats():
+    return {"mode": ENTITY_ROUTING_DEFAULT, "min_coverage": ENTITY_ROUTING_MIN_COVERAGE, **routing_stats.stats()}
+
+# Headers of Server-Sent Events responses; X-Accel-Buffering stops proxies (nginx) from buffering the stream
+SSE_HEADERS = {"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+
+# Streamed executions still running, referenced until they finish even when their client is gone
+streaming_tasks = set()
+
+# Run a crew and relay its progress as Server-Sent Events, then a final "done" event.
+# The result is stored as soon as the crew finishes, even when the client disconnects before the end of the stream.
+# `to_result` turns the "result" event into the stored result, `to_cached` turns that result into the cached value.
+def stream_crew(task_id: str, pool, inputs: dict, to_result, result_key: Optional[str], to_cached=None) -> StreamingResponse:
+    outcome = {"status": "failed", "result": None}
+
+    def store(event: str, data: dict):
+        if event == "error":
+            outcome["result"] = data["message"]
+        else:
+            try:
+                outcome["result"] = to_result(data)
+                outcome["status"] = "completed"
+            except Exception as e:
+                outcome["result"], outcome["error"] = str(e), True
+        if outcome["status"] == "failed":
+            task_storage[task_id] = {"status": "failed", "result": outcome["result"]}
+            return
+        task_storage[task_id] = {"status": "completed", "result": outcome["result"],
+                                 "token_usage": {"total": data["token_usage"], "tasks": data["tasks_token_usage"]}}
+        if result_key:
+            result_cache.set(result_key, to_cached(outcome["result"]) if to_cached else outcome["result"])
+
+    # Started here, so a saturated executor is still answered with a 429 before streaming
+    progress = crew_event_stream(pool, inputs, llm_executor, on_done=store)
+
+    async def events():
+        yield sse_event("accepted", {"task_id": task_id})
+        async for event, data in progress:
+            yield sse_event(event, data)
+        if outcome.get("error"):
+            yield sse_event("error", {"message": outcome["result"]})
+        if outcome["status"] == "failed":
+            yield sse_event("done", {"task_id": task_id, "status": "failed"})
+        else:
+            yield sse_event("done", {"task_id": task_id, "status": "completed", "result": outcome["result"]})
+
+    return StreamingResponse(events(), media_type="text/event-stream", headers=SSE_HEADERS)
+
+# Route to execute a task with CrewAI, streaming its progress as Server-Sent Events
+@app.post("/crewai/stream", summary="Stream CrewAI Task", description="Endpoint to execute a task with CrewAI and stream task progress, intermediate outputs, token usage and the result as Server-Sent Events.")
+async def stream_crewai_task(request: CrewRequest, http_request: Request):
+    task_id = new_task_id()
+    _, write_cache = cache_policy(http_request, "crewai/test")
+    pool = await mycrew_pool.aget()
+    result_key = cache_key("crewai/test", request.objective, models=pool.models()) if write_cache else None
+    await asyncio.to_thread(check_prompt_budget, pool, {'text': request.objective})
+    task_storage[task_id] = {"status": "pending", "result": None}
+    return stream_crew(task_id, pool, {'text': request.objective}, lambda result: result["raw"], result_key)
+
+# Route to access EntityRecognizer crew, streaming its progress as Server-Sent Events
+@app.post("/crewai/entityRecognizer/stream", summary="Stream Entity Recognizer Crew", description="Endpoint to recognize entities using EntityRecognizerCrew and stream its progress as Server-Sent Events. The request is always served by the crew.")
+async def stream_entity_recognizer_crew(request: EntityRecognizerRoutedRequest, http_request: Request):
+    task_id = new_task_id()
+    _, write_cache = cache_policy(http_request, "crewai/entityRecognizer")
+    types = sorted({t.upper() for t in request.types})
+    pool = await entity_recognizer_pool.aget()
+    result_key = crew_entities_key(pool, request.fulltext, request.lang, types) if write_cache else None
+    # A streamed execution is a single kickoff, so a text over the token budget is rejected even in "chunk" mode
+    await asyncio.to_thread(check_prompt_budget, pool, {'text': request.fulltext})
+    task_storage[task_id] = {"status": "pending", "result": None, "served_by": "crew"}
+    return stream_crew(task_id, pool, {'text': request.fulltext}, lambda result: filter_entity_types(crew_entities(result["raw"], result["json_dict"]), types),
+                       result_key, to_cached=lambda entities: {"entities": entities})
+
+# Route to create and evaluate a poem, streaming both completions token by token as Server-Sent Events
+@app.post("/open/stream", summary="Stream Task with Agents", description="Endpoint to create and evaluate a poem, streaming both texts as they are generated as Server-Sent Events.")
+async def stream_poem_task(request: CrewRequest, http_request: Request):
+    task_id = new_task_id()
+    _, write_cache = cache_policy(http_request, "open/test")
+    result_key = cache_key("open/test", request.objective, models=[POET_MODEL, PHILOSOPHER_MODEL]) if write_cache else None
+    task_storage[task_id] = {"status": "pending", "result": None}
+    queue = asyncio.Queue()
+
+    # Runs apart from the response, so the result is stored even when the client disconnects before the end
+    async def generate():
+        try:
+            client = await llm_client.aget()
+            texts, usage = {}, {}
+            # The evaluation prompt is built once the poem is complete
+            steps = (("poem", POET_MODEL, lambda: poem_messages(request.objective)),
+                     ("evaluation", PHILOSOPHER_MODEL, lambda: evaluation_messages(texts["poem"])))
+            for step, model, messages in steps:
+                queue.put_nowait(sse_event(f"{step}_started", {"model": model}))
+                parts, usage[step] = [], {}
+                async for delta in client.stream(messages=messages(), model=model, usage=usage[step]):
+                    parts.append(delta)
+                    queue.put_nowait(sse_event(f"{step}_delta", {"text": delta}))
+                texts[step] = "".join(parts).strip()
+                queue.put_nowait(sse_event(f"{step}_finished", {"text": texts[step], "token_usage": usage[step]}))
+            result = f"Poem: {texts['poem']}\nEvaluation: {texts['evaluation']}"
+            task_storage[task_id] = {"status": "completed", "result": result}
+            if result_key:
+                result_cache.set(result_key, result)
+            queue.put_nowait(sse_event("result", {"raw": result, "token_usage": usage}))
+            queue.put_nowait(sse_event("done", {"task_id": task_id, "status": "completed", "result": result}))
         except Exception as e:
-            raise HTTPException(status_code=500, detail=f"Error processing request: {str(e)}")
+            task_storage[task_id] = {"status": "failed", "result": str(e)}
+            queue.put_nowait(sse_event("error", {"message": str(e)}))
+            queue.put_nowait(sse_event("done", {"task_id": task_id, "status": "failed"}))
+        finally:
+            queue.put_nowait(None)
+            streaming_tasks.discard(generation)
+
+    generation = asyncio.create_task(generate())
+    streaming_tasks.add(generation)
+
+    async def events():
+        yield sse_event("accepted", {"task_id": task_id})
+        while (event := await queue.get()) is not None:
+            yield event
+
+    return StreamingResponse(events(), media_type="text/event-stream", headers=SSE_HEADERS)
+
+# Entity responses: returned as is (validated and encoded through the response model) or, with FAST_JSON_RESPONSES,
+# encoded right away by FastJSONResponse
+def entity_response(content: dict):
+    return FastJSONResponse(content) if FAST_JSON_RESPONSES else content
+
+# Message of the 400 response to an unknown entity format
+def invalid_entity_format(entity_format: str) -> JSONResponse:
+    return JSONResponse(status_code=400, content={"message": f"Invalid format '{entity_format}'. Available options: {list(ENTITY_FORMATS)}"})
+
+# Request and response models of the Spacy entity recognizer, with typed entities
+class SpacyEntityRecognizerRequest(EntityRecognizerCrewRequest):
+    format: str = "objects"  # "objects" or "columns" (one array per field), see ENTITY_FORMATS
+
+class SpacyEntityRecognizerResponse(BaseModel):
+    task_id: str
+    status: str
+    result: Union[List[Entity], EntityColumns, None] = None
+
 # A simple Spacy entity recognizer is provided to avoid paid NLP services
-@app.post("/spacy/entityRecognizer", response_model=EntityRecognizerCrewResponse, summary="Spacy Entity Recognizer", description="Endpoint to recognize entities using Spacy.")
-async def execute_task(request: EntityRecognizerCrewRequest, background_tasks: BackgroundTasks):
-    task_id = str(uuid.uuid4())
+@app.post("/spacy/entityRecognizer", response_model=SpacyEntityRecognizerResponse, summary="Spacy Entity Recognizer", description="Endpoint to recognize entities using Spacy, as a list of entities or in the compact columnar format.")
+async def execute_task(request: SpacyEntityRecognizerRequest, background_tasks: BackgroundTasks, http_request: Request):
+    if request.format not in ENTITY_FORMATS:
+        return invalid_entity_format(request.format)
+    task_id = new_task_id()
+    # Entity results are tied to the exact text, so it is not normalized
+    read_cache, write_cache = cache_policy(http_request, "spacy/entityRecognizer")
+    result_key = cache_key("spacy/entityRecognizer", request.fulltext, normalize=False, lang="pt", types=[], **spacy_cache_params("pt"))
+    cached = result_cache.get(result_key) if read_cache else None
+    if cached is not None:
+        task_storage[task_id] = {"status": "completed", "result": cached}
+        return entity_response({"task_id": task_id, "status": "completed", "result": format_entities(cached, request.format)})
     if request.async_execution:
         task_storage[task_id] = {"status": "pending", "result": None}
-        background_tasks.add_task(spacy_entity_recognizer, task_id, request.fulltext)
-        return EntityRecognizerCrewResponse(task_id=task_id, status="pending", result=None)
+        submit_background_task(background_tasks, "fast", process_task_spacy_background, task_id, request.fulltext, result_key if write_cache else None)
+        return entity_response({"task_id": task_id, "status": "pending", "result": None})
     else:
-        result = spacy_entity_recognizer(request.fulltext, "pt", [])
-        print(f"Raw Output: {result}")
-        print(f"Tasks Output: {len(result)}")
-        print("Token Usage: 0")
+        result = await ner_coalescer.recognize(request.fulltext, "pt", [])
+        log_payload(logger, "Spacy entities", entities=result, count=len(result))
         task_storage[task_id] = {"status": "completed", "result": result}
-        return EntityRecognizerCrewResponse(task_id=task_id, status="completed", result=result)
+        if write_cache:
+            result_cache.set(result_key, result)
+        return entity_response({"task_id": task_id, "status": "completed", "result": format_entities(result, request.format)})
+
+# Route to inspect loaded Spacy pipelines and the time spent in each of their components
+@app.get("/spacy/profile", summary="Spacy Pipeline Profile", description="Endpoint to get the components of the loaded Spacy pipelines and their timings (enabled by SPACY_PROFILE_PIPES).")
+def spacy_profile():
+    return {
+        "pipelines": {lang: nlp[lang].pipe_names for lang in nlp.loaded()},
+        "timings": pipeline_profiler.stats(),
+    }
 
 # Request model for general entity recognition
 class EntityRecognizerRequest(BaseModel):
@@ -238,21 +861,115 @@ class EntityRecognizerRequest(BaseModel):
     entities: List[str]  # List of entities to be analyzed
     lang: str = "pt"  # Default language (Portuguese)
     async_execution: bool = False  # Default to false
+    format: str = "objects"  # "objects" or "columns" (one array per field), see ENTITY_FORMATS
+    incremental: bool = False  # Reuse the entities of paragraphs already recognized, for documents sent again after edits
 
 # Response model for general entity recognition
 class EntityRecognizerResponse(BaseModel):
-    entities: List[dict] | None  # List of extracted entities
+    entities: Union[List[Entity], EntityColumns, None]  # Extracted entities, as a list or in the columnar format
+    reuse: Optional[dict] = None  # Paragraphs reused and recognized in incremental mode, see spacy_entity_recognizer_incremental
 
 # API route to recognize named entities
-@app.post("/general/entityRecognizer", response_model=EntityRecognizerResponse, summary="General Entity Recognizer", description="Endpoint to recognize entities using Spacy based on specified entity types.")
-async def entity_recognizer(request: EntityRecognizerRequest):
+@app.post("/general/entityRecognizer", response_model=EntityRecognizerResponse, summary="General Entity Recognizer", description="Endpoint to recognize entities based on specified entity types: people, organizations and locations using Spacy, numbers, money, measures, dates, emails and URLs using rules.")
+async def entity_recognizer(request: EntityRecognizerRequest, http_request: Request):
+    if request.format not in ENTITY_FORMATS:
+        return invalid_entity_format(request.format)
+    read_cache, write_cache = cache_policy(http_request, "general/entityRecognizer")
+    # In incremental mode the paragraph cache replaces the cache of whole documents
+    result_key = cache_key("general/entityRecognizer", request.fulltext, normalize=False, lang=request.lang,
+                           types=sorted(set(request.entities)), **spacy_cache_params(request.lang))
+    cached = result_cache.get(result_key) if read_cache and not request.incremental else None
+    if cached is not None:
+        return entity_response({"entities": format_entities(cached, request.format)})
+
+    reuse = {}
+    async def recognize_text(types: List[str]) -> List[dict]:
+        if not request.incremental:
+            return await ner_coalescer.recognize(request.fulltext, request.lang, types)
+        entities, stats = await ner_executor.run(spacy_entity_recognizer_incremental, request.fulltext, request.lang, types,
+                                                 read_cache=read_cache, write_cache=write_cache)
+        reuse.update(stats)
+        return entities
+
     all_entities = []
     if len(request.entities) > 0:
-        request.entities.append("FAILED")
-        text_filter = [entity for entity in request.entities if entity in {e.value for e in TextEntityEnum}]
+        text_filter = [entity for entity in request.entities if entity in SPACY_ENTITY_TYPES]
         if any(text_filter):
-            all_entities.extend(spacy_entity_recognizer(request.fulltext, request.lang, text_filter))
+            all_entities.extend(await recognize_text(text_filter))
+        # Numbers, money, measures, dates, emails and URLs come from the rule-based extractor, without Spacy or an LLM
+        rule_filter = [entity for entity in request.entities if entity in RULE_ENTITY_TYPES]
+        if any(rule_filter):
+            all_entities.extend(await ner_executor.run(extract_numeric_values, request.fulltext, rule_filter))
     else:
-        all_entities.extend(spacy_entity_recognizer(request.fulltext, request.lang, []))
-    return {"entities": all_entities}
+        all_entities.extend(await recognize_text([]))
+        all_entities.extend(await ner_executor.run(extract_numeric_values, request.fulltext))
+    if request.incremental:
+        return entity_response({"entities": format_entities(all_entities, request.format), "reuse": reuse or None})
+    if write_cache:
+        result_cache.set(result_key, all_entities)
+    return entity_response({"entities": format_entities(all_entities, request.format)})
+
+
+# Request models for batch entity recognition
+class EntityRecognizerBatchDocument(BaseModel):
+    fulltext: str  # Text to be checked
+    entities: List[str] = []  # List of entities to be analyzed
+    lang: str = "pt"  # Default language (Portuguese)
+
+class EntityRecognizerBatchRequest(BaseModel):
+    documents: List[EntityRecognizerBatchDocument]  # Documents to be checked
+    batch_size: int = SPACY_BATCH_SIZE  # Number of texts buffered per batch by Spacy
+    n_process: int = SPACY_N_PROCESS  # Number of worker processes used by Spacy
+    format: str = "objects"  # Format of the entities of every document, "objects" or "columns", see ENTITY_FORMATS
+
+# Response model for batch entity recognition, one item per document in input order
+class EntityRecognizerBatchResponse(BaseModel):
+    results: List[EntityRecognizerResponse]
+
+# API route to recognize named entities of many documents at once
+@app.post("/spacy/entityRecognizer/batch", response_model=EntityRecognizerBatchResponse, summary="Batch Spacy Entity Recognizer", description="Endpoint to recognize entities of many documents at once using Spacy, grouped by language.")
+async def entity_recognizer_batch(request: EntityRecognizerBatchRequest):
+    if request.format not in ENTITY_FORMATS:
+        return invalid_entity_format(request.format)
+    documents = []
+    skipped = set()
+    for index, document in enumerate(request.documents):
+        text_filter = [entity for entity in document.entities if entity in SPACY_ENTITY_TYPES]
+        # Same as the general route: documents asking only for non text entities have nothing to run on Spacy
+        if len(document.entities) > 0 and not any(text_filter):
+            skipped.add(index)
+        documents.append({"text": document.fulltext, "lang": document.lang, "types": text_filter})
+
+    pending = [document for index, document in enumerate(documents) if index not in skipped]
+    try:
+        recognized = iter(await ner_executor.run(spacy_entity_recognizer_batch, pending, request.batch_size, request.n_process))
+    except ValueError as e:
+        return JSONResponse(status_code=400, content={"message": str(e)})
+
+    results = [{"entities": format_entities([] if index in skipped else next(recognized), request.format)} for index in range(len(documents))]
+    return entity_response({"results": results})
+
+# Response model for the entity recognition of large documents
+class EntityRecognizerDocumentResponse(BaseModel):
+    entities: Union[List[Entity], EntityColumns]  # Extracted entities, with their character offsets in the document
+    characters: int  # Size of the document
+
+# API route to recognize named entities of a large document, sent as the raw request body (text/plain).
+# The body is read as a stream and recognized in chunks, so memory stays bounded whatever the document size.
+@app.post("/spacy/entityRecognizer/document", response_model=EntityRecognizerDocumentResponse, summary="Large Document Spacy Entity Recognizer", description="Endpoint to recognize entities of a document of any size, sent as the raw request body and processed in overlapping chunks.")
+async def entity_recognizer_document(http_request: Request, lang: str = "pt", types: List[str] = Query([]),
+                                     entity_format: str = Query("objects", alias="format")):
+    if entity_format not in ENTITY_FORMATS:
+        return invalid_entity_format(entity_format)
+    if lang not in nlp:
+        return JSONResponse(status_code=400, content={"message": f"Language model '{lang}' not available. Available options: {list(nlp.keys())}"})
+    loop = asyncio.get_running_loop()
+    size = {"characters": 0}
+
+    def pieces():
+        for piece in iter_request_text(http_request, loop):
+            size["characters"] += len(piece)
+            yield piece
 
+    entities = await ner_executor.run(lambda: list(spacy_entity_recognizer_chunked(pieces(), lang, types)))
+    return entity_response({"entities": format_entities(entities, entity_format), "characters": size["characters"]})
@@ -1,28 +1,35 @@
 import os
 from crewai import Agent, LLM
+from app.mycrews.helper.structured_logging import CREW_VERBOSE
 
 # Load environment variables from .env file
 # load_dotenv()
 
 # Acessando a variável de ambiente API_KEY
 OPENAI_API_KEY = os.getenv("OPENAI_API_KEY")
+# Optional OpenAI-compatible endpoint, e.g. a proxy or a local fake server for benchmarks
+OPENAI_BASE_URL = os.getenv("OPENAI_BASE_URL")
 
-# Starting CrewAI
-llm =  LLM(model="o1-mini", temperature=0.5, api_key=OPENAI_API_KEY)
+# Factories building new, unshared instances, used by the crew pools (see helper/crew_pool.py)
+def create_llm() -> LLM:
+  return LLM(model="o1-mini", temperature=0.5, api_key=OPENAI_API_KEY, base_url=OPENAI_BASE_URL)
 
-#Agent definitions
-crewaiPoetAgent = Agent(
-  role="You are a poet",
-  goal="""Write a creative and emotional poem about the theme: {text}""",
-  backstory="""Driven it by lovely style based on Calmoes""",
-  tools=[],
-  llm=llm
-)
+def create_poet_agent(llm: LLM) -> Agent:
+  return Agent(
+    role="You are a poet",
+    goal="""Write a creative and emotional poem about the theme given in the task""",
+    backstory="""Driven it by lovely style based on Calmoes""",
+    tools=[],
+    llm=llm,
+    verbose=CREW_VERBOSE
+  )
 
-crewaiPhilosofyAgent = Agent(
-  role="You are a proficienty philosofy",
-  goal="""please evaluate the logic, reason, and philosophical depth of the generated poem""",
-  backstory="""Be deligent and write your comment in portuguese from Brazil""",
-  tools=[],
-  llm=llm
-)
\ No newline at end of file
+def create_philosophy_agent(llm: LLM) -> Agent:
+  return Agent(
+    role="You are a proficienty philosofy",
+    goal="""please evaluate the logic, reason, and philosophical depth of the generated poem""",
+    backstory="""Be deligent and write your comment in portuguese from Brazil""",
+    tools=[],
+    llm=llm,
+    verbose=CREW_VERBOSE
+  )
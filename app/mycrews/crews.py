@@ -2,15 +2,23 @@
 from crewai import Crew, Process
 
 #Importing internal resources
-from mycrews.tasks import crewaiCreatePoemTask, crewaiPoemAnalisysTask
-from mycrews.agents import crewaiPoetAgent, crewaiPhilosofyAgent
-from mycrews.entity_recognizer_agent import EntityRecognizerAgent
+from mycrews.tasks import create_poem_task, create_poem_analysis_task
+from mycrews.agents import create_llm, create_poet_agent, create_philosophy_agent
+from mycrews.entity_recognizer_agent import create_entity_recognizer_agent
+from app.mycrews.helper.crew_pool import CrewPool
+from app.mycrews.helper.structured_logging import CREW_VERBOSE
 
-# Create the Crew
-mycrew =  Crew(
-  tasks = [crewaiCreatePoemTask, crewaiPoemAnalisysTask],
-  agents = [crewaiPoetAgent, crewaiPhilosofyAgent, EntityRecognizerAgent],
-  tools = [],
-  process =  Process.sequential,
-  verbose = True
-) 
+# Factory building a crew with its own LLM, agents and tasks, so concurrent executions share no mutable state
+def create_mycrew() -> Crew:
+  llm = create_llm()
+  poet, philosopher = create_poet_agent(llm), create_philosophy_agent(llm)
+  return Crew(
+    tasks = [create_poem_task(poet), create_poem_analysis_task(philosopher)],
+    agents = [poet, philosopher, create_entity_recognizer_agent()],
+    tools = [],
+    process =  Process.sequential,
+    verbose = CREW_VERBOSE
+  )
+
+# Pool of isolated crews checked out once per execution
+mycrew_pool = CrewPool("mycrew", create_mycrew)
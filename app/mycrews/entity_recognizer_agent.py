@@ -1,15 +1,17 @@
 from crewai import Agent
 from mycrews.entity_recognizer_tool import entity_recognizer_tool
+from app.mycrews.helper.structured_logging import CREW_VERBOSE
 
 
-# Define the agent
-EntityRecognizerAgent = Agent(
-    role="Named Entity Recognition (NER) Expert",
-    goal="{text}",
-    backstory=(
-        "A leading NLP researcher with deep expertise in natural language processing."
-        " You specialize in entity recognition, helping to structure unstructured data."
-    ),
-    tools=[entity_recognizer_tool],
-    verbose=True
-)
\ No newline at end of file
+# Factory building a new, unshared agent, used by the crew pools (see helper/crew_pool.py)
+def create_entity_recognizer_agent() -> Agent:
+    return Agent(
+        role="Named Entity Recognition (NER) Expert",
+        goal="Extract the named entities of the document given in the task, using the entity recognizer tool.",
+        backstory=(
+            "A leading NLP researcher with deep expertise in natural language processing."
+            " You specialize in entity recognition, helping to structure unstructured data."
+        ),
+        tools=[entity_recognizer_tool],
+        verbose=CREW_VERBOSE
+    )
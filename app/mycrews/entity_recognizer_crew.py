@@ -3,14 +3,21 @@ from crewai import Crew, Process
 
 #Importing internal resources
 from mycrews.entity_recognizer_tool import entity_recognizer_tool
-from mycrews.entity_recognizer_task import EntityRecognizerTask
-from mycrews.entity_recognizer_agent import EntityRecognizerAgent
+from mycrews.entity_recognizer_task import create_entity_recognizer_task
+from mycrews.entity_recognizer_agent import create_entity_recognizer_agent
+from app.mycrews.helper.crew_pool import CrewPool
+from app.mycrews.helper.structured_logging import CREW_VERBOSE
 
-# Create the Crew
-EntityRecognizerCrew =  Crew(
-  tasks = [EntityRecognizerTask],
-  agents = [EntityRecognizerAgent],
-  tools = [entity_recognizer_tool],
-  process =  Process.sequential,
-  verbose = True
-) 
+# Factory building a crew with its own agent and task, so concurrent executions share no mutable state
+def create_entity_recognizer_crew() -> Crew:
+  agent = create_entity_recognizer_agent()
+  return Crew(
+    tasks = [create_entity_recognizer_task(agent)],
+    agents = [agent],
+    tools = [entity_recognizer_tool],
+    process =  Process.sequential,
+    verbose = CREW_VERBOSE
+  )
+
+# Pool of isolated crews checked out once per execution
+entity_recognizer_pool = CrewPool("entity_recognizer", create_entity_recognizer_crew)
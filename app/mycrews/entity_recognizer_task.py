@@ -1,15 +1,21 @@
-from crewai import Task
-from mycrews.entity_recognizer_agent import EntityRecognizerAgent
+from crewai import Agent, Task
 from mycrews.entity_recognizer_tool import entity_recognizer_tool
+from mycrews.outputs import EntityRecognizerOutput
+from app.mycrews.helper.structured_output_converter import StructuredOutputConverter
 
-# Define the task
-EntityRecognizerTask = Task(
-    description=(
-        "Extract named entities (like names, locations, organizations, and dates) from the given text: {text}."
-        " The output MUST be a valid JSON object"
-        " Do NOT add extra text, explanations, or Markdown formatting."
-    ),
-    expected_output="{ \"entities\": [ { \"text\": \"Elon Musk\", \"type\": \"PERSON\" }, { \"text\": \"SpaceX\", \"type\": \"ORG\" } ] }",
-    agent=EntityRecognizerAgent,
-    tools=[entity_recognizer_tool]
-)
\ No newline at end of file
+# Factory building a new, unshared task, used by the crew pools (see helper/crew_pool.py)
+def create_entity_recognizer_task(agent: Agent) -> Task:
+    return Task(
+        description=(
+            "Extract named entities (like names, locations, organizations, and dates) from the document below."
+            " The entity recognizer tool reads the document itself, call it without arguments."
+            " The output MUST be a valid JSON object"
+            " Do NOT add extra text, explanations, or Markdown formatting."
+            "\n\nDocument:\n{text}"
+        ),
+        expected_output="{ \"entities\": [ { \"text\": \"Elon Musk\", \"type\": \"PERSON\" }, { \"text\": \"SpaceX\", \"type\": \"ORG\" } ] }",
+        agent=agent,
+        tools=[entity_recognizer_tool],
+        output_pydantic=EntityRecognizerOutput,
+        converter_cls=StructuredOutputConverter
+    )
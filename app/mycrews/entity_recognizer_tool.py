@@ -1,10 +1,11 @@
-import spacy
 from crewai.tools import tool
+from app.mycrews.helper.crew_prompts import compact_observation, current_input
 from app.mycrews.helper.spacy_entity_recognizer import spacy_entity_recognizer
 
 
+# The document is read from the crew inputs instead of being an argument, so the LLM never copies it into a tool
+# call, and the observation sent back is the compact list of distinct entities (see TOOL_OBSERVATION_MAX_CHARS)
 @tool("entity_recognizer_tool")
-def entity_recognizer_tool(text: str, result_as_answer=True) -> str:
-    """Extract named entities from the given text and return them in a structured format."""
-    entities = spacy_entity_recognizer(text)   
-    return entities
+def entity_recognizer_tool() -> str:
+    """Extract the named entities of the document given in the task with Spacy. Takes no arguments."""
+    return compact_observation(spacy_entity_recognizer(current_input("text")))
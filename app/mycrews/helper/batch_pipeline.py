@@ -0,0 +1,67 @@
+import asyncio
+from typing import Any, Awaitable, Callable, List, Optional, Sequence
+
+async def pipelined_map(items: Sequence[Any], stages: Sequence[Callable[[Any], Awaitable[Any]]], concurrency: int,
+                        on_stage: Optional[Callable[[int, int, Any], None]] = None) -> List[Any]:
+    """
+    Run every item through a sequence of async stages, with at most `concurrency` stage calls in flight.
+
+    Each item moves to its next stage as soon as its current one finishes, instead of waiting for the whole
+    batch to finish that stage, so the first results come back after one pass through the stages. A free
+    slot always goes to the item closest to the end, so started items finish before new ones begin.
+
+    Args:
+        items (Sequence): Inputs of the first stage.
+        stages (Sequence[callable]): Async functions, each given the result of the previous stage.
+        concurrency (int): Most stage calls running at the same time.
+        on_stage (callable, optional): Called with the item index, stage index and result of every stage call
+            (the exception when it failed). A failed item, or one whose callback raised, skips its remaining stages.
+
+    Returns:
+        List: The result of the last stage for each item, in item order, or the exception that stopped it.
+    """
+    if concurrency <= 0:
+        raise ValueError(f"concurrency must be positive, got {concurrency}")
+    results = [None] * len(items)
+    if not items:
+        return results
+
+    # Ordered by stages left, then item index: an item is in one stage at a time, so values are never compared
+    queue = asyncio.PriorityQueue()
+    for index, item in enumerate(items):
+        queue.put_nowait((len(stages), index, item))
+    remaining = {"items": len(items)}
+    finished = asyncio.Event()
+
+    def finish(index: int, result: Any):
+        results[index] = result
+        remaining["items"] -= 1
+        if not remaining["items"]:
+            finished.set()
+
+    async def worker():
+        while True:
+            left, index, value = await queue.get()
+            stage = len(stages) - left
+            try:
+                value = await stages[stage](value)
+            except Exception as e:
+                value = e
+            if on_stage is not None:
+                try:
+                    on_stage(index, stage, value)
+                except Exception as e:
+                    value = e
+            if isinstance(value, Exception) or left == 1:
+                finish(index, value)
+            else:
+                queue.put_nowait((left - 1, index, value))
+
+    workers = [asyncio.create_task(worker()) for _ in range(min(concurrency, len(items)))]
+    try:
+        await finished.wait()
+    finally:
+        for task in workers:
+            task.cancel()
+        await asyncio.gather(*workers, return_exceptions=True)
+    return results
@@ -0,0 +1,241 @@
+import os
+import queue
+import threading
+import time
+from contextlib import contextmanager
+from typing import Any, Callable, Iterator, List, Optional
+
+from app.mycrews.helper.crew_prompts import count_tokens, crew_inputs, interpolate, prompt_templates
+from app.mycrews.helper.executor import LLM_EXECUTOR_MAX_WORKERS
+from app.mycrews.helper.metrics import crew_kickoff_seconds, crew_task_tokens, crew_tokens_total
+
+# Crew pool settings: crews kept per pool (at most one per concurrent execution, so it defaults to the LLM
+# executor size), crews built on startup, and how long an execution waits for a free crew
+CREW_POOL_SIZE = int(os.getenv("CREW_POOL_SIZE", str(LLM_EXECUTOR_MAX_WORKERS)))
+CREW_POOL_WARMUP = int(os.getenv("CREW_POOL_WARMUP", "1"))
+CREW_POOL_ACQUIRE_TIMEOUT_SECONDS = float(os.getenv("CREW_POOL_ACQUIRE_TIMEOUT_SECONDS", "30"))
+
+class CrewPoolTimeoutError(TimeoutError):
+    """
+    Raised when no crew of a CrewPool gets free within the acquire timeout.
+    """
+
+    def __init__(self, name: str, size: int, timeout: float):
+        super().__init__(f"Crew pool '{name}' has no free crew ({size} in use) after {timeout}s. Try again later.")
+        self.name = name
+        self.size = size
+        self.timeout = timeout
+
+def _reset_execution_state(crew):
+    # Imported here so the API can handle CrewPoolTimeoutError without loading crewai
+    from crewai.agents.agent_builder.utilities.base_token_process import TokenProcess
+
+    # Crew.kickoff copies the crew callbacks to the tasks and agents that have none, so they have to be
+    # cleared everywhere before the crew serves another execution. Agents also add up the tokens of every
+    # execution, which would make the token usage of a reused crew grow with each request.
+    crew.task_callback = None
+    crew.step_callback = None
+    for task in crew.tasks:
+        task.callback = None
+    for agent in crew.agents:
+        agent.step_callback = None
+        agent._token_process = TokenProcess()
+
+def task_token_usage(crew) -> List[dict]:
+    """Token usage of each task of a crew execution, read before the crew is reset."""
+    # Each agent of the pool crews runs one task, so its token usage is the usage of the task
+    usage = []
+    for index, task in enumerate(crew.tasks):
+        agent = task.agent
+        summary = agent._token_process.get_summary()
+        usage.append({"task": index, "agent": agent.role, "prompt_tokens": summary.prompt_tokens,
+                      "completion_tokens": summary.completion_tokens, "total_tokens": summary.total_tokens})
+    return usage
+
+def _record_tokens(pool_name: str, usage: List[dict]):
+    for task in usage:
+        if task["total_tokens"]:
+            crew_task_tokens.observe(task["total_tokens"], crew=pool_name, agent=task["agent"])
+            crew_tokens_total.inc(task["prompt_tokens"], crew=pool_name, agent=task["agent"], kind="prompt")
+            crew_tokens_total.inc(task["completion_tokens"], crew=pool_name, agent=task["agent"], kind="completion")
+
+class CrewPool:
+    """
+    Pool of isolated crews, checked out by one execution at a time.
+
+    A crew is not safe to share between concurrent kickoffs: the kickoff interpolates its inputs into the
+    task descriptions and agent goals in place, and stores task outputs, agent executors and usage metrics
+    on the shared objects. Each crew of the pool is built by `factory` with its own LLM, agents and tasks,
+    so concurrent executions never see each other's state.
+
+    Crews are built lazily up to `size` and reused afterwards; `warm_up` builds the first `warmup` ones
+    ahead of time, e.g. on startup. Callbacks and token counters of an execution are reset when the crew is returned.
+
+    Args:
+        name (str): Name of the pool, used in error messages and stats.
+        factory (callable): Builds a new crew.
+        size (int, optional): Most crews built, and so most concurrent executions.
+        warmup (int, optional): Crews built by `warm_up`.
+        acquire_timeout (float, optional): Seconds an execution waits for a free crew.
+    """
+
+    def __init__(self, name: str, factory: Callable[[], Any], size: int = CREW_POOL_SIZE,
+                 warmup: int = CREW_POOL_WARMUP, acquire_timeout: float = CREW_POOL_ACQUIRE_TIMEOUT_SECONDS):
+        if size <= 0:
+            raise ValueError(f"Crew pool size must be positive, got {size}")
+        self.name = name
+        self.factory = factory
+        self.size = size
+        self.warmup = min(warmup, size)
+        self.acquire_timeout = acquire_timeout
+        self._idle = queue.LifoQueue()  # Most recently used first, so a few warm crews serve light traffic
+        self._created = 0
+        self._in_use = 0
+        self._executions = 0
+        self._waits = 0
+        self._models = None
+        self._templates = None
+        self._lock = threading.Lock()
+        self._described = threading.Condition(self._lock)  # Notified when the first crew is built, or a build failed
+
+    def _build(self) -> bool:
+        # Reserve a slot under the lock, build outside of it: building a crew takes a few milliseconds
+        with self._lock:
+            if self._created >= self.size:
+                return False
+            self._created += 1
+        try:
+            crew = self.factory()
+        except BaseException:
+            with self._lock:
+                self._created -= 1
+                self._described.notify_all()
+            raise
+        if self._models is None:
+            models = [getattr(agent.llm, "model", str(agent.llm)) for agent in crew.agents]
+            templates = prompt_templates(crew)
+            with self._lock:
+                if self._models is None:
+                    self._models, self._templates = models, templates
+                    self._described.notify_all()
+        self._idle.put(crew)
+        return True
+
+    def warm_up(self) -> int:
+        """
+        Build crews until `warmup` exist, and at least the first one, which gives the models and prompt templates
+        of the pool: once it returned, `models` and `prompt_tokens` never block. Returns the number of crews built.
+        """
+        built = 0
+        while self._created < self.warmup and self._build():
+            built += 1
+        if self._models is None:
+            created = self._created
+            self._describe()
+            built += self._created - created
+        return built
+
+    @contextmanager
+    def acquire(self, timeout: Optional[float] = None) -> Iterator[Any]:
+        """
+        Check out a crew for one execution, building one if none is idle and the pool is not full.
+
+        Raises:
+            CrewPoolTimeoutError: If every crew stays in use for `timeout` seconds (the pool default if None).
+        """
+        timeout = self.acquire_timeout if timeout is None else timeout
+        try:
+            crew = self._idle.get_nowait()
+        except queue.Empty:
+            if not self._build():
+                with self._lock:
+                    self._waits += 1
+            try:
+                crew = self._idle.get(timeout=timeout)
+            except queue.Empty:
+                raise CrewPoolTimeoutError(self.name, self.size, timeout) from None
+        with self._lock:
+            self._in_use += 1
+            self._executions += 1
+        try:
+            yield crew
+        finally:
+            _reset_execution_state(crew)
+            with self._lock:
+                self._in_use -= 1
+            self._idle.put(crew)
+
+    def kickoff(self, inputs: dict, task_callback: Optional[Callable] = None, step_callback: Optional[Callable] = None,
+                on_start: Optional[Callable[[Any], None]] = None, on_finish: Optional[Callable[[List[dict]], None]] = None):
+        """
+        Run one execution on a crew of the pool. Blocking, like Crew.kickoff.
+
+        The inputs are also available to the tools of the crew through `crew_prompts.current_input`.
+
+        Args:
+            inputs (dict): Kickoff inputs.
+            task_callback, step_callback (callable, optional): Crew callbacks for this execution only.
+            on_start (callable, optional): Called with the crew right before its kickoff.
+            on_finish (callable, optional): Called with the token usage of each task (see `task_token_usage`)
+                once the kickoff succeeded.
+        """
+        with self.acquire() as crew, crew_inputs(inputs):
+            crew.task_callback = task_callback
+            crew.step_callback = step_callback
+            if on_start is not None:
+                on_start(crew)
+            start = time.perf_counter()
+            try:
+                result = crew.kickoff(inputs=inputs)
+            except Exception:
+                crew_kickoff_seconds.observe(time.perf_counter() - start, crew=self.name, outcome="error")
+                raise
+            crew_kickoff_seconds.observe(time.perf_counter() - start, crew=self.name, outcome="ok")
+            usage = task_token_usage(crew)
+            _record_tokens(self.name, usage)
+            if on_finish is not None:
+                on_finish(usage)
+            return result
+
+    def _describe(self):
+        # Models and prompt templates are read from the first crew built. Without one, build it, or wait for the
+        # build in flight when the pool is full (a failed build frees its slot for the next attempt).
+        deadline = time.monotonic() + self.acquire_timeout
+        while self._models is None:
+            if self._build():
+                continue
+            with self._lock:
+                if self._models is None:
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        raise CrewPoolTimeoutError(self.name, self.size, self.acquire_timeout)
+                    self._described.wait(remaining)
+
+    def models(self) -> List[str]:
+        """
+        Models used by the agents of the pool crews, part of the cache key of their results.
+
+        Blocking until the first crew is built, see `warm_up`.
+
+        Raises:
+            CrewPoolTimeoutError: If the first crew is still not built after the acquire timeout.
+        """
+        self._describe()
+        return list(self._models)
+
+    def prompt_tokens(self, inputs: dict) -> int:
+        """
+        Prompt tokens of the tasks of the pool crews for `inputs`, before any agent iteration or tool output.
+
+        Blocking until the first crew is built, see `warm_up`.
+
+        Raises:
+            CrewPoolTimeoutError: If the first crew is still not built after the acquire timeout.
+        """
+        self._describe()
+        return sum(count_tokens(interpolate(template, inputs), model) for model, template in self._templates)
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {"name": self.name, "size": self.size, "created": self._created, "in_use": self._in_use,
+                    "idle": self._created - self._in_use, "executions": self._executions, "waits": self._waits}
@@ -0,0 +1,179 @@
+import os
+from contextlib import contextmanager
+from contextvars import ContextVar
+from functools import lru_cache
+from typing import Any, Iterator, List, Optional, Tuple
+
+from app.mycrews.helper.entity_serialization import dumps
+from app.mycrews.helper.metrics import crew_prompt_budget_total, crew_prompt_tokens
+from app.mycrews.helper.text_chunker import iter_chunks
+
+# tiktoken is optional: without it, tokens are estimated from the text length
+try:
+    import tiktoken
+except ImportError:  # pragma: no cover
+    tiktoken = None
+
+# Token budget of a crew request: most prompt tokens of its tasks, counted before the kickoff (0 disables it),
+# and what to do with a larger request: "reject" it (413) or "chunk" its text, run by the entity crew chunk by chunk
+CREW_PROMPT_TOKEN_BUDGET = int(os.getenv("CREW_PROMPT_TOKEN_BUDGET", "8000"))
+CREW_OVER_BUDGET = os.getenv("CREW_OVER_BUDGET", "reject")
+OVER_BUDGET_MODES = ("reject", "chunk")
+
+# Longest tool observation sent back to the LLM, in characters
+TOOL_OBSERVATION_MAX_CHARS = int(os.getenv("TOOL_OBSERVATION_MAX_CHARS", "4000"))
+
+# Characters per token when tiktoken is not installed
+CHARS_PER_TOKEN = 4
+
+# Inputs of the crew execution running in this context, so tools read the document instead of the LLM copying it
+# into every tool call. Set by CrewPool.kickoff, which runs the whole kickoff in one thread.
+_crew_inputs: ContextVar[Optional[dict]] = ContextVar("crew_inputs", default=None)
+
+if CREW_OVER_BUDGET not in OVER_BUDGET_MODES:
+    raise ValueError(f"Invalid CREW_OVER_BUDGET '{CREW_OVER_BUDGET}'. Available options: {list(OVER_BUDGET_MODES)}")
+
+class TokenBudgetExceededError(ValueError):
+    """
+    Raised when the prompts of a crew request exceed the token budget and it can't be split to fit.
+    """
+
+    def __init__(self, crew: str, tokens: int, budget: int):
+        super().__init__(f"Request to crew '{crew}' needs about {tokens} prompt tokens, over the budget of {budget}. Send a shorter text.")
+        self.crew = crew
+        self.tokens = tokens
+        self.budget = budget
+
+@contextmanager
+def crew_inputs(inputs: dict) -> Iterator[None]:
+    """Make `inputs` the inputs of the crew execution of this context."""
+    token = _crew_inputs.set(inputs)
+    try:
+        yield
+    finally:
+        _crew_inputs.reset(token)
+
+def current_input(key: str) -> str:
+    """
+    Input `key` of the crew execution of this context.
+
+    Raises:
+        LookupError: If no crew execution runs in this context, or it has no such input.
+    """
+    inputs = _crew_inputs.get()
+    if inputs is None or key not in inputs:
+        raise LookupError(f"No crew input '{key}' in this context")
+    return str(inputs[key])
+
+@lru_cache(maxsize=None)
+def _encoding(model: Optional[str]):
+    try:
+        return tiktoken.encoding_for_model(model)
+    except KeyError:
+        return tiktoken.get_encoding("o200k_base")
+
+def count_tokens(text: str, model: Optional[str] = None) -> int:
+    """Tokens of `text` for the tokenizer of `model`, or an estimate from its length without tiktoken."""
+    if tiktoken is None:
+        return -(-len(text) // CHARS_PER_TOKEN)
+    return len(_encoding(model).encode(text, disallowed_special=()))
+
+def prompt_templates(crew) -> List[Tuple[Optional[str], str]]:
+    """
+    Model and prompt template of each task of a freshly built crew: the agent role, goal and backstory, then the
+    task description and expected output, with their `{input}` placeholders not interpolated yet.
+    """
+    templates = []
+    for task in crew.tasks:
+        agent = getattr(task, "agent", None)
+        parts = [getattr(agent, "role", None), getattr(agent, "goal", None), getattr(agent, "backstory", None),
+                 getattr(task, "description", None), getattr(task, "expected_output", None)]
+        model = getattr(getattr(agent, "llm", None), "model", None)
+        templates.append((model, "\n".join(str(part) for part in parts if part)))
+    return templates
+
+def interpolate(template: str, inputs: dict) -> str:
+    # Like the crew kickoff, which replaces the `{input}` placeholders and leaves any other brace as it is
+    for key, value in inputs.items():
+        template = template.replace("{" + key + "}", str(value))
+    return template
+
+def check_prompt_budget(pool, inputs: dict, chunkable: bool = False, budget: int = CREW_PROMPT_TOKEN_BUDGET) -> int:
+    """
+    Count the prompt tokens of a crew request before its kickoff, against the token budget.
+
+    Args:
+        pool (CrewPool): Pool of the crew serving the request.
+        inputs (dict): Kickoff inputs.
+        chunkable (bool, optional): Whether the caller runs a larger "text" input in chunks (see `split_to_budget`)
+            when CREW_OVER_BUDGET is "chunk".
+        budget (int, optional): Most prompt tokens, 0 disables the check.
+
+    Returns:
+        int: Prompt tokens of the request.
+
+    Raises:
+        TokenBudgetExceededError: If the request is over budget and won't be chunked, or even its prompts
+            without the text are.
+    """
+    tokens = pool.prompt_tokens(inputs)
+    crew_prompt_tokens.observe(tokens, crew=pool.name)
+    if not budget or tokens <= budget:
+        crew_prompt_budget_total.inc(crew=pool.name, outcome="within")
+        return tokens
+    if chunkable and CREW_OVER_BUDGET == "chunk" and pool.prompt_tokens({**inputs, "text": ""}) < budget:
+        crew_prompt_budget_total.inc(crew=pool.name, outcome="chunked")
+        return tokens
+    crew_prompt_budget_total.inc(crew=pool.name, outcome="rejected")
+    raise TokenBudgetExceededError(pool.name, tokens, budget)
+
+def split_to_budget(pool, text: str, budget: int = CREW_PROMPT_TOKEN_BUDGET) -> List[str]:
+    """
+    Split the "text" input of a crew request into pieces whose prompts fit the token budget, cut at paragraph or
+    sentence boundaries. A text within the budget (or with the budget disabled) is returned as the only piece.
+
+    Raises:
+        TokenBudgetExceededError: If even the prompts without the text exceed the budget.
+    """
+    tokens = pool.prompt_tokens({"text": text})
+    if not budget or tokens <= budget:
+        return [text]
+    overhead = pool.prompt_tokens({"text": ""})
+    if overhead >= budget:
+        raise TokenBudgetExceededError(pool.name, tokens, budget)
+    # Characters per chunk from the tokens the text adds to the prompts, with a margin for uneven texts
+    chunk_size = max(1, int(len(text) * (budget - overhead) / (tokens - overhead) * 0.9))
+    return [chunk.text for chunk in iter_chunks(text, chunk_size)]
+
+def compact_observation(entities: List[dict], max_chars: int = TOOL_OBSERVATION_MAX_CHARS) -> str:
+    """
+    Entities found by a tool as compact JSON for the LLM context: each distinct text and type once, without offsets
+    or labels, cut after `max_chars` characters with a note telling how many were left out.
+    """
+    unique = list(dict.fromkeys((entity["value"], entity["type"]) for entity in entities))
+    items, size = [], 2
+    for index, (value, entity_type) in enumerate(unique):
+        item = dumps({"text": value, "type": entity_type}).decode()
+        if max_chars and size + len(item) + 1 > max_chars:
+            return f"[{','.join(items)}] ({len(unique) - index} more entities left out)"
+        items.append(item)
+        size += len(item) + 1
+    return f"[{','.join(items)}]"
+
+def merge_entities(results: List[List[dict]]) -> List[dict]:
+    """Entities of the chunks of a text in order, each text and type once."""
+    merged = {}
+    for entities in results:
+        for entity in entities:
+            merged.setdefault((entity.get("text", entity.get("value")), entity.get("type")), entity)
+    return list(merged.values())
+
+def sum_token_usage(usages: List[Any]) -> dict:
+    """Sum of the token usage of several crew outputs (UsageMetrics or dicts)."""
+    total = {}
+    for usage in usages:
+        usage = usage.model_dump() if hasattr(usage, "model_dump") else dict(usage or {})
+        for key, value in usage.items():
+            if isinstance(value, (int, float)):
+                total[key] = total.get(key, 0) + value
+    return total
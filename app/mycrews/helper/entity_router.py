@@ -0,0 +1,65 @@
+import os
+import threading
+from typing import List, Optional
+
+from app.mycrews.helper.commons import TextEntityEnum
+from app.mycrews.helper.spacy_entity_recognizer import nlp
+
+# Routing of entity requests between Spacy and the EntityRecognizerCrew:
+#   "auto"  - answer from Spacy, escalate to the crew for types or languages Spacy can't handle or a low coverage
+#   "spacy" - always answer from Spacy
+#   "crew"  - always run the crew
+ROUTING_MODES = ("auto", "spacy", "crew")
+ENTITY_ROUTING_DEFAULT = os.getenv("ENTITY_ROUTING_DEFAULT", "auto")
+
+# Below this entity coverage (see spacy_entity_recognizer_with_coverage) "auto" escalates to the crew, 0 disables the check
+ENTITY_ROUTING_MIN_COVERAGE = float(os.getenv("ENTITY_ROUTING_MIN_COVERAGE", "0.5"))
+
+# Entity types the Spacy models recognize
+SPACY_ENTITY_TYPES = {e.value for e in TextEntityEnum}
+
+if ENTITY_ROUTING_DEFAULT not in ROUTING_MODES:
+    raise ValueError(f"Invalid ENTITY_ROUTING_DEFAULT '{ENTITY_ROUTING_DEFAULT}'. Available options: {list(ROUTING_MODES)}")
+
+def escalation_reason(lang: str, types: List[str]) -> Optional[str]:
+    """
+    Tell why a request can't be answered by Spacy, or None when it can.
+
+    Returns:
+        Optional[str]: "language" when no Spacy model serves the language, "types" when an entity type
+        is not covered by TextEntityEnum, None otherwise.
+    """
+    if lang not in nlp:
+        return "language"
+    if any(t.upper() not in SPACY_ENTITY_TYPES for t in types):
+        return "types"
+    return None
+
+class RoutingStats:
+    """
+    Counters of the path (spacy or crew) that served entity requests, by reason.
+    """
+
+    def __init__(self):
+        self._counts = {}
+        self._lock = threading.Lock()
+
+    def record(self, served_by: str, reason: str):
+        with self._lock:
+            self._counts[(served_by, reason)] = self._counts.get((served_by, reason), 0) + 1
+
+    def stats(self) -> dict:
+        with self._lock:
+            counts = dict(self._counts)
+        total = sum(counts.values())
+        served = {}
+        for (served_by, reason), count in sorted(counts.items()):
+            entry = served.setdefault(served_by, {"count": 0, "reasons": {}})
+            entry["count"] += count
+            entry["reasons"][reason] = count
+        for entry in served.values():
+            entry["share"] = round(entry["count"] / total, 4)
+        return {"total": total, "served_by": served}
+
+# Counters of every routed request
+routing_stats = RoutingStats()
@@ -0,0 +1,72 @@
+import json
+import os
+from typing import Any, List, Optional, Union
+
+from fastapi.responses import JSONResponse
+from pydantic import ConfigDict, with_config
+from typing_extensions import NotRequired, TypedDict
+
+# orjson is optional: responses fall back to the standard json module when it is not installed
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+# Serve entity responses with FastJSONResponse, skipping the validation and encoding of FastAPI response models
+FAST_JSON_RESPONSES = os.getenv("FAST_JSON_RESPONSES", "0") == "1"
+
+# Entity formats of the responses: a list of objects, or one array per field ("columns")
+ENTITY_FORMATS = ("objects", "columns")
+
+# Typed dicts rather than models: response validation stays about as cheap as for plain dicts, and results
+# are served as they are (no null fields added), while the OpenAPI schema documents every field.
+@with_config(ConfigDict(extra="allow"))
+class Entity(TypedDict):
+    """
+    An extracted entity. Spacy entities have a label and character offsets, rule-based entities
+    (see extract_numeric_values) have offsets and extra fields such as "unit", "symbol" and "source".
+    """
+    value: Union[str, int, float]  # Entity text, or the parsed number of numeric entities
+    type: str  # Entity type, e.g. PERSON, ORG, MONEY
+    label: NotRequired[str]  # Label given by the Spacy model, e.g. PER
+    start: NotRequired[Optional[int]]  # Character offset of the entity in the text
+    end: NotRequired[Optional[int]]  # Character offset after the entity
+
+class EntityColumns(TypedDict):
+    """Entities in the compact columnar format: item i of every array describes entity i."""
+    values: List[Union[str, int, float]]
+    types: List[str]
+    starts: List[Optional[int]]
+    ends: List[Optional[int]]
+
+def entity_columns(entities: List[dict]) -> dict:
+    """
+    Entities as one array per field (values, types, starts, ends), which repeats no key and is much smaller.
+
+    Extra fields of rule-based entities and the Spacy label are not part of this format.
+    """
+    return {
+        "values": [entity["value"] for entity in entities],
+        "types": [entity["type"] for entity in entities],
+        "starts": [entity.get("start") for entity in entities],
+        "ends": [entity.get("end") for entity in entities],
+    }
+
+def format_entities(entities: List[dict], entity_format: str) -> Union[List[dict], dict]:
+    """Entities in the requested format, among ENTITY_FORMATS."""
+    return entity_columns(entities) if entity_format == "columns" else entities
+
+def dumps(content: Any) -> bytes:
+    """Compact UTF-8 JSON, with orjson when it is installed."""
+    if orjson is not None:
+        return orjson.dumps(content)
+    return json.dumps(content, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+
+class FastJSONResponse(JSONResponse):
+    """
+    JSON response encoded by `dumps` (orjson when installed). Routes returning it directly skip the
+    validation and encoding of their response model, so the content must already match it.
+    """
+
+    def render(self, content: Any) -> bytes:
+        return dumps(content)
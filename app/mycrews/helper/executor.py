@@ -0,0 +1,97 @@
+import asyncio
+import contextvars
+import functools
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable
+
+# Pool sizes. NER is CPU bound, so keep it close to the number of cores; LLM calls mostly wait on the network.
+NER_EXECUTOR_MAX_WORKERS = int(os.getenv("NER_EXECUTOR_MAX_WORKERS", str(os.cpu_count() or 1)))
+NER_EXECUTOR_MAX_PENDING = int(os.getenv("NER_EXECUTOR_MAX_PENDING", str(NER_EXECUTOR_MAX_WORKERS * 4)))
+LLM_EXECUTOR_MAX_WORKERS = int(os.getenv("LLM_EXECUTOR_MAX_WORKERS", "16"))
+LLM_EXECUTOR_MAX_PENDING = int(os.getenv("LLM_EXECUTOR_MAX_PENDING", str(LLM_EXECUTOR_MAX_WORKERS * 2)))
+
+class ExecutorSaturatedError(Exception):
+    """
+    Raised when a call is submitted to a BoundedExecutor that has no free slot left.
+    """
+
+    def __init__(self, name: str, max_pending: int):
+        super().__init__(f"Executor '{name}' is saturated ({max_pending} calls running or queued). Try again later.")
+        self.name = name
+        self.max_pending = max_pending
+
+class BoundedExecutor:
+    """
+    Thread pool that runs blocking calls off the asyncio event loop, with backpressure.
+
+    At most `max_workers` calls run at the same time and at most `max_pending` calls are accepted
+    (running plus queued). Further calls are rejected right away with ExecutorSaturatedError,
+    which the API turns into a 429 response, instead of piling up and stalling every other route.
+
+    Args:
+        name (str): Name of the pool, used for thread names and error messages.
+        max_workers (int): Number of threads running calls.
+        max_pending (int): Number of calls accepted at once, running or waiting for a thread.
+    """
+
+    def __init__(self, name: str, max_workers: int, max_pending: int):
+        self.name = name
+        self.max_workers = max_workers
+        self.max_pending = max(max_pending, max_workers)
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix=f"{name}-executor")
+        self._slots = threading.BoundedSemaphore(self.max_pending)
+        self._pending = 0
+        self._lock = threading.Lock()
+
+    @property
+    def pending(self) -> int:
+        """Number of calls currently running or queued."""
+        return self._pending
+
+    async def run(self, func: Callable[..., Any], *args, **kwargs) -> Any:
+        """
+        Run `func(*args, **kwargs)` in the pool and wait for its result without blocking the event loop.
+
+        Raises:
+            ExecutorSaturatedError: If the pool already holds `max_pending` calls.
+        """
+        return await self.submit(func, *args, **kwargs)
+
+    def submit(self, func: Callable[..., Any], *args, **kwargs) -> asyncio.Future:
+        """
+        Start `func(*args, **kwargs)` in the pool and return an asyncio future of its result.
+
+        Must be called from the event loop. Saturation is reported right away, before the call starts.
+        The call runs in a copy of the caller's context, so log correlation ids follow it into the thread.
+
+        Raises:
+            ExecutorSaturatedError: If the pool already holds `max_pending` calls.
+        """
+        if not self._slots.acquire(blocking=False):
+            raise ExecutorSaturatedError(self.name, self.max_pending)
+        with self._lock:
+            self._pending += 1
+
+        try:
+            future = self._executor.submit(contextvars.copy_context().run, functools.partial(func, *args, **kwargs))
+        except BaseException:
+            self._release(None)
+            raise
+
+        # The slot is only released when the call really finishes, even if the awaiting request is cancelled
+        future.add_done_callback(self._release)
+        return asyncio.wrap_future(future)
+
+    def _release(self, _future):
+        with self._lock:
+            self._pending -= 1
+        self._slots.release()
+
+    def shutdown(self, wait: bool = True):
+        self._executor.shutdown(wait=wait)
+
+# Shared pools: one for Spacy inference and one for blocking LLM calls (OpenAI client and crew kickoffs)
+ner_executor = BoundedExecutor("ner", NER_EXECUTOR_MAX_WORKERS, NER_EXECUTOR_MAX_PENDING)
+llm_executor = BoundedExecutor("llm", LLM_EXECUTOR_MAX_WORKERS, LLM_EXECUTOR_MAX_PENDING)
@@ -0,0 +1,286 @@
+import re
+import unicodedata
+from bisect import bisect_right
+from datetime import date, datetime
+from functools import lru_cache
+from typing import Iterable, List, Optional
+
+from app.mycrews.helper.commons import DateEntityEnum, NumericEntityEnum, WebEntityEnum
+
+# Types served by the rule-based extractor
+RULE_ENTITY_TYPES = {e.value for enum in (DateEntityEnum, NumericEntityEnum, WebEntityEnum) for e in enum}
+
+# Portuguese number words by their accent-free spelling
+NUMBER_WORDS = {
+    "zero": 0, "um": 1, "uma": 1, "dois": 2, "duas": 2, "tres": 3, "quatro": 4, "cinco": 5, "seis": 6, "sete": 7,
+    "oito": 8, "nove": 9, "dez": 10, "onze": 11, "doze": 12, "treze": 13, "quatorze": 14, "catorze": 14, "quinze": 15,
+    "dezesseis": 16, "dezessete": 17, "dezoito": 18, "dezenove": 19, "vinte": 20, "trinta": 30, "quarenta": 40,
+    "cinquenta": 50, "sessenta": 60, "setenta": 70, "oitenta": 80, "noventa": 90, "cem": 100, "cento": 100,
+    "duzentos": 200, "duzentas": 200, "trezentos": 300, "trezentas": 300, "quatrocentos": 400, "quatrocentas": 400,
+    "quinhentos": 500, "quinhentas": 500, "seiscentos": 600, "seiscentas": 600, "setecentos": 700, "setecentas": 700,
+    "oitocentos": 800, "oitocentas": 800, "novecentos": 900, "novecentas": 900,
+}
+SCALE_WORDS = {
+    "mil": 1_000, "milhao": 1_000_000, "milhoes": 1_000_000, "bilhao": 1_000_000_000, "bilhoes": 1_000_000_000,
+    "trilhao": 1_000_000_000_000, "trilhoes": 1_000_000_000_000,
+}
+
+# Currencies by symbol, code or accent-free word: (unit, symbol, factor)
+CURRENCY_SYMBOLS = {"R$": ("BRL", "R$"), "US$": ("USD", "US$"), "$": ("USD", "$"), "€": ("EUR", "€"), "£": ("GBP", "£")}
+CURRENCY_WORDS = {
+    "real": ("BRL", "R$", 1), "reais": ("BRL", "R$", 1), "brl": ("BRL", "R$", 1),
+    "centavo": ("BRL", "R$", 0.01), "centavos": ("BRL", "R$", 0.01),
+    "dolar": ("USD", "$", 1), "dolares": ("USD", "$", 1), "usd": ("USD", "$", 1),
+    "euro": ("EUR", "€", 1), "euros": ("EUR", "€", 1), "eur": ("EUR", "€", 1),
+    "libra": ("GBP", "£", 1), "libras": ("GBP", "£", 1), "gbp": ("GBP", "£", 1),
+}
+
+# Units by accent-free name or symbol, normalized to their symbol
+UNIT_WORDS = {
+    "milimetro": "mm", "milimetros": "mm", "mm": "mm",
+    "centimetro": "cm", "centimetros": "cm", "cm": "cm",
+    "metro": "m", "metros": "m", "m": "m",
+    "quilometro": "km", "quilometros": "km", "kilometro": "km", "kilometros": "km", "km": "km",
+    "miligrama": "mg", "miligramas": "mg", "mg": "mg",
+    "grama": "g", "gramas": "g", "g": "g",
+    "quilo": "kg", "quilos": "kg", "quilograma": "kg", "quilogramas": "kg", "kg": "kg",
+    "tonelada": "t", "toneladas": "t",
+    "mililitro": "ml", "mililitros": "ml", "ml": "ml",
+    "litro": "l", "litros": "l", "l": "l",
+    "m2": "m2", "m²": "m2", "m3": "m3", "m³": "m3", "km2": "km2", "km²": "km2",
+    "hectare": "ha", "hectares": "ha", "ha": "ha",
+    "segundo": "s", "segundos": "s", "minuto": "min", "minutos": "min", "hora": "h", "horas": "h",
+    "km/h": "km/h", "%": "%", "por cento": "%", "graus": "°", "°c": "°C",
+}
+
+MONTHS = {
+    "janeiro": 1, "fevereiro": 2, "marco": 3, "abril": 4, "maio": 5, "junho": 6, "julho": 7, "agosto": 8,
+    "setembro": 9, "outubro": 10, "novembro": 11, "dezembro": 12,
+}
+
+# Accented variants of each letter, so the patterns match words with or without (or with misplaced) accents
+_ACCENTS = {"a": "aáàâã", "e": "éêe", "i": "ií", "o": "oóôõ", "u": "uúü", "c": "cç"}
+
+@lru_cache(maxsize=4096)
+def _fold(text: str) -> str:
+    """Lowercase a word and strip its accents, the form used to look it up in the lexicons."""
+    return "".join(char for char in unicodedata.normalize("NFD", text.lower()) if not unicodedata.combining(char))
+
+def _accent_insensitive(word: str) -> str:
+    return "".join(f"[{_ACCENTS[char]}]" if char in _ACCENTS else re.escape(char) for char in word)
+
+def _alternation(words: Iterable[str]) -> str:
+    """
+    Build a pattern matching any of the words, as a trie of their letters ("dez(?:e(?:nove|ss(?:eis|ete)|oito))?").
+
+    A plain alternation makes the regex engine try every word at every position of the text; the trie shares
+    prefixes, so each position costs at most one word length. Longer words are preferred over their prefixes.
+    """
+    trie = {}
+    for word in set(words):
+        node = trie
+        for char in _fold(word) if word.isalpha() else word.lower():
+            node = node.setdefault(char, {})
+        node[""] = {}
+    return _trie_pattern(trie)
+
+def _trie_pattern(node: dict) -> str:
+    branches = [_accent_insensitive(char) + _trie_pattern(child) for char, child in sorted(node.items()) if char]
+    if not branches:
+        return ""
+    pattern = branches[0] if len(branches) == 1 else f"(?:{'|'.join(branches)})"
+    return f"(?:{pattern})?" if "" in node else pattern
+
+_NUMBER_WORD = rf"(?:{_alternation(list(NUMBER_WORDS) + list(SCALE_WORDS))})(?!\w)"
+_WORD_NUMBER = rf"{_NUMBER_WORD}(?:\s+(?:e\s+)?{_NUMBER_WORD})*"
+_DIGITS = r"(?<![.,])\d+(?:[.,]\d+)*"
+_SCALE_WORD = rf"(?:{_alternation(SCALE_WORDS)})(?!\w)"
+# Cents only follow a currency ("dez reais e cinco centavos"): after a plain number, "e N centavos" is an amount of its own
+_CENTS = rf"(?:\s+e\s+(?P<cents>{_WORD_NUMBER}|\d{{1,2}})\s+centavos?(?!\w))?"
+_SUFFIX = (rf"(?:\s*(?:de\s+)?(?:(?P<currency>{_alternation(CURRENCY_WORDS)})(?![\w²³]){_CENTS}"
+           rf"|(?P<unit>{_alternation(UNIT_WORDS)})(?![\w²³])))?")
+_MONTH = rf"(?P<month_name>{_alternation(MONTHS)})"
+_TIME = r"(?:(?:\s+(?:[àa]s|,)?\s*|T)(?P<hour>\d{1,2})(?::(?P<minute>\d{2})|h(?P<hminute>\d{2})?)(?!\w))?"
+
+# One combined pattern scanned once per text. Every entity starts at a word start, which the leading lookbehind
+# checks once instead of trying each alternative in the middle of words. At each word start, the alternatives
+# are tried in order, so emails and URLs win over the numbers they contain and dates over their day and year.
+COMBINED_PATTERN = re.compile(
+    rf"(?<!\w)(?:(?P<email>(?<![\w.+-])[\w.+-]+@[\w-]+(?:\.[\w-]+)+)"
+    rf"|(?P<url>(?:https?://|www\.)[^\s\x00<>\"']+[^\s\x00<>\"'.,;:!?)])"
+    rf"|(?P<date>(?:(?P<day>\d{{1,2}})/(?P<dmonth>\d{{1,2}})/(?P<dyear>\d{{4}}|\d{{2}})"
+    rf"|(?P<iyear>\d{{4}})-(?P<imonth>\d{{2}})-(?P<iday>\d{{2}})"
+    rf"|(?P<wday>\d{{1,2}})\s+de\s+{_MONTH}(?:\s+de\s+(?P<wyear>\d{{4}}))?)(?!\d){_TIME})"
+    rf"|(?P<money>(?P<symbol>R\$|US\$|\$|€|£)\s?(?P<money_number>\d+(?:[.,]\d+)*)(?:\s+(?P<scale>{_SCALE_WORD}))?)"
+    rf"|(?P<number>(?:(?P<digits>{_DIGITS})(?:\s+(?P<digits_scale>{_SCALE_WORD}))?|(?P<words>{_WORD_NUMBER})){_SUFFIX}))",
+    re.IGNORECASE,
+)
+
+_COMMA_THOUSANDS = re.compile(r"\d{1,3}(?:,\d{3}){2,}")
+_DOT_THOUSANDS = re.compile(r"\d{1,3}(?:\.\d{3})+")
+_WORD_SEPARATOR = re.compile(r"\s+(?:e\s+)?")
+
+# Separator of the texts joined by the batch API, matched by no part of the pattern
+_BATCH_SEPARATOR = "\x00"
+
+def parse_number(digits: str) -> float:
+    """
+    Parse a number written with digits, in Brazilian ("1.234,56") or English ("1,234.56") notation.
+
+    With both separators, the last one is the decimal separator. A single comma is decimal. Dots are
+    thousands separators when they group exactly three digits ("1.500"), decimal otherwise ("10.50").
+
+    Raises:
+        ValueError: If the digits are not a number, e.g. a version like "1.2.3".
+    """
+    if "," in digits and "." in digits:
+        decimal = "," if digits.rfind(",") > digits.rfind(".") else "."
+        thousands = "." if decimal == "," else ","
+        return float(digits.replace(thousands, "").replace(decimal, "."))
+    if "," in digits:
+        if _COMMA_THOUSANDS.fullmatch(digits):
+            return float(digits.replace(",", ""))
+        return float(digits.replace(",", "."))
+    if _DOT_THOUSANDS.fullmatch(digits):
+        return float(digits.replace(".", ""))
+    return float(digits)
+
+def parse_number_words(words: str) -> float:
+    """Parse a Portuguese number written with words, e.g. "trezentos e cinco" or "dois mil e quinhentos"."""
+    total = current = 0
+    for word in _WORD_SEPARATOR.split(_fold(words.strip())):
+        if word in NUMBER_WORDS:
+            current += NUMBER_WORDS[word]
+        elif word in SCALE_WORDS:
+            scale = SCALE_WORDS[word]
+            if scale == 1_000:
+                current = max(current, 1) * scale
+            else:
+                total += max(current, 1) * scale
+                current = 0
+    return float(total + current)
+
+def _date_entity(match) -> Optional[dict]:
+    try:
+        if match.group("day"):
+            year = int(match.group("dyear"))
+            year += 2000 if year < 100 else 0
+            day = date(year, int(match.group("dmonth")), int(match.group("day")))
+        elif match.group("iyear"):
+            day = date(int(match.group("iyear")), int(match.group("imonth")), int(match.group("iday")))
+        else:
+            month = MONTHS[_fold(match.group("month_name"))]
+            if not match.group("wyear"):
+                date(2000, month, int(match.group("wday")))  # Validates the day, 2000 being a leap year
+                return {"value": f"--{month:02d}-{int(match.group('wday')):02d}", "type": "DATE"}
+            day = date(int(match.group("wyear")), month, int(match.group("wday")))
+        if match.group("hour") is None:
+            return {"value": day.isoformat(), "type": "DATE"}
+        minute = match.group("minute") or match.group("hminute") or 0
+        moment = datetime(day.year, day.month, day.day, int(match.group("hour")), int(minute))
+        return {"value": moment.isoformat(timespec="minutes"), "type": "DATE_TIME"}
+    except ValueError:
+        return None
+
+def _entity(match) -> Optional[dict]:
+    kind = match.lastgroup
+    if kind == "email":
+        return {"value": match.group(), "type": "EMAIL"}
+    if kind == "url":
+        return {"value": match.group(), "type": "URL"}
+    if kind == "date":
+        return _date_entity(match)
+
+    if kind == "money":
+        value = parse_number(match.group("money_number"))
+        if match.group("scale"):
+            value *= SCALE_WORDS[_fold(match.group("scale"))]
+        unit, symbol = CURRENCY_SYMBOLS[match.group("symbol").upper()]
+        return {"value": value, "type": "MONEY", "unit": unit, "symbol": symbol}
+
+    if match.group("digits"):
+        try:
+            value = parse_number(match.group("digits"))
+        except ValueError:
+            return None  # Not a number, e.g. a version like "1.2.3"
+        if match.group("digits_scale"):
+            value *= SCALE_WORDS[_fold(match.group("digits_scale"))]
+    else:
+        value = parse_number_words(match.group("words"))
+    suffix = match.group("currency") or match.group("unit")
+    if suffix is None:
+        # "um" and "uma" alone are almost always articles, not numbers
+        if match.group("words") and _fold(match.group("words")) in ("um", "uma"):
+            return None
+        return {"value": value, "type": "NUMBER"}
+
+    suffix = _fold(suffix)
+    if suffix in CURRENCY_WORDS:
+        unit, symbol, factor = CURRENCY_WORDS[suffix]
+        value *= factor
+        cents = match.group("cents")
+        if cents:
+            value += (float(cents) if cents.isdigit() else parse_number_words(cents)) / 100
+        return {"value": round(value, 2), "type": "MONEY", "unit": unit, "symbol": symbol}
+    return {"value": value, "type": "MEASURE", "unit": UNIT_WORDS[suffix]}
+
+def _scan(text: str, types: Optional[set]) -> Iterable[dict]:
+    for match in COMBINED_PATTERN.finditer(text):
+        entity = _entity(match)
+        if entity is None or (types and entity["type"] not in types):
+            continue
+        entity["source"] = match.group()
+        entity["start"] = match.start()
+        entity["end"] = match.end()
+        yield entity
+
+def extract_numeric_values(text: str, types: Optional[List[str]] = None) -> List[dict]:
+    """
+    Extract numbers, money, measures, dates, emails and URLs from a text with rules, without Spacy or an LLM.
+
+    The text is scanned once with a single precompiled pattern. Numbers are read from digits (Brazilian or
+    English notation) or Portuguese words ("vinte e cinco"), currencies from symbols (R$, US$, $, €) or words
+    ("reais", "dólares", "centavos") and units are normalized to their symbol ("metros" -> "m", "gramas" -> "g").
+
+    Args:
+        text (str): The input text.
+        types (List[str], optional): Entity types to return, among RULE_ENTITY_TYPES. All of them when empty.
+
+    Returns:
+        List[dict]: The extracted entities in text order, each represented as a dictionary with:
+            - "value" (float or str): The number, amount or measure as a float; the date in ISO format; the email or URL.
+            - "type" (str): NUMBER, MONEY, MEASURE, DATE, DATE_TIME, EMAIL or URL.
+            - "unit" (str, MONEY and MEASURE only): Currency code or normalized unit symbol.
+            - "symbol" (str, MONEY only): Currency symbol.
+            - "source" (str): The matched text.
+            - "start" and "end" (int): Character offsets of the match.
+
+    Example:
+        >>> extract_numeric_values("Ela pagou vinte e cinco reais e cinquenta centavos.")
+        [{'value': 25.5, 'type': 'MONEY', 'unit': 'BRL', 'symbol': 'R$', 'source': 'vinte e cinco reais e cinquenta centavos', 'start': 10, 'end': 50}]
+    """
+    return list(_scan(text, {t.upper() for t in types} if types else None))
+
+def extract_numeric_values_batch(texts: List[str], types: Optional[List[str]] = None) -> List[List[dict]]:
+    """
+    Extract entities like `extract_numeric_values` from many texts with a single scan.
+
+    The texts are joined with a separator no pattern can match across, scanned at once and the matches are
+    split back by text, with offsets relative to their own text.
+
+    Returns:
+        List[List[dict]]: One list of extracted entities per input text, in input order.
+    """
+    starts = []
+    position = 0
+    for text in texts:
+        starts.append(position)
+        position += len(text) + len(_BATCH_SEPARATOR)
+
+    results = [[] for _ in texts]
+    for entity in _scan(_BATCH_SEPARATOR.join(texts), {t.upper() for t in types} if types else None):
+        index = bisect_right(starts, entity["start"]) - 1
+        entity["start"] -= starts[index]
+        entity["end"] -= starts[index]
+        results[index].append(entity)
+    return results
@@ -0,0 +1,96 @@
+import os
+import re
+from typing import List, Tuple
+
+from app.mycrews.helper.metrics import ner_paragraphs_total
+from app.mycrews.helper.result_cache import ResultCache, cache_key
+from app.mycrews.helper.spacy_entity_recognizer import ACCEPTED_TYPES, SPACY_CHUNK_SIZE, nlp, spacy_cache_params, spacy_entity_recognizer_batch, spacy_entity_recognizer_chunked
+
+# Incremental recognition: paragraphs whose entities are kept in memory (the disk tier is RESULT_CACHE_DISK_PATH,
+# shared by every worker on the host)
+NER_PARAGRAPH_CACHE_MAX_ENTRIES = int(os.getenv("NER_PARAGRAPH_CACHE_MAX_ENTRIES", "100000"))
+
+# Paragraphs are separated by at least one blank line
+PARAGRAPH_BREAK = re.compile(r"\n[^\S\n]*\n\s*")
+
+# Entities of every type of each paragraph, with offsets relative to the paragraph, by paragraph text, language and model
+# (see spacy_cache_params)
+paragraph_cache = ResultCache(max_entries=NER_PARAGRAPH_CACHE_MAX_ENTRIES)
+
+def split_paragraphs(text: str) -> List[Tuple[int, int]]:
+    """Start and end offsets of the paragraphs of a text, without the blank lines between them."""
+    spans, start = [], 0
+    for match in PARAGRAPH_BREAK.finditer(text):
+        if match.start() > start:
+            spans.append((start, match.start()))
+        start = match.end()
+    if start < len(text):
+        spans.append((start, len(text)))
+    return spans
+
+def spacy_entity_recognizer_incremental(text: str, lang: str = "pt", types: List[str] = [], cache: ResultCache = paragraph_cache,
+                                        read_cache: bool = True, write_cache: bool = True) -> Tuple[List[dict], dict]:
+    """
+    Extract named entities like `spacy_entity_recognizer`, reusing the entities of paragraphs already recognized.
+
+    The text is split into paragraphs, and the entities of each paragraph are cached by the hash of its text, so
+    a document sent again after a few edits only runs its new or changed paragraphs through SpaCy (in one batch),
+    whatever moved around them. Cached entities get their offsets rebased to the position of their paragraph in
+    the new text. Paragraphs are cached with entities of every type, filtered afterwards, so requests for other
+    types reuse them too. Paragraphs are recognized on their own, so an entity spanning a blank line is not found.
+
+    Args:
+        text (str): The input text.
+        lang (str, optional): The language model to use. Defaults to "pt" (Portuguese).
+        types (List[str], optional): A list of entity types to filter results, as in `spacy_entity_recognizer`.
+        cache (ResultCache, optional): Cache of the paragraph entities.
+        read_cache, write_cache (bool, optional): Whether cached paragraphs are reused, and recognized ones stored.
+
+    Returns:
+        Tuple[List[dict], dict]: The extracted entities in text order, and how much was reused:
+            - "paragraphs" (int): Paragraphs of the text.
+            - "reused_paragraphs" (int): Paragraphs whose entities came from the cache or an identical paragraph.
+            - "recognized_paragraphs" (int): Paragraphs run through SpaCy.
+            - "characters" and "recognized_characters" (int): Size of the text, and of the paragraphs run through SpaCy.
+
+    Raises:
+        ValueError: If the specified language model is not available.
+    """
+    if lang not in nlp:
+        raise ValueError(f"Language model '{lang}' not available. Available options: {list(nlp.keys())}")
+
+    spans = split_paragraphs(text)
+    keys = [cache_key("ner/paragraph", text[start:end], normalize=False, lang=lang, **spacy_cache_params(lang)) for start, end in spans]
+    wanted = ACCEPTED_TYPES & {entity_type.upper() for entity_type in types} if any(types) else ACCEPTED_TYPES
+
+    found = {}
+    if read_cache:
+        for key in set(keys):
+            entities = cache.get(key)
+            if entities is not None:
+                found[key] = entities
+
+    # Each changed paragraph is recognized once, even when the text repeats it
+    missing = {}
+    for key, (start, end) in zip(keys, spans):
+        if key not in found and key not in missing:
+            missing[key] = text[start:end]
+    small = [key for key, paragraph in missing.items() if len(paragraph) <= SPACY_CHUNK_SIZE]
+    documents = [{"text": missing[key], "lang": lang, "types": []} for key in small]
+    found.update(zip(small, spacy_entity_recognizer_batch(documents)))
+    for key in missing.keys() - set(small):
+        found[key] = list(spacy_entity_recognizer_chunked(missing[key], lang))
+    if write_cache:
+        for key in missing:
+            cache.set(key, found[key])
+
+    entities = []
+    for key, (start, _) in zip(keys, spans):
+        for entity in found[key]:
+            if entity["type"] in wanted:
+                entities.append({**entity, "start": entity["start"] + start, "end": entity["end"] + start})
+
+    ner_paragraphs_total.inc(len(spans) - len(missing), outcome="reused")
+    ner_paragraphs_total.inc(len(missing), outcome="recognized")
+    return entities, {"paragraphs": len(spans), "reused_paragraphs": len(spans) - len(missing), "recognized_paragraphs": len(missing),
+                      "characters": len(text), "recognized_characters": sum(len(paragraph) for paragraph in missing.values())}
@@ -0,0 +1,309 @@
+import asyncio
+import importlib
+import inspect
+import json
+import logging
+import multiprocessing
+import os
+import signal
+import socket
+import sqlite3
+import threading
+import time
+import uuid
+from typing import Any, Callable, Dict, List, Optional
+
+from app.mycrews.helper.structured_logging import setup_logging, task_id_var
+
+logger = logging.getLogger(__name__)
+
+# Job queue settings. Jobs run in worker processes grouped in lanes, so cheap Spacy jobs ("fast")
+# never wait behind long LLM crews ("llm"). Each lane has its own worker count and job timeout.
+JOB_QUEUE_ENABLED = os.getenv("JOB_QUEUE_ENABLED", "0") == "1"
+JOB_QUEUE_PATH = os.getenv("JOB_QUEUE_PATH", "job_queue.sqlite3")
+JOB_WORKERS_FAST = int(os.getenv("JOB_WORKERS_FAST", "1"))
+JOB_WORKERS_LLM = int(os.getenv("JOB_WORKERS_LLM", "2"))
+JOB_TIMEOUT_FAST_SECONDS = float(os.getenv("JOB_TIMEOUT_FAST_SECONDS", "60"))
+JOB_TIMEOUT_LLM_SECONDS = float(os.getenv("JOB_TIMEOUT_LLM_SECONDS", "900"))
+JOB_MAX_ATTEMPTS = int(os.getenv("JOB_MAX_ATTEMPTS", "3"))
+JOB_RETRY_BACKOFF_SECONDS = float(os.getenv("JOB_RETRY_BACKOFF_SECONDS", "2"))
+JOB_POLL_INTERVAL_SECONDS = float(os.getenv("JOB_POLL_INTERVAL_SECONDS", "0.2"))
+JOB_SHUTDOWN_GRACE_SECONDS = float(os.getenv("JOB_SHUTDOWN_GRACE_SECONDS", "10"))
+
+# Lanes and their defaults
+LANES = {
+    "fast": {"workers": JOB_WORKERS_FAST, "timeout": JOB_TIMEOUT_FAST_SECONDS},
+    "llm": {"workers": JOB_WORKERS_LLM, "timeout": JOB_TIMEOUT_LLM_SECONDS},
+}
+
+class JobTimeoutError(Exception):
+    """Raised inside a worker when a job runs longer than its timeout."""
+
+def handler_path(func: Callable) -> str:
+    """Dotted path ("module:function") a worker process uses to import a job handler."""
+    return f"{func.__module__}:{func.__qualname__}"
+
+def _import_handler(path: str) -> Callable:
+    module_name, _, attribute = path.partition(":")
+    handler = importlib.import_module(module_name)
+    for name in attribute.split("."):
+        handler = getattr(handler, name)
+    return handler
+
+class JobQueue:
+    """
+    Durable job queue stored in a local SQLite database.
+
+    A job is a handler path and its JSON arguments. Jobs survive restarts: queued jobs stay in the
+    database, and jobs left running by a worker that died are queued again when a pool starts.
+    Failed jobs are retried with exponential backoff until `max_attempts` is reached.
+
+    Args:
+        path (str, optional): Path of the database file, shared by the API and the worker processes.
+    """
+
+    def __init__(self, path: str = JOB_QUEUE_PATH):
+        self.path = path
+        self._local = threading.local()
+        self._connection().execute(
+            "CREATE TABLE IF NOT EXISTS jobs ("
+            " job_id TEXT PRIMARY KEY,"
+            " lane TEXT NOT NULL,"
+            " handler TEXT NOT NULL,"
+            " args TEXT NOT NULL,"
+            " status TEXT NOT NULL,"
+            " attempts INTEGER NOT NULL DEFAULT 0,"
+            " max_attempts INTEGER NOT NULL,"
+            " timeout REAL NOT NULL,"
+            " error TEXT,"
+            " enqueued_at REAL NOT NULL,"
+            " available_at REAL NOT NULL,"
+            " started_at REAL,"
+            " finished_at REAL,"
+            " claimed_by TEXT)"
+        )
+        self._connection().execute("CREATE INDEX IF NOT EXISTS jobs_lane_status ON jobs (lane, status, available_at)")
+
+    def _connection(self) -> sqlite3.Connection:
+        connection = getattr(self._local, "connection", None)
+        if connection is None or self._local.pid != os.getpid():
+            connection = sqlite3.connect(self.path, timeout=30, isolation_level=None, check_same_thread=False)
+            connection.execute("PRAGMA journal_mode=WAL")
+            connection.execute("PRAGMA synchronous=NORMAL")
+            self._local.connection = connection
+            self._local.pid = os.getpid()
+        return connection
+
+    def enqueue(self, handler: Callable, args: List[Any], lane: str = "llm", job_id: Optional[str] = None,
+                timeout: Optional[float] = None, max_attempts: int = JOB_MAX_ATTEMPTS) -> str:
+        """
+        Queue a call to `handler(*args)` in a lane, returning the job id.
+
+        Raises:
+            ValueError: If the lane is unknown.
+        """
+        if lane not in LANES:
+            raise ValueError(f"Unknown job lane '{lane}'. Available options: {list(LANES.keys())}")
+        job_id = job_id or str(uuid.uuid4())
+        now = time.time()
+        self._connection().execute(
+            "INSERT INTO jobs (job_id, lane, handler, args, status, max_attempts, timeout, enqueued_at, available_at)"
+            " VALUES (?, ?, ?, ?, 'queued', ?, ?, ?, ?)",
+            (job_id, lane, handler_path(handler), json.dumps(args), max_attempts, timeout or LANES[lane]["timeout"], now, now),
+        )
+        return job_id
+
+    def claim(self, lane: str) -> Optional[dict]:
+        """Mark the next available job of a lane as running and return it, or None when the lane is empty."""
+        connection = self._connection()
+        connection.execute("BEGIN IMMEDIATE")
+        try:
+            row = connection.execute(
+                "UPDATE jobs SET status = 'running', attempts = attempts + 1, started_at = ?, claimed_by = ?"
+                " WHERE job_id = (SELECT job_id FROM jobs WHERE lane = ? AND status = 'queued' AND available_at <= ?"
+                " ORDER BY available_at LIMIT 1)"
+                " RETURNING job_id, handler, args, attempts, max_attempts, timeout",
+                (time.time(), _worker_id(), lane, time.time()),
+            ).fetchone()
+            connection.execute("COMMIT")
+        except BaseException:
+            connection.execute("ROLLBACK")
+            raise
+        if row is None:
+            return None
+        job_id, handler, args, attempts, max_attempts, timeout = row
+        return {"job_id": job_id, "handler": handler, "args": json.loads(args), "attempts": attempts,
+                "max_attempts": max_attempts, "timeout": timeout}
+
+    def complete(self, job_id: str):
+        self._connection().execute(
+            "UPDATE jobs SET status = 'completed', error = NULL, finished_at = ? WHERE job_id = ?", (time.time(), job_id)
+        )
+
+    def fail(self, job: dict, error: str) -> bool:
+        """Record a failed attempt. Returns True when the job was queued again for a retry."""
+        now = time.time()
+        if job["attempts"] < job["max_attempts"]:
+            delay = JOB_RETRY_BACKOFF_SECONDS * 2 ** (job["attempts"] - 1)
+            self._connection().execute(
+                "UPDATE jobs SET status = 'queued', error = ?, available_at = ? WHERE job_id = ?", (error, now + delay, job["job_id"])
+            )
+            return True
+        self._connection().execute(
+            "UPDATE jobs SET status = 'failed', error = ?, finished_at = ? WHERE job_id = ?", (error, now, job["job_id"])
+        )
+        return False
+
+    def requeue_stale(self) -> int:
+        """
+        Queue again running jobs whose worker died: workers of this host that no longer exist, or any
+        job past its timeout plus the shutdown grace period.
+        """
+        connection = self._connection()
+        now = time.time()
+        host = socket.gethostname()
+        stale = [job_id for job_id, claimed_by, started_at, timeout in connection.execute(
+                     "SELECT job_id, claimed_by, started_at, timeout FROM jobs WHERE status = 'running'")
+                 if started_at + timeout + JOB_SHUTDOWN_GRACE_SECONDS < now
+                 or (claimed_by or "").rpartition(":")[0] == host and not _pid_alive(int(claimed_by.rpartition(":")[2]))]
+        for job_id in stale:
+            connection.execute("UPDATE jobs SET status = 'queued', available_at = ? WHERE job_id = ? AND status = 'running'", (now, job_id))
+        return len(stale)
+
+    def stats(self, window_seconds: float = 300) -> Dict[str, dict]:
+        """
+        Queue depth, running jobs, and mean/max wait and run times of the jobs finished in the last window, by lane.
+        """
+        connection = self._connection()
+        now = time.time()
+        result = {lane: {"queued": 0, "running": 0, "finished": 0, "failed": 0, "wait_mean_s": None, "wait_max_s": None,
+                         "run_mean_s": None, "run_max_s": None} for lane in LANES}
+        for lane, status, count in connection.execute("SELECT lane, status, COUNT(*) FROM jobs WHERE status IN ('queued', 'running') GROUP BY lane, status"):
+            result.setdefault(lane, {})[status] = count
+        for lane, finished, failed, wait_mean, wait_max, run_mean, run_max in connection.execute(
+            "SELECT lane, COUNT(*), SUM(status = 'failed'), AVG(started_at - enqueued_at), MAX(started_at - enqueued_at),"
+            " AVG(finished_at - started_at), MAX(finished_at - started_at)"
+            " FROM jobs WHERE status IN ('completed', 'failed') AND finished_at >= ? GROUP BY lane",
+            (now - window_seconds,),
+        ):
+            result[lane].update({"finished": finished, "failed": failed, "wait_mean_s": wait_mean, "wait_max_s": wait_max,
+                                 "run_mean_s": run_mean, "run_max_s": run_max})
+        return result
+
+    def purge_finished(self, older_than_seconds: float) -> int:
+        return self._connection().execute(
+            "DELETE FROM jobs WHERE status IN ('completed', 'failed') AND finished_at < ?", (time.time() - older_than_seconds,)
+        ).rowcount
+
+def _worker_id() -> str:
+    return f"{socket.gethostname()}:{os.getpid()}"
+
+def _pid_alive(pid: int) -> bool:
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        pass
+    return True
+
+# Set in worker processes: handlers re-raise their errors there, so the queue retries the job
+_in_job_worker = False
+
+def in_job_worker() -> bool:
+    """Whether this process is a job queue worker, where failed handlers must raise instead of storing the failure."""
+    return _in_job_worker
+
+def _raise_timeout(signum, frame):
+    raise JobTimeoutError("Job exceeded its timeout")
+
+def worker_main(path: str, lane: str, stop):
+    """
+    Loop of a worker process: claim a job of its lane, run it under a timeout and record the outcome.
+
+    Handlers are imported by the worker itself, so every crew they use is built and owned by the worker.
+    Coroutine handlers run on an event loop kept for the life of the worker, so async clients can reuse
+    their connections between jobs. When a job fails for the last time its task is marked as failed in
+    the task store.
+    """
+    global _in_job_worker
+    from app.mycrews.helper.task_store import create_task_store
+
+    # The API process handles Ctrl+C and asks workers to stop through the stop event
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    signal.signal(signal.SIGALRM, _raise_timeout)
+    setup_logging()
+    _in_job_worker = True
+    queue = JobQueue(path)
+    task_storage = create_task_store()
+    loop = asyncio.new_event_loop()
+
+    while not stop.is_set():
+        job = queue.claim(lane)
+        if job is None:
+            stop.wait(JOB_POLL_INTERVAL_SECONDS)
+            continue
+
+        # Records logged while the job runs carry its task id
+        task_id_var.set(job["job_id"])
+        try:
+            handler = _import_handler(job["handler"])
+            if inspect.iscoroutinefunction(handler):
+                try:
+                    loop.run_until_complete(asyncio.wait_for(handler(*job["args"]), job["timeout"]))
+                except asyncio.TimeoutError:
+                    raise JobTimeoutError("Job exceeded its timeout")
+            else:
+                signal.setitimer(signal.ITIMER_REAL, job["timeout"])
+                handler(*job["args"])
+                signal.setitimer(signal.ITIMER_REAL, 0)
+            queue.complete(job["job_id"])
+        except BaseException as e:
+            signal.setitimer(signal.ITIMER_REAL, 0)
+            error = f"{type(e).__name__}: {str(e)}"
+            logger.exception("Job attempt %s/%s failed: %s", job["attempts"], job["max_attempts"], error)
+            if not queue.fail(job, error):
+                task_storage[job["job_id"]] = {"status": "failed", "result": error}
+
+class JobWorkerPool:
+    """
+    Worker processes consuming the job queue, started with `spawn` so each one builds its own crews.
+
+    Args:
+        path (str, optional): Path of the job queue database.
+        workers (Dict[str, int], optional): Number of worker processes by lane.
+    """
+
+    def __init__(self, path: str = JOB_QUEUE_PATH, workers: Optional[Dict[str, int]] = None):
+        self.path = path
+        self.workers = workers or {lane: settings["workers"] for lane, settings in LANES.items()}
+        self._context = multiprocessing.get_context("spawn")
+        self._stop = self._context.Event()
+        self._processes = []
+
+    def start(self):
+        JobQueue(self.path).requeue_stale()
+        for lane, count in self.workers.items():
+            for index in range(count):
+                process = self._context.Process(target=worker_main, args=(self.path, lane, self._stop),
+                                                name=f"job-worker-{lane}-{index}", daemon=True)
+                process.start()
+                self._processes.append(process)
+
+    def stop(self, grace_seconds: float = JOB_SHUTDOWN_GRACE_SECONDS):
+        """Ask workers to stop after their current job; jobs still running after the grace period are killed."""
+        self._stop.set()
+        deadline = time.time() + grace_seconds
+        for process in self._processes:
+            process.join(max(0, deadline - time.time()))
+            if process.is_alive():
+                process.terminate()
+        self._processes = []
+
+    def alive(self) -> Dict[str, int]:
+        """Number of live worker processes by lane."""
+        counts = {lane: 0 for lane in self.workers}
+        for process in self._processes:
+            if process.is_alive():
+                counts[process.name.split("-")[2]] += 1
+        return counts
@@ -0,0 +1,66 @@
+import asyncio
+import logging
+import threading
+import time
+from typing import Any, Callable, Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+class LazySubsystem:
+    """
+    A part of the API (crews, OpenAI client, Spacy models) imported and built on first use instead of when the
+    API module is imported, so a worker only pays for the routes it serves.
+
+    `get()` builds it once, even when called from several threads at the same time. From the event loop, use
+    `aget()`, which builds it in a thread so the first request does not block the other ones.
+
+    Args:
+        name (str): Name of the subsystem, as given to APP_WARMUP.
+        build (Callable[[], Any]): Imports what the subsystem needs and returns it.
+    """
+
+    def __init__(self, name: str, build: Callable[[], Any]):
+        self.name = name
+        self._build = build
+        self._value = None
+        self._loaded = False
+        self._lock = threading.Lock()
+
+    @property
+    def loaded(self) -> bool:
+        return self._loaded
+
+    def get(self) -> Any:
+        if self._loaded:
+            return self._value
+        with self._lock:
+            if not self._loaded:
+                start = time.perf_counter()
+                self._value = self._build()
+                self._loaded = True
+                logger.info("Subsystem %s loaded", self.name, extra={"fields": {"seconds": round(time.perf_counter() - start, 3)}})
+        return self._value
+
+    async def aget(self) -> Any:
+        if self._loaded:
+            return self._value
+        return await asyncio.to_thread(self.get)
+
+    def if_loaded(self) -> Optional[Any]:
+        """The subsystem when it is already built, None otherwise (never builds it)."""
+        return self._value if self._loaded else None
+
+def parse_warmup(value: str, subsystems: Dict[str, LazySubsystem]) -> List[LazySubsystem]:
+    """
+    Subsystems named in a comma-separated list, e.g. "spacy,crews", or all of them for "all".
+
+    Raises:
+        ValueError: If a name is not a subsystem.
+    """
+    names = [name.strip() for name in value.split(",") if name.strip()]
+    if "all" in names:
+        return list(subsystems.values())
+    unknown = [name for name in names if name not in subsystems]
+    if unknown:
+        raise ValueError(f"Unknown subsystems {unknown} in warmup. Available options: {list(subsystems)} or all")
+    return [subsystems[name] for name in names]
@@ -0,0 +1,176 @@
+import asyncio
+import logging
+import os
+import random
+import time
+from typing import List, Optional
+
+import httpx
+from openai import APIConnectionError, APITimeoutError, AsyncOpenAI, InternalServerError, RateLimitError
+
+from app.mycrews.helper.metrics import llm_request_seconds, llm_tokens_total
+
+logger = logging.getLogger(__name__)
+
+# HTTP connection pool, timeouts, concurrency and retry settings of the OpenAI client
+OPENAI_MAX_CONNECTIONS = int(os.getenv("OPENAI_MAX_CONNECTIONS", "100"))
+OPENAI_MAX_KEEPALIVE_CONNECTIONS = int(os.getenv("OPENAI_MAX_KEEPALIVE_CONNECTIONS", "20"))
+OPENAI_TIMEOUT_SECONDS = float(os.getenv("OPENAI_TIMEOUT_SECONDS", "120"))
+OPENAI_CONNECT_TIMEOUT_SECONDS = float(os.getenv("OPENAI_CONNECT_TIMEOUT_SECONDS", "5"))
+OPENAI_MAX_CONCURRENCY = int(os.getenv("OPENAI_MAX_CONCURRENCY", "32"))
+OPENAI_MAX_RETRIES = int(os.getenv("OPENAI_MAX_RETRIES", "5"))
+OPENAI_RETRY_BACKOFF_SECONDS = float(os.getenv("OPENAI_RETRY_BACKOFF_SECONDS", "0.5"))
+OPENAI_RETRY_MAX_DELAY_SECONDS = float(os.getenv("OPENAI_RETRY_MAX_DELAY_SECONDS", "30"))
+
+# Errors worth another attempt: rate limits, timeouts, dropped connections and 5xx responses
+RETRYABLE_ERRORS = (RateLimitError, APITimeoutError, APIConnectionError, InternalServerError)
+
+def _retry_delay(error: Exception, attempt: int) -> float:
+    """Delay before the next attempt: the server's Retry-After when given, otherwise exponential backoff with jitter."""
+    response = getattr(error, "response", None)
+    if response is not None:
+        retry_after_ms = response.headers.get("retry-after-ms")
+        retry_after = response.headers.get("retry-after")
+        try:
+            if retry_after_ms is not None:
+                return min(float(retry_after_ms) / 1000, OPENAI_RETRY_MAX_DELAY_SECONDS)
+            if retry_after is not None:
+                return min(float(retry_after), OPENAI_RETRY_MAX_DELAY_SECONDS)
+        except ValueError:
+            pass
+    delay = OPENAI_RETRY_BACKOFF_SECONDS * 2 ** attempt
+    return min(delay + random.uniform(0, delay / 2), OPENAI_RETRY_MAX_DELAY_SECONDS)
+
+def _record(model: str, start: float, outcome: str, usage: Optional[dict] = None):
+    # Latency of one attempt and tokens of a successful call, see /metrics
+    llm_request_seconds.observe(time.perf_counter() - start, model=model, outcome=outcome)
+    for kind in ("prompt_tokens", "completion_tokens"):
+        if usage and usage.get(kind):
+            llm_tokens_total.inc(usage[kind], model=model, kind=kind.split("_")[0])
+
+class AsyncLLMClient:
+    """
+    Async OpenAI chat client with a shared connection pool, per-call timeouts, a global concurrency limit
+    and rate-limit-aware retries.
+
+    Connections are reused through one `httpx.AsyncClient` per event loop (an async HTTP client cannot be
+    shared between loops, e.g. between the API and a job worker). At most `max_concurrency` calls are in
+    flight per loop; extra calls wait for a slot instead of opening more connections.
+
+    Args:
+        api_key (str): OpenAI API key.
+        base_url (str, optional): API base URL. Defaults to OPENAI_BASE_URL or the OpenAI API.
+        max_concurrency (int, optional): Calls in flight at the same time.
+        max_retries (int, optional): Retries of a call after a retryable error.
+    """
+
+    def __init__(self, api_key: str, base_url: Optional[str] = None, max_concurrency: int = OPENAI_MAX_CONCURRENCY,
+                 max_retries: int = OPENAI_MAX_RETRIES):
+        self.api_key = api_key
+        self.base_url = base_url
+        self.max_concurrency = max_concurrency
+        self.max_retries = max_retries
+        self._loops = {}  # event loop -> (AsyncOpenAI client, semaphore)
+
+    def _for_loop(self):
+        loop = asyncio.get_running_loop()
+        if loop not in self._loops:
+            # Forget clients of closed loops, their connections are gone with them
+            self._loops = {other: entry for other, entry in self._loops.items() if not other.is_closed()}
+            http_client = httpx.AsyncClient(
+                limits=httpx.Limits(max_connections=OPENAI_MAX_CONNECTIONS, max_keepalive_connections=OPENAI_MAX_KEEPALIVE_CONNECTIONS),
+                timeout=httpx.Timeout(OPENAI_TIMEOUT_SECONDS, connect=OPENAI_CONNECT_TIMEOUT_SECONDS),
+            )
+            # Retries are handled here, so they also wait for a concurrency slot
+            client = AsyncOpenAI(api_key=self.api_key, base_url=self.base_url, http_client=http_client, max_retries=0)
+            self._loops[loop] = (client, asyncio.Semaphore(self.max_concurrency))
+        return self._loops[loop]
+
+    async def complete(self, messages: List[dict], model: str, timeout: Optional[float] = None, **kwargs) -> str:
+        """
+        Run a chat completion and return the content of the first choice.
+
+        Args:
+            messages (List[dict]): Chat messages.
+            model (str): Model name.
+            timeout (float, optional): Timeout of each attempt in seconds. Defaults to OPENAI_TIMEOUT_SECONDS.
+        """
+        completion = await self.create(messages, model, timeout, **kwargs)
+        return completion.choices[0].message.content.strip()
+
+    async def create(self, messages: List[dict], model: str, timeout: Optional[float] = None, **kwargs):
+        """Run a chat completion with retries and return the raw completion object."""
+        client, semaphore = self._for_loop()
+        attempt = 0
+        while True:
+            async with semaphore:
+                start = time.perf_counter()
+                try:
+                    completion = await client.chat.completions.create(messages=messages, model=model, timeout=timeout or OPENAI_TIMEOUT_SECONDS, **kwargs)
+                except RETRYABLE_ERRORS as e:
+                    if attempt >= self.max_retries:
+                        _record(model, start, "error")
+                        raise
+                    _record(model, start, "retry")
+                    delay = _retry_delay(e, attempt)
+                    logger.warning("OpenAI call to %s failed (%s), retry %s in %.2fs", model, type(e).__name__, attempt + 1, delay)
+                except Exception:
+                    _record(model, start, "error")
+                    raise
+                else:
+                    _record(model, start, "ok", completion.usage.model_dump() if completion.usage else None)
+                    return completion
+            # Back off outside of the semaphore so waiting calls can use the slot meanwhile
+            attempt += 1
+            await asyncio.sleep(delay)
+
+    async def stream(self, messages: List[dict], model: str, timeout: Optional[float] = None, usage: Optional[dict] = None, **kwargs):
+        """
+        Run a streamed chat completion and yield its text deltas as they arrive.
+
+        The call keeps its concurrency slot until the stream ends. Retryable errors are only retried
+        before the first delta, since the caller may already have forwarded partial text.
+
+        Args:
+            usage (dict, optional): Filled with the token usage reported at the end of the stream.
+        """
+        client, semaphore = self._for_loop()
+        attempt = 0
+        started = False
+        while True:
+            async with semaphore:
+                start = time.perf_counter()
+                call_usage = {}
+                try:
+                    chunks = await client.chat.completions.create(
+                        messages=messages, model=model, timeout=timeout or OPENAI_TIMEOUT_SECONDS, stream=True,
+                        stream_options={"include_usage": True}, **kwargs,
+                    )
+                    async for chunk in chunks:
+                        if chunk.usage is not None:
+                            call_usage = chunk.usage.model_dump()
+                            if usage is not None:
+                                usage.update(call_usage)
+                        if chunk.choices and chunk.choices[0].delta.content:
+                            started = True
+                            yield chunk.choices[0].delta.content
+                    _record(model, start, "ok", call_usage)
+                    return
+                except RETRYABLE_ERRORS as e:
+                    if started or attempt >= self.max_retries:
+                        _record(model, start, "error")
+                        raise
+                    _record(model, start, "retry")
+                    delay = _retry_delay(e, attempt)
+                    logger.warning("OpenAI call to %s failed (%s), retry %s in %.2fs", model, type(e).__name__, attempt + 1, delay)
+                except Exception:
+                    _record(model, start, "error")
+                    raise
+            attempt += 1
+            await asyncio.sleep(delay)
+
+    async def aclose(self):
+        """Close the connection pool of the current event loop."""
+        entry = self._loops.pop(asyncio.get_running_loop(), None)
+        if entry is not None:
+            await entry[0].close()
@@ -0,0 +1,240 @@
+import abc
+import bisect
+import os
+import threading
+import time
+from contextlib import contextmanager
+from typing import Callable, Dict, Iterator, List, Tuple
+
+# Metrics settings: global switch and bucket upper bounds (seconds) of the latency histograms
+METRICS_ENABLED = os.getenv("METRICS_ENABLED", "1") == "1"
+METRICS_LATENCY_BUCKETS = tuple(float(bound) for bound in os.getenv(
+    "METRICS_LATENCY_BUCKETS", "0.005,0.01,0.025,0.05,0.1,0.25,0.5,1,2.5,5,10,30,60,120").split(","))
+
+# Bucket upper bounds of token count histograms
+TOKEN_BUCKETS = (50, 100, 250, 500, 1000, 2500, 5000, 10000, 25000, 50000)
+
+# Bucket upper bounds of batch size histograms
+BATCH_SIZE_BUCKETS = (1, 2, 4, 8, 16, 32, 64, 128, 256)
+
+def _escape(value: str) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+def _labels(names: Tuple[str, ...], values: Tuple[str, ...], extra: str = "") -> str:
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+def _number(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) and not value.is_integer() else str(int(value))
+
+class Metric(abc.ABC):
+    """Base of the metric types: a name, a help text, label names and a lock guarding the values."""
+    kind = "untyped"
+
+    def __init__(self, name: str, documentation: str, labelnames: Tuple[str, ...] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self.enabled = True
+        self._lock = threading.Lock()
+
+    def _key(self, labels: dict) -> Tuple[str, ...]:
+        if set(labels) != set(self.labelnames):
+            raise ValueError(f"Metric '{self.name}' expects labels {list(self.labelnames)}, got {sorted(labels)}")
+        return tuple(str(labels[name]) for name in self.labelnames)
+
+    @abc.abstractmethod
+    def samples(self) -> List[str]:
+        ...
+
+    def render(self) -> str:
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.kind}"] + self.samples()
+        return "\n".join(lines)
+
+class Counter(Metric):
+    """Monotonic total, e.g. requests or tokens."""
+    kind = "counter"
+
+    def __init__(self, name: str, documentation: str, labelnames: Tuple[str, ...] = ()):
+        super().__init__(name, documentation, labelnames)
+        self._values: Dict[Tuple[str, ...], float] = {}
+
+    def inc(self, amount: float = 1, **labels):
+        if not self.enabled:
+            return
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def value(self, **labels) -> float:
+        return self._values.get(self._key(labels), 0)
+
+    def samples(self) -> List[str]:
+        with self._lock:
+            values = dict(self._values)
+        return [f"{self.name}{_labels(self.labelnames, key)} {_number(value)}" for key, value in sorted(values.items())]
+
+class Histogram(Metric):
+    """Distribution of observed values (latencies in seconds, token counts) in cumulative buckets."""
+    kind = "histogram"
+
+    def __init__(self, name: str, documentation: str, labelnames: Tuple[str, ...] = (), buckets: Tuple[float, ...] = METRICS_LATENCY_BUCKETS):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets))
+        self._values: Dict[Tuple[str, ...], list] = {}  # key -> [count per bucket (+Inf last), sum]
+
+    def observe(self, value: float, **labels):
+        if not self.enabled:
+            return
+        key = self._key(labels)
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            state = self._values.get(key)
+            if state is None:
+                state = self._values[key] = [[0] * (len(self.buckets) + 1), 0.0]
+            state[0][index] += 1
+            state[1] += value
+
+    @contextmanager
+    def time(self, **labels) -> Iterator[None]:
+        """Observe the seconds spent in the block, also when it raises."""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - start, **labels)
+
+    def count(self, **labels) -> int:
+        state = self._values.get(self._key(labels))
+        return sum(state[0]) if state else 0
+
+    def samples(self) -> List[str]:
+        with self._lock:
+            values = {key: (list(counts), total) for key, (counts, total) in self._values.items()}
+        lines = []
+        for key, (counts, total) in sorted(values.items()):
+            cumulative = 0
+            for bound, count in zip(self.buckets + (float("inf"),), counts):
+                cumulative += count
+                le = f'le="{_number(bound)}"'
+                lines.append(f"{self.name}_bucket{_labels(self.labelnames, key, le)} {cumulative}")
+            lines.append(f"{self.name}_sum{_labels(self.labelnames, key)} {_number(total)}")
+            lines.append(f"{self.name}_count{_labels(self.labelnames, key)} {cumulative}")
+        return lines
+
+class Gauge(Metric):
+    """
+    Current value read when metrics are collected, e.g. a queue depth or a store size.
+
+    `collect` returns a number, or a dict from label value tuples to numbers for labelled gauges.
+    """
+    kind = "gauge"
+
+    def __init__(self, name: str, documentation: str, collect: Callable[[], object], labelnames: Tuple[str, ...] = ()):
+        super().__init__(name, documentation, labelnames)
+        self.collect = collect
+
+    def samples(self) -> List[str]:
+        values = self.collect()
+        if not isinstance(values, dict):
+            values = {(): values}
+        return [f"{self.name}{_labels(self.labelnames, key)} {_number(value)}" for key, value in sorted(values.items()) if value is not None]
+
+class MetricsRegistry:
+    """
+    Metrics of the process, rendered in the Prometheus text exposition format by `render`.
+
+    Metrics are registered once by name; registering an existing name returns the existing metric, so modules
+    can declare the metrics they record without caring about import order. With `enabled` False, nothing is
+    recorded and `render` returns an empty page.
+    """
+
+    def __init__(self, enabled: bool = METRICS_ENABLED):
+        self.enabled = enabled
+        self._metrics: Dict[str, Metric] = {}
+        self._lock = threading.Lock()
+
+    def _register(self, metric: Metric) -> Metric:
+        with self._lock:
+            existing = self._metrics.get(metric.name)
+            if existing is not None:
+                if type(existing) is not type(metric) or existing.labelnames != metric.labelnames:
+                    raise ValueError(f"Metric '{metric.name}' is already registered with another type or labels")
+                return existing
+            metric.enabled = self.enabled
+            self._metrics[metric.name] = metric
+            return metric
+
+    def counter(self, name: str, documentation: str, labelnames: Tuple[str, ...] = ()) -> Counter:
+        return self._register(Counter(name, documentation, labelnames))
+
+    def histogram(self, name: str, documentation: str, labelnames: Tuple[str, ...] = (), buckets: Tuple[float, ...] = METRICS_LATENCY_BUCKETS) -> Histogram:
+        return self._register(Histogram(name, documentation, labelnames, buckets))
+
+    def gauge(self, name: str, documentation: str, collect: Callable[[], object], labelnames: Tuple[str, ...] = ()) -> Gauge:
+        return self._register(Gauge(name, documentation, collect, labelnames))
+
+    def render(self) -> str:
+        if not self.enabled:
+            return ""
+        with self._lock:
+            metrics = list(self._metrics.values())
+        pages = []
+        for metric in metrics:
+            try:
+                pages.append(metric.render())
+            except Exception as e:
+                # A failing gauge (e.g. a store that is unavailable) must not hide every other metric
+                pages.append(f"# {metric.name} collection failed: {_escape(str(e))}")
+        return "\n".join(pages) + "\n"
+
+class RequestLatencyMiddleware:
+    """
+    ASGI middleware observing the latency of every HTTP request in `histogram` (labels method, route and status).
+
+    The route label is the path template of the matched route (e.g. /agents/tasks/{task_id}), so ids never
+    create new series; requests matching no route share the "unmatched" label. The time runs until the last
+    body chunk is sent, which is the whole stream for streamed responses.
+    """
+
+    def __init__(self, app, histogram: Histogram):
+        self.app = app
+        self.histogram = histogram
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+
+        start = time.perf_counter()
+        status = {"code": 500}
+
+        async def send_with_status(message):
+            if message["type"] == "http.response.start":
+                status["code"] = message["status"]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            # The router stores the matched route in the scope
+            route = getattr(scope.get("route"), "path", "unmatched")
+            self.histogram.observe(time.perf_counter() - start, method=scope["method"], route=route, status=status["code"])
+
+# Metrics of the process, shared by every module
+metrics = MetricsRegistry()
+
+# Timing hooks of the expensive stages, recorded by the modules running them
+spacy_inference_seconds = metrics.histogram("spacy_inference_seconds", "Spacy entity recognition time by language and mode (single text, batch of texts or chunked large text).", ("lang", "mode"))
+ner_coalesced_batch_size = metrics.histogram("ner_coalesced_batch_size", "Texts per batch of coalesced single-text Spacy requests, by language.", ("lang",), buckets=BATCH_SIZE_BUCKETS)
+llm_request_seconds = metrics.histogram("llm_request_seconds", "OpenAI chat completion time per attempt, by model and outcome (ok, retry or error).", ("model", "outcome"))
+llm_tokens_total = metrics.counter("llm_tokens_total", "Tokens used by OpenAI chat completions, by model and kind (prompt or completion).", ("model", "kind"))
+crew_kickoff_seconds = metrics.histogram("crew_kickoff_seconds", "Crew execution time by crew and outcome.", ("crew", "outcome"))
+crew_task_tokens = metrics.histogram("crew_task_tokens", "Tokens used per crew task, by crew and agent.", ("crew", "agent"), buckets=TOKEN_BUCKETS)
+crew_tokens_total = metrics.counter("crew_tokens_total", "Tokens used by crew tasks, by crew, agent and kind (prompt or completion).", ("crew", "agent", "kind"))
+crew_prompt_tokens = metrics.histogram("crew_prompt_tokens", "Prompt tokens of a crew request counted before its kickoff, by crew.", ("crew",), buckets=TOKEN_BUCKETS)
+crew_prompt_budget_total = metrics.counter("crew_prompt_budget_total", "Crew requests by outcome of the token budget check (within, chunked or rejected), by crew.", ("crew", "outcome"))
+ner_paragraphs_total = metrics.counter("ner_paragraphs_total", "Paragraphs of incremental entity recognition requests, by outcome (reused or recognized).", ("outcome",))
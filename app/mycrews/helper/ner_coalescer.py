@@ -0,0 +1,101 @@
+import asyncio
+import os
+from typing import Dict, List, Tuple
+
+from app.mycrews.helper.executor import ExecutorSaturatedError, ner_executor
+from app.mycrews.helper.metrics import ner_coalesced_batch_size
+from app.mycrews.helper.spacy_entity_recognizer import SPACY_CHUNK_SIZE, nlp, spacy_entity_recognizer, spacy_entity_recognizer_batch
+
+# Micro-batching of single-text requests: how long the first request of a batch waits for others (0 disables it),
+# and the size that flushes a batch right away
+NER_COALESCE_WINDOW_MS = float(os.getenv("NER_COALESCE_WINDOW_MS", "2"))
+NER_COALESCE_MAX_BATCH = int(os.getenv("NER_COALESCE_MAX_BATCH", "32"))
+
+class NERCoalescer:
+    """
+    Coalesces concurrent single-text Spacy requests into batches, each run by one `Language.pipe` call.
+
+    Requests are collected per language: the first one starts a window of `window_ms` milliseconds, and the
+    batch is flushed to the executor when the window ends or when it holds `max_batch` texts, whichever comes
+    first. Each caller awaits its own future and gets the same entities as `spacy_entity_recognizer`. A batch
+    takes a single executor slot, so when the executor is saturated every request of the batch gets the
+    ExecutorSaturatedError.
+
+    Texts above SPACY_CHUNK_SIZE, and every text when the window is 0, skip the batching and run on their own.
+
+    Must be used from the event loop.
+
+    Args:
+        executor (BoundedExecutor): Pool running the batches.
+        window_ms (float): Milliseconds a batch stays open for more requests.
+        max_batch (int): Texts per batch.
+    """
+
+    def __init__(self, executor, window_ms: float = NER_COALESCE_WINDOW_MS, max_batch: int = NER_COALESCE_MAX_BATCH):
+        self.executor = executor
+        self.window = window_ms / 1000
+        self.max_batch = max(1, max_batch)
+        self._batches: Dict[str, List[Tuple[str, List[str], asyncio.Future]]] = {}
+        self._timers: Dict[str, asyncio.TimerHandle] = {}
+
+    @property
+    def enabled(self) -> bool:
+        return self.window > 0
+
+    async def recognize(self, text: str, lang: str = "pt", types: List[str] = []) -> List[dict]:
+        """
+        Extract the entities of a text like `spacy_entity_recognizer`, batched with concurrent requests.
+
+        Raises:
+            ValueError: If the specified language model is not available.
+            ExecutorSaturatedError: If the executor has no free slot for the batch.
+        """
+        if not self.enabled or len(text) > SPACY_CHUNK_SIZE:
+            return await self.executor.run(spacy_entity_recognizer, text, lang, types)
+        if lang not in nlp:
+            raise ValueError(f"Language model '{lang}' not available. Available options: {list(nlp.keys())}")
+
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        batch = self._batches.setdefault(lang, [])
+        batch.append((text, types, future))
+        if len(batch) >= self.max_batch:
+            self._flush(lang)
+        elif len(batch) == 1:
+            self._timers[lang] = loop.call_later(self.window, self._flush, lang)
+        return await future
+
+    def _flush(self, lang: str):
+        timer = self._timers.pop(lang, None)
+        if timer is not None:
+            timer.cancel()
+        batch = self._batches.pop(lang, [])
+        # Callers that went away (cancelled requests) are left out
+        batch = [item for item in batch if not item[2].done()]
+        if not batch:
+            return
+        ner_coalesced_batch_size.observe(len(batch), lang=lang)
+        documents = [{"text": text, "lang": lang, "types": types} for text, types, _ in batch]
+        try:
+            # Batches are small: worker processes would cost more than they save
+            run = self.executor.submit(spacy_entity_recognizer_batch, documents, batch_size=len(documents), n_process=1)
+        except ExecutorSaturatedError as e:
+            for _, _, future in batch:
+                future.set_exception(e)
+            return
+        run.add_done_callback(lambda done: self._resolve(batch, done))
+
+    @staticmethod
+    def _resolve(batch: list, done: asyncio.Future):
+        error = asyncio.CancelledError() if done.cancelled() else done.exception()
+        results = done.result() if error is None else [None] * len(batch)
+        for (_, _, future), result in zip(batch, results):
+            if future.done():
+                continue
+            if error is not None:
+                future.set_exception(error)
+            else:
+                future.set_result(result)
+
+# Coalescer of the single-text Spacy routes, running batches in the NER pool
+ner_coalescer = NERCoalescer(ner_executor)
@@ -0,0 +1,90 @@
+import threading
+import time
+from itertools import islice
+from typing import Callable, Dict, Iterable, Iterator
+
+class PipelineProfiler:
+    """
+    Per-component timing of SpaCy pipelines.
+
+    Instead of calling `nlp(text)`, the profiled helpers run the tokenizer and then every component of
+    the pipeline one by one, timing each step. Timings are aggregated per language and component, and
+    every call is also handed to the registered hooks, so the component dominating a single request can
+    be reported or exported as a metric.
+    """
+
+    def __init__(self):
+        self._stats = {}  # (lang, component) -> [calls, total seconds, max seconds]
+        self._hooks = []
+        self._lock = threading.Lock()
+
+    def add_hook(self, hook: Callable[[str, Dict[str, float]], None]):
+        """Register a callable receiving `(lang, {component: seconds})` after every profiled call."""
+        self._hooks.append(hook)
+
+    def remove_hook(self, hook: Callable[[str, Dict[str, float]], None]):
+        self._hooks.remove(hook)
+
+    def call(self, pipeline, text: str, lang: str):
+        """Process one text like `pipeline(text)`, recording the time spent in each component."""
+        timings = {}
+        start = time.perf_counter()
+        doc = pipeline.make_doc(text)
+        timings["tokenizer"] = time.perf_counter() - start
+        for name, component in pipeline.pipeline:
+            start = time.perf_counter()
+            doc = component(doc)
+            timings[name] = time.perf_counter() - start
+        self._record(lang, timings)
+        return doc
+
+    def pipe(self, pipeline, texts: Iterable[str], lang: str, batch_size: int) -> Iterator:
+        """
+        Process many texts like `pipeline.pipe(texts)`, one component at a time over each batch of `batch_size`
+        texts. Texts are read and docs yielded batch by batch, so a stream of texts is never held in memory whole.
+        """
+        texts = iter(texts)
+        while True:
+            batch = list(islice(texts, batch_size))
+            if not batch:
+                return
+            timings = {}
+            start = time.perf_counter()
+            docs = [pipeline.make_doc(text) for text in batch]
+            timings["tokenizer"] = time.perf_counter() - start
+            for name, component in pipeline.pipeline:
+                start = time.perf_counter()
+                if hasattr(component, "pipe"):
+                    docs = list(component.pipe(docs, batch_size=batch_size))
+                else:
+                    docs = [component(doc) for doc in docs]
+                timings[name] = time.perf_counter() - start
+            self._record(lang, timings)
+            yield from docs
+
+    def stats(self) -> Dict[str, Dict[str, dict]]:
+        """Aggregated timings by language and component, with each component share of the language total."""
+        with self._lock:
+            snapshot = {key: list(values) for key, values in self._stats.items()}
+        result = {}
+        for (lang, component), (calls, total, maximum) in snapshot.items():
+            result.setdefault(lang, {})[component] = {"calls": calls, "total_s": total, "mean_s": total / calls, "max_s": maximum}
+        for components in result.values():
+            lang_total = sum(values["total_s"] for values in components.values()) or 1.0
+            for values in components.values():
+                values["share"] = values["total_s"] / lang_total
+        return result
+
+    def reset(self):
+        with self._lock:
+            self._stats.clear()
+
+    def _record(self, lang: str, timings: Dict[str, float]):
+        with self._lock:
+            for component, elapsed in timings.items():
+                values = self._stats.setdefault((lang, component), [0, 0.0, 0.0])
+                values[0] += 1
+                values[1] += elapsed
+                values[2] = max(values[2], elapsed)
+        for hook in self._hooks:
+            hook(lang, timings)
@@ -0,0 +1,260 @@
+import asyncio
+import gc
+import logging
+import mmap
+import os
+import signal
+import socket
+import struct
+import time
+from typing import Any, Callable, Dict, List, Optional
+
+from app.mycrews.helper.structured_logging import setup_logging, stop_logging
+
+logger = logging.getLogger(__name__)
+
+# Pre-fork serving settings: worker processes (0 serves in a single process, without a master), seconds a worker gets
+# to finish its requests when stopped or reloaded, heartbeat interval, and seconds without a heartbeat before a worker
+# is reported unhealthy and replaced (0 never replaces it)
+APP_WORKERS = int(os.getenv("APP_WORKERS", "0"))
+WORKER_GRACEFUL_TIMEOUT_SECONDS = float(os.getenv("WORKER_GRACEFUL_TIMEOUT_SECONDS", "30"))
+WORKER_HEARTBEAT_SECONDS = float(os.getenv("WORKER_HEARTBEAT_SECONDS", "1"))
+WORKER_HEARTBEAT_TIMEOUT_SECONDS = float(os.getenv("WORKER_HEARTBEAT_TIMEOUT_SECONDS", "60"))
+
+# Slot of a worker on the board: pid, generation, restarts, started_at and heartbeat
+_SLOT = struct.Struct("qqqdd")
+_HEARTBEAT_OFFSET = struct.calcsize("qqqd")
+
+class WorkerBoard:
+    """
+    Health of the workers of a pre-fork master, in memory shared by the master and all its workers.
+
+    The board is an anonymous shared mapping created by the master before forking, with one slot per worker. The
+    master writes a slot when it starts a worker, and the worker then only writes its heartbeat. Every worker can
+    read the whole board, so the /liveness call served by any of them reports all of them.
+
+    Args:
+        slots (int): Number of workers.
+    """
+
+    def __init__(self, slots: int):
+        self.slots = slots
+        self._memory = mmap.mmap(-1, _SLOT.size * slots)
+
+    def start(self, slot: int, pid: int, generation: int, restarts: int):
+        now = time.time()
+        _SLOT.pack_into(self._memory, slot * _SLOT.size, pid, generation, restarts, now, now)
+
+    def beat(self, slot: int):
+        struct.pack_into("d", self._memory, slot * _SLOT.size + _HEARTBEAT_OFFSET, time.time())
+
+    def read(self, slot: int, heartbeat_timeout: float = WORKER_HEARTBEAT_TIMEOUT_SECONDS) -> Dict[str, Any]:
+        pid, generation, restarts, started_at, heartbeat = _SLOT.unpack_from(self._memory, slot * _SLOT.size)
+        age = time.time() - heartbeat
+        return {"slot": slot, "pid": pid, "generation": generation, "restarts": restarts, "started_at": started_at,
+                "heartbeat_age_seconds": round(age, 3), "healthy": pid > 0 and (not heartbeat_timeout or age < heartbeat_timeout)}
+
+    def snapshot(self) -> List[Dict[str, Any]]:
+        return [self.read(slot) for slot in range(self.slots)]
+
+# Board and slot of this process when it is a worker of a pre-fork master
+_worker: Optional[tuple] = None
+
+def current_worker() -> Optional[Dict[str, Any]]:
+    """Health of this worker, None when the process is not a worker of a pre-fork master."""
+    return None if _worker is None else _worker[0].read(_worker[1])
+
+def worker_board() -> Optional[WorkerBoard]:
+    """Board of the pre-fork master of this worker, None when the process is not one of its workers."""
+    return None if _worker is None else _worker[0]
+
+async def worker_heartbeat(interval: float = WORKER_HEARTBEAT_SECONDS):
+    """Write the heartbeat of this worker until cancelled. Runs in the event loop, so a blocked loop stops it."""
+    board, slot = _worker
+    while True:
+        board.beat(slot)
+        await asyncio.sleep(interval)
+
+class PreforkMaster:
+    """
+    Master process serving an ASGI app with uvicorn in forked worker processes.
+
+    The master runs `prepare` (e.g. load the Spacy pipelines), freezes the objects it created so the garbage
+    collector of the workers never writes to their pages, binds the socket and forks the workers, which share
+    everything loaded so far copy-on-write and accept connections on the inherited socket.
+
+    Signals: SIGHUP replaces the workers one at a time, each one finishing its requests first (the listening socket
+    stays open in the master, so connections wait in its backlog instead of being refused); SIGTERM and SIGINT stop
+    the workers gracefully and exit. Workers that exit or stop sending heartbeats are replaced. A reload forks from
+    the master again, so changes of code or models need a restart of the master.
+
+    Args:
+        app: ASGI app, imported in the master.
+        workers (int): Number of worker processes.
+        host, port: Address to listen on.
+        prepare (callable, optional): Called in the master before forking.
+        on_started, on_stopped (callable, optional): Called in the master once the workers are started, and stopped.
+        graceful_timeout (float, optional): Seconds a worker gets to finish its requests before it is killed.
+        heartbeat_timeout (float, optional): Seconds without a heartbeat before a worker is replaced, 0 never.
+        uvicorn_options: Other uvicorn.Config options of the workers.
+    """
+
+    def __init__(self, app, workers: int, host: str, port: int, prepare: Optional[Callable[[], Any]] = None,
+                 on_started: Optional[Callable[[], Any]] = None, on_stopped: Optional[Callable[[], Any]] = None,
+                 graceful_timeout: float = WORKER_GRACEFUL_TIMEOUT_SECONDS,
+                 heartbeat_timeout: float = WORKER_HEARTBEAT_TIMEOUT_SECONDS, **uvicorn_options):
+        if workers <= 0:
+            raise ValueError(f"workers must be positive, got {workers}")
+        self.app = app
+        self.workers = workers
+        self.host = host
+        self.port = port
+        self.prepare = prepare
+        self.on_started = on_started
+        self.on_stopped = on_stopped
+        self.graceful_timeout = graceful_timeout
+        self.heartbeat_timeout = heartbeat_timeout
+        self.uvicorn_options = uvicorn_options
+        self.board = WorkerBoard(workers)
+        self._pids: Dict[int, int] = {}  # slot -> pid
+        self._generations = [0] * workers
+        self._restarts = [0] * workers
+        self._reload = False
+        self._stopping = False
+        self._socket = None
+
+    def run(self):
+        if self.prepare is not None:
+            self.prepare()
+        # Objects created so far are shared with the workers; frozen, the collector never touches (and copies) them
+        gc.collect()
+        gc.freeze()
+
+        self._socket = socket.socket(socket.AF_INET6 if ":" in self.host else socket.AF_INET, socket.SOCK_STREAM)
+        self._socket.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+        self._socket.bind((self.host, self.port))
+        self._socket.listen(2048)
+        self._socket.set_inheritable(True)
+
+        signal.signal(signal.SIGHUP, self._handle_reload)
+        signal.signal(signal.SIGTERM, self._handle_stop)
+        signal.signal(signal.SIGINT, self._handle_stop)
+        for slot in range(self.workers):
+            self._spawn(slot)
+        logger.info("Pre-fork master %s serving on %s:%s with %s workers", os.getpid(), self.host, self.port, self.workers)
+        if self.on_started is not None:
+            self.on_started()
+
+        try:
+            while not self._stopping:
+                self._reap()
+                self._replace_stale()
+                if self._reload:
+                    self._reload = False
+                    self._rolling_reload()
+                time.sleep(0.2)
+        finally:
+            self._stop_all()
+            if self.on_stopped is not None:
+                self.on_stopped()
+            self._socket.close()
+
+    def _handle_reload(self, signum, frame):
+        self._reload = True
+
+    def _handle_stop(self, signum, frame):
+        self._stopping = True
+
+    def _spawn(self, slot: int):
+        # The log listener is a thread, which a forked child would not have: stop it around the fork
+        stop_logging()
+        pid = os.fork()
+        if pid == 0:
+            code = 0
+            try:
+                self._serve(slot)
+            except BaseException:
+                logger.exception("Worker %s failed", slot)
+                code = 1
+            finally:
+                stop_logging()
+                os._exit(code)
+        setup_logging()
+        self._pids[slot] = pid
+        self.board.start(slot, pid, self._generations[slot], self._restarts[slot])
+        logger.info("Worker %s started", slot, extra={"fields": {"pid": pid, "generation": self._generations[slot]}})
+
+    def _serve(self, slot: int):
+        global _worker
+        import uvicorn
+
+        for signum in (signal.SIGHUP, signal.SIGTERM, signal.SIGINT):
+            signal.signal(signum, signal.SIG_DFL)
+        _worker = (self.board, slot)
+        setup_logging()
+        config = uvicorn.Config(self.app, timeout_graceful_shutdown=self.graceful_timeout, **self.uvicorn_options)
+        uvicorn.Server(config).run(sockets=[self._socket])
+
+    def _reap(self):
+        while self._pids:
+            try:
+                pid, status = os.waitpid(-1, os.WNOHANG)
+            except ChildProcessError:
+                return
+            if pid == 0:
+                return
+            slot = next((slot for slot, worker_pid in self._pids.items() if worker_pid == pid), None)
+            if slot is None:
+                continue
+            del self._pids[slot]
+            if not self._stopping:
+                logger.warning("Worker %s exited unexpectedly, replacing it", slot, extra={"fields": {"pid": pid, "status": status}})
+                self._restarts[slot] += 1
+                self._spawn(slot)
+
+    def _replace_stale(self):
+        if not self.heartbeat_timeout:
+            return
+        for slot, pid in list(self._pids.items()):
+            worker = self.board.read(slot, self.heartbeat_timeout)
+            if not worker["healthy"]:
+                logger.warning("Worker %s sent no heartbeat for %ss, killing it", slot, worker["heartbeat_age_seconds"], extra={"fields": {"pid": pid}})
+                os.kill(pid, signal.SIGKILL)
+
+    def _wait(self, pids: List[int], timeout: float) -> List[int]:
+        # Wait for the given workers to exit, returning the ones still running after the timeout
+        deadline = time.time() + timeout
+        running = list(pids)
+        while running and time.time() < deadline:
+            for pid in list(running):
+                if os.waitpid(pid, os.WNOHANG)[0] == pid:
+                    running.remove(pid)
+            time.sleep(0.05)
+        return running
+
+    def _stop_slot(self, slot: int):
+        pid = self._pids.pop(slot)
+        os.kill(pid, signal.SIGTERM)
+        for late in self._wait([pid], self.graceful_timeout):
+            os.kill(late, signal.SIGKILL)
+            os.waitpid(late, 0)
+
+    def _rolling_reload(self):
+        logger.info("Reloading %s workers", self.workers)
+        for slot in range(self.workers):
+            if self._stopping:
+                return
+            if slot in self._pids:
+                self._stop_slot(slot)
+            self._generations[slot] += 1
+            self._spawn(slot)
+
+    def _stop_all(self):
+        pids = list(self._pids.values())
+        self._pids.clear()
+        for pid in pids:
+            os.kill(pid, signal.SIGTERM)
+        for late in self._wait(pids, self.graceful_timeout):
+            os.kill(late, signal.SIGKILL)
+            os.waitpid(late, 0)
+        logger.info("Pre-fork master stopped")
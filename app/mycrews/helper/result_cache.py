@@ -0,0 +1,151 @@
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+import unicodedata
+from collections import OrderedDict
+from typing import Any, Optional
+
+# Result cache settings: memory tier size, lifetime of cached results, optional on-disk tier shared by
+# every worker on the host, and endpoints that never use the cache (comma separated, e.g. "open/test")
+RESULT_CACHE_ENABLED = os.getenv("RESULT_CACHE_ENABLED", "1") == "1"
+RESULT_CACHE_MAX_ENTRIES = int(os.getenv("RESULT_CACHE_MAX_ENTRIES", "1024"))
+RESULT_CACHE_TTL_SECONDS = float(os.getenv("RESULT_CACHE_TTL_SECONDS", "3600"))
+RESULT_CACHE_DISK_PATH = os.getenv("RESULT_CACHE_DISK_PATH", "")
+RESULT_CACHE_DISABLED_ENDPOINTS = {endpoint.strip() for endpoint in os.getenv("RESULT_CACHE_DISABLED_ENDPOINTS", "").split(",") if endpoint.strip()}
+
+def normalize_text(text: str) -> str:
+    """Normalize free text for cache keys: Unicode NFC, no leading/trailing spaces, single spaces."""
+    return " ".join(unicodedata.normalize("NFC", text).split())
+
+def cache_key(endpoint: str, text: str, normalize: bool = True, **params) -> str:
+    """
+    Content-addressed key of a call: SHA-256 of the endpoint, the (normalized) input text and the
+    parameters changing the result, such as model, language and entity type filter.
+    """
+    payload = json.dumps(
+        {"endpoint": endpoint, "text": normalize_text(text) if normalize else text, "params": params},
+        sort_keys=True, ensure_ascii=False, default=list,
+    )
+    return f"{endpoint}:{hashlib.sha256(payload.encode('utf-8')).hexdigest()}"
+
+class ResultCache:
+    """
+    Two-tier cache of crew, LLM and NER results.
+
+    The memory tier is a bounded LRU local to the process; the optional disk tier is a SQLite file
+    shared by every worker on the host. Both tiers expire entries `ttl_seconds` after they were stored.
+    A disk hit is copied to the memory tier. Values must be JSON serializable.
+
+    Args:
+        max_entries (int, optional): Size of the memory tier.
+        ttl_seconds (float, optional): Lifetime of an entry. 0 keeps entries until evicted.
+        disk_path (str, optional): Path of the disk tier database. Empty disables the disk tier.
+        disabled_endpoints (set, optional): Endpoints that never read nor write the cache.
+        enabled (bool, optional): Global switch.
+    """
+
+    def __init__(self, max_entries: int = RESULT_CACHE_MAX_ENTRIES, ttl_seconds: float = RESULT_CACHE_TTL_SECONDS,
+                 disk_path: str = RESULT_CACHE_DISK_PATH, disabled_endpoints: set = RESULT_CACHE_DISABLED_ENDPOINTS,
+                 enabled: bool = RESULT_CACHE_ENABLED):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.disk_path = disk_path
+        self.disabled_endpoints = set(disabled_endpoints)
+        self.enabled = enabled
+        self._memory = OrderedDict()  # key -> (expires_at, value)
+        self._counters = {}  # endpoint -> {"hits", "disk_hits", "misses", "writes"}
+        self._lock = threading.Lock()
+        self._local = threading.local()
+        if self.disk_path:
+            self._connection().execute(
+                "CREATE TABLE IF NOT EXISTS results (key TEXT PRIMARY KEY, value TEXT NOT NULL, expires_at REAL NOT NULL)"
+            )
+
+    def enabled_for(self, endpoint: str) -> bool:
+        return self.enabled and endpoint not in self.disabled_endpoints
+
+    def get(self, key: str) -> Optional[Any]:
+        """Return the cached value of a key, or None on a miss."""
+        endpoint = key.partition(":")[0]
+        now = time.time()
+        with self._lock:
+            entry = self._memory.get(key)
+            if entry is not None and entry[0] > now:
+                self._memory.move_to_end(key)
+                self._count(endpoint, "hits")
+                return entry[1]
+            if entry is not None:
+                del self._memory[key]
+
+        if self.disk_path:
+            row = self._connection().execute("SELECT value, expires_at FROM results WHERE key = ? AND expires_at > ?", (key, now)).fetchone()
+            if row is not None:
+                value = json.loads(row[0])
+                with self._lock:
+                    self._store_memory(key, value, row[1])
+                    self._count(endpoint, "hits")
+                    self._count(endpoint, "disk_hits")
+                return value
+
+        with self._lock:
+            self._count(endpoint, "misses")
+        return None
+
+    def set(self, key: str, value: Any):
+        """Store a value in both tiers."""
+        expires_at = time.time() + self.ttl_seconds if self.ttl_seconds > 0 else float("inf")
+        with self._lock:
+            self._store_memory(key, value, expires_at)
+            self._count(key.partition(":")[0], "writes")
+        if self.disk_path:
+            self._connection().execute(
+                "INSERT OR REPLACE INTO results (key, value, expires_at) VALUES (?, ?, ?)", (key, json.dumps(value), expires_at)
+            )
+
+    def purge_expired(self) -> int:
+        now = time.time()
+        with self._lock:
+            expired = [key for key, (expires_at, _) in self._memory.items() if expires_at <= now]
+            for key in expired:
+                del self._memory[key]
+        removed = len(expired)
+        if self.disk_path:
+            removed += self._connection().execute("DELETE FROM results WHERE expires_at <= ?", (now,)).rowcount
+        return removed
+
+    def stats(self) -> dict:
+        """Hit/miss counters by endpoint, with the hit ratio, and the memory tier size."""
+        with self._lock:
+            endpoints = {endpoint: dict(counters) for endpoint, counters in self._counters.items()}
+            size = len(self._memory)
+        for counters in endpoints.values():
+            lookups = counters["hits"] + counters["misses"]
+            counters["hit_ratio"] = counters["hits"] / lookups if lookups else None
+        return {"enabled": self.enabled, "memory_entries": size, "max_entries": self.max_entries,
+                "disk": bool(self.disk_path), "disabled_endpoints": sorted(self.disabled_endpoints), "endpoints": endpoints}
+
+    def _store_memory(self, key: str, value: Any, expires_at: float):
+        self._memory[key] = (expires_at, value)
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.max_entries:
+            self._memory.popitem(last=False)
+
+    def _count(self, endpoint: str, counter: str):
+        counters = self._counters.setdefault(endpoint, {"hits": 0, "disk_hits": 0, "misses": 0, "writes": 0})
+        counters[counter] += 1
+
+    def _connection(self) -> sqlite3.Connection:
+        connection = getattr(self._local, "connection", None)
+        if connection is None or self._local.pid != os.getpid():
+            connection = sqlite3.connect(self.disk_path, timeout=30, isolation_level=None, check_same_thread=False)
+            connection.execute("PRAGMA journal_mode=WAL")
+            connection.execute("PRAGMA synchronous=NORMAL")
+            self._local.connection = connection
+            self._local.pid = os.getpid()
+        return connection
+
+# Cache shared by the routes and the background tasks of this process
+result_cache = ResultCache()
@@ -1,23 +1,79 @@
-from typing import List
-import spacy
-from spacy.util import is_package
-from spacy.cli import download
+import os
+from collections import deque
+from functools import lru_cache
+from importlib import metadata
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple, Union
+import numpy as np
+from spacy.about import __version__ as spacy_version
+from spacy.attrs import ENT_IOB, ENT_TYPE, IDX, LENGTH
+from spacy.strings import get_string_id
+from app.mycrews.helper.metrics import spacy_inference_seconds
+from app.mycrews.helper.pipeline_profiler import PipelineProfiler
+from app.mycrews.helper.spacy_model_registry import SpacyModelRegistry
+from app.mycrews.helper.text_chunker import iter_chunks
 
 # Avaialble models
 models = [{"lang": "pt", "modelName": "pt_core_news_sm"}, {"lang": "en", "modelName": "en_core_web_sm"}]
 
-# Dictionary to store the model according each language
-nlp = {}
+# Default settings for batch processing through Language.pipe
+SPACY_BATCH_SIZE = int(os.getenv("SPACY_BATCH_SIZE", "64"))
+SPACY_N_PROCESS = int(os.getenv("SPACY_N_PROCESS", "1"))
 
-# check and download model, if it is need
-for model in models:
-    model_name = model["modelName"]
-    lang = model["lang"]
-    
-    if not is_package(model_name):
-        download(model_name)  # Download model, if it is need
-    
-    nlp[lang] = spacy.load(model_name)  # Load model on dictionary by its language
+# Model loading settings: memory budget for loaded models (0 is unlimited), languages loaded at startup
+# and pipeline components never loaded, since only the entities are read
+SPACY_MEMORY_BUDGET_MB = float(os.getenv("SPACY_MEMORY_BUDGET_MB", "0"))
+SPACY_PRELOAD = [lang.strip() for lang in os.getenv("SPACY_PRELOAD", "").split(",") if lang.strip()]
+SPACY_EXCLUDE_PIPES = [pipe.strip() for pipe in os.getenv("SPACY_EXCLUDE_PIPES", "parser,lemmatizer").split(",") if pipe.strip()]
+
+# Entities-only mode: load only the components entity recognition depends on (ner and its embeddings)
+SPACY_ENTITIES_ONLY = os.getenv("SPACY_ENTITIES_ONLY", "1") == "1"
+
+# Download missing models on first use. Off by default: models come from the image, so workers start offline
+SPACY_ALLOW_DOWNLOAD = os.getenv("SPACY_ALLOW_DOWNLOAD", "0") == "1"
+
+# Large texts are recognized in chunks of SPACY_CHUNK_SIZE characters (cut at paragraph or sentence boundaries),
+# each with SPACY_CHUNK_OVERLAP characters of context on both sides, SPACY_CHUNK_BATCH_SIZE chunks at a time.
+# Must stay below the max_length of the models (1,000,000 characters by default).
+SPACY_CHUNK_SIZE = int(os.getenv("SPACY_CHUNK_SIZE", "100000"))
+SPACY_CHUNK_OVERLAP = int(os.getenv("SPACY_CHUNK_OVERLAP", "200"))
+SPACY_CHUNK_BATCH_SIZE = int(os.getenv("SPACY_CHUNK_BATCH_SIZE", "4"))
+
+# Per-component timing of every call, see pipeline_profiler.stats()
+SPACY_PROFILE_PIPES = os.getenv("SPACY_PROFILE_PIPES", "0") == "1"
+
+# Entity labels of the models and the type returned for them ("PER" is normalized to "PERSON", "EMAIL_ADDRESS"
+# to "EMAIL"), and the types Spacy serves: only people, organizations and locations are returned
+LABEL_TYPES = {"PER": "PERSON", "PERSON": "PERSON", "ORG": "ORG", "LOCATION": "LOCATION", "EMAIL_ADDRESS": "EMAIL"}
+ACCEPTED_TYPES = frozenset({"PERSON", "ORG", "LOCATION"})
+
+# Version of the entity dictionaries returned by the recognizers (fields, offsets, types), raised when they change
+ENTITY_SCHEMA_VERSION = 2
+
+# Settings besides the model changing Spacy results: the Spacy release, the loaded components, the chunking of large
+# texts and the entity shape. Part of the cache keys of Spacy results, so the disk tier of the result cache, which
+# outlives restarts, never serves entries computed under another configuration or in an older shape.
+SPACY_PIPELINE_VERSION = (f"schema={ENTITY_SCHEMA_VERSION};spacy={spacy_version};entities_only={int(SPACY_ENTITIES_ONLY)};"
+                          f"exclude={','.join(sorted(SPACY_EXCLUDE_PIPES))};chunks={SPACY_CHUNK_SIZE}/{SPACY_CHUNK_OVERLAP}")
+
+# Tokens ending a sentence, used to skip capitalized sentence starts when computing the entity coverage
+SENTENCE_END = {".", "!", "?", ":", ";", "\"", "'", "(", "-", "\u2014"}
+
+# Registry of models by language, each model is loaded on its first use
+nlp = SpacyModelRegistry(models, memory_budget_mb=SPACY_MEMORY_BUDGET_MB, exclude=SPACY_EXCLUDE_PIPES, preload=SPACY_PRELOAD, entities_only=SPACY_ENTITIES_ONLY,
+                         allow_download=SPACY_ALLOW_DOWNLOAD)
+
+# Profiler of pipeline components, used when SPACY_PROFILE_PIPES is enabled
+pipeline_profiler = PipelineProfiler()
+
+@lru_cache(maxsize=None)
+def spacy_cache_params(lang: str) -> Dict[str, Optional[str]]:
+    """Parameters of the cache keys of Spacy results for a language: model, installed model version and pipeline version."""
+    model = next((model["modelName"] for model in models if model["lang"] == lang), None)
+    try:
+        model_version = metadata.version(model) if model else None
+    except metadata.PackageNotFoundError:
+        model_version = None
+    return {"model": model, "model_version": model_version, "pipeline": SPACY_PIPELINE_VERSION}
 
 def spacy_entity_recognizer(text: str, lang: str = "pt", types: List[str] = []) -> List[dict]:
     """
@@ -26,7 +82,7 @@ def spacy_entity_recognizer(text: str, lang: str = "pt", types: List[str] = [])
     This function uses SpaCy to identify named entities in the input text. By default, it processes text in Portuguese.
     If a list of entity types is provided, only the specified entity types will be returned.
 
-    Additionally, it normalizes the entity type "EMAIL_ADDRESS" to "EMAIL" for consistency.
+    Additionally, it normalizes the entity labels "PER" to "PERSON" and "EMAIL_ADDRESS" to "EMAIL" for consistency (see LABEL_TYPES).
 
     Args:
         text (str): The input text to analyze and extract named entities from.
@@ -37,44 +93,201 @@ def spacy_entity_recognizer(text: str, lang: str = "pt", types: List[str] = [])
         List[dict]: A list of extracted entities, each represented as a dictionary with:
             - "value" (str): The extracted entity text.
             - "type" (str): The entity type.
+            - "label" (str): The label given by the model (e.g. "PER" for the type "PERSON").
+            - "start" and "end" (int): Character offsets of the entity in the text.
 
     Raises:
         ValueError: If the specified language model is not available.
 
     Example:
-        >>> spacy_entity_recognizer("My email is test@email.com", lang="pt")
-        [{'value': 'test@email.com', 'type': 'EMAIL'}]
-
         >>> spacy_entity_recognizer("Amazon is a company", lang="pt", types=["ORG"])
-        [{'value': 'Amazon', 'type': 'ORG'}]
+        [{'value': 'Amazon', 'type': 'ORG', 'label': 'ORG', 'start': 0, 'end': 6}]
     """
     
     # Check if the selected language model is available
     if lang not in nlp:
         raise ValueError(f"Language model '{lang}' not available. Available options: {list(nlp.keys())}")
 
+    # Large texts go through the chunked pipeline, which keeps memory bounded and stays below max_length
+    if len(text) > SPACY_CHUNK_SIZE:
+        with spacy_inference_seconds.time(lang=lang, mode="chunked"):
+            return list(spacy_entity_recognizer_chunked(text, lang, types))
+
     # Process the text using the corresponding model
-    doc = nlp[lang](text)
+    return _extract_entities(_process(text, lang), types, text=text)
 
-    # Extract entities from the text
-    entities = [{"value": ent.text, "type": ent.label_} for ent in doc.ents]
+def spacy_entity_recognizer_batch(documents: List[dict], batch_size: int = SPACY_BATCH_SIZE, n_process: int = SPACY_N_PROCESS) -> List[List[dict]]:
+    """
+    Extract named entities from many texts at once, streaming them through SpaCy's `Language.pipe`.
 
-    # Normalize the entity type "EMAIL_ADDRESS" to "EMAIL" and "PER" to "PERSON"
-    for ent in entities:
-        if ent["type"] == "EMAIL_ADDRESS":
-            ent["type"] = "EMAIL"
-        if ent["type"] == "PER":
-            ent["type"] = "PERSON"
+    Documents are grouped by language so each model processes its texts in batches, which avoids
+    the per-call overhead of running `nlp[lang](text)` once per document. Results are returned in
+    the same order as the input documents.
 
+    Args:
+        documents (List[dict]): The documents to analyze, each represented as a dictionary with:
+            - "text" (str): The input text.
+            - "lang" (str, optional): The language model to use. Defaults to "pt" (Portuguese).
+            - "types" (List[str], optional): Entity types to filter results, as in `spacy_entity_recognizer`.
+        batch_size (int, optional): Number of texts buffered per batch by `Language.pipe`. Defaults to SPACY_BATCH_SIZE.
+        n_process (int, optional): Number of worker processes used by `Language.pipe`. Defaults to SPACY_N_PROCESS.
 
-    # For only shrink spacy to recognize only certain entity types: PERSON, ORG, LOCATION
-    ACCEPTED_TYPES = ["PERSON", "ORG", "LOCATION"]
-    entities = [ent for ent in entities if ent["type"] in ACCEPTED_TYPES]
-    
-    # Also, filter entities by type if a type list is provided
-    if any(types):
-        types_upper = [t.upper() for t in types]
-        types_upper.append('FAILED')
-        entities = [ent for ent in entities if ent["type"] in types_upper]
-  
+    Returns:
+        List[List[dict]]: One list of extracted entities per input document, in input order.
+
+    Raises:
+        ValueError: If the language model of any document is not available.
+
+    Example:
+        >>> spacy_entity_recognizer_batch([{"text": "Amazon is a company", "lang": "en", "types": ["ORG"]}])
+        [[{'value': 'Amazon', 'type': 'ORG', 'label': 'ORG', 'start': 0, 'end': 6}]]
+    """
+
+    # Group document indexes by language, validating every language before processing anything
+    groups = {}
+    for index, document in enumerate(documents):
+        lang = document.get("lang", "pt")
+        if lang not in nlp:
+            raise ValueError(f"Language model '{lang}' not available. Available options: {list(nlp.keys())}")
+        groups.setdefault(lang, []).append(index)
+
+    results = [None] * len(documents)
+    for lang, indexes in groups.items():
+        with spacy_inference_seconds.time(lang=lang, mode="batch"):
+            texts = (documents[index]["text"] for index in indexes)
+            if SPACY_PROFILE_PIPES and n_process == 1:
+                docs = pipeline_profiler.pipe(nlp[lang], texts, lang, batch_size)
+            else:
+                docs = nlp[lang].pipe(texts, batch_size=batch_size, n_process=n_process)
+            for index, doc in zip(indexes, docs):
+                results[index] = _extract_entities(doc, documents[index].get("types", []), text=documents[index]["text"])
+
+    return results
+
+def spacy_entity_recognizer_with_coverage(text: str, lang: str = "pt", types: List[str] = []) -> Tuple[List[dict], float]:
+    """
+    Extract named entities like `spacy_entity_recognizer` and also return the coverage of the result.
+
+    The coverage is the share of capitalized words, outside of sentence starts, that fall inside a
+    recognized entity (of any type). Proper nouns the model missed lower it, so a low coverage hints
+    that the text is out of the model's domain. A text without such words has a coverage of 1.0.
+
+    Returns:
+        Tuple[List[dict], float]: The extracted entities and the coverage, between 0.0 and 1.0.
+
+    Raises:
+        ValueError: If the specified language model is not available.
+    """
+    if lang not in nlp:
+        raise ValueError(f"Language model '{lang}' not available. Available options: {list(nlp.keys())}")
+
+    doc = _process(text, lang)
+    return _extract_entities(doc, types, text=text), _entity_coverage(doc)
+
+def spacy_entity_recognizer_chunked(text: Union[str, Iterable[str]], lang: str = "pt", types: List[str] = [],
+                                    chunk_size: int = SPACY_CHUNK_SIZE, overlap: int = SPACY_CHUNK_OVERLAP,
+                                    batch_size: int = SPACY_CHUNK_BATCH_SIZE, n_process: int = SPACY_N_PROCESS) -> Iterator[dict]:
+    """
+    Extract named entities from a text of any size, streaming it through SpaCy in overlapping chunks.
+
+    The text is split at paragraph or sentence boundaries (see `iter_chunks`) while it is read, and the chunks
+    go through `Language.pipe`, so only about `batch_size` chunks are held in memory at once, whatever the text
+    size. Each chunk keeps the entities starting in its own range: entities crossing a cut are seen whole thanks
+    to the overlap, and entities of the overlapping context are not reported twice.
+
+    Args:
+        text (Union[str, Iterable[str]]): The input text, or an iterable of its pieces (e.g. read from a stream).
+        lang (str, optional): The language model to use. Defaults to "pt" (Portuguese).
+        types (List[str], optional): A list of entity types to filter results, as in `spacy_entity_recognizer`.
+        chunk_size (int, optional): Characters per chunk, without the overlap. Defaults to SPACY_CHUNK_SIZE.
+        overlap (int, optional): Characters of context on both sides of each chunk. Defaults to SPACY_CHUNK_OVERLAP.
+        batch_size (int, optional): Number of chunks buffered per batch by `Language.pipe`.
+        n_process (int, optional): Number of worker processes used by `Language.pipe`, to process chunks in parallel.
+
+    Returns:
+        Iterator[dict]: The extracted entities in text order, each represented as a dictionary with:
+            - "value" (str): The extracted entity text.
+            - "type" (str): The entity type.
+            - "label" (str): The label given by the model.
+            - "start" and "end" (int): Character offsets of the entity in the whole text.
+
+    Raises:
+        ValueError: If the specified language model is not available.
+    """
+    if lang not in nlp:
+        raise ValueError(f"Language model '{lang}' not available. Available options: {list(nlp.keys())}")
+
+    # Chunks are read lazily by Language.pipe, which returns the docs in the same order
+    chunks = deque()
+    def texts():
+        for chunk in iter_chunks(text, chunk_size, overlap):
+            chunks.append(chunk)
+            yield chunk.text
+
+    if SPACY_PROFILE_PIPES and n_process == 1:
+        docs = pipeline_profiler.pipe(nlp[lang], texts(), lang, batch_size)
+    else:
+        docs = nlp[lang].pipe(texts(), batch_size=batch_size, n_process=n_process)
+    for doc in docs:
+        chunk = chunks.popleft()
+        for ent in _extract_entities(doc, types, offset=chunk.start, text=chunk.text):
+            if chunk.own_start <= ent["start"] < chunk.own_end:
+                yield ent
+
+def _process(text: str, lang: str):
+    # One text through the model of its language, timed and optionally profiled
+    with spacy_inference_seconds.time(lang=lang, mode="single"):
+        if SPACY_PROFILE_PIPES:
+            return pipeline_profiler.call(nlp[lang], text, lang)
+        return nlp[lang](text)
+
+def _entity_coverage(doc) -> float:
+    covered = set()
+    for ent in doc.ents:
+        covered.update(range(ent.start, ent.end))
+
+    # The parser is not loaded, so sentence starts are guessed from the previous token
+    candidates = [
+        token.i for token in doc
+        if token.is_alpha and token.text[0].isupper()
+        and token.i > 0 and doc[token.i - 1].text not in SENTENCE_END and not doc[token.i - 1].is_space
+    ]
+    if not candidates:
+        return 1.0
+    return sum(index in covered for index in candidates) / len(candidates)
+
+@lru_cache(maxsize=256)
+def _label_table(types: Tuple[str, ...]) -> Tuple[np.ndarray, Dict[int, Tuple[str, str]]]:
+    # Label ids kept for the requested accepted types (all of them when none is given), and label id -> (type, label).
+    # Built once per type list.
+    wanted = ACCEPTED_TYPES & {t.upper() for t in types} if any(types) else ACCEPTED_TYPES
+    table = {get_string_id(label): (entity_type, label) for label, entity_type in LABEL_TYPES.items() if entity_type in wanted}
+    return np.array(list(table), dtype=np.uint64), table
+
+def _extract_entities(doc, types: List[str], offset: int = 0, text: Optional[str] = None) -> List[dict]:
+    """
+    Convert the entities of a processed SpaCy document to dictionaries, normalizing and filtering their types.
+
+    Entities are read from the token attribute arrays of the document in one pass: entity starts whose label is
+    not in the precomputed label table are dropped before any span or string is built, and only the kept entities
+    become dictionaries. Every entity gets its "start" and "end" characters, shifted by the offset, and the
+    "label" given by the model. Pass the processed `text` when available, to slice values from it instead of
+    rebuilding the text of the document.
+    """
+    keys, table = _label_table(tuple(types))
+    attributes = doc.to_array([ENT_IOB, ENT_TYPE, IDX, LENGTH])
+    iob = attributes[:, 0]
+    # ENT_IOB is 3 on the first token of an entity and 1 on its other tokens
+    starts = np.flatnonzero(iob == 3)
+    starts = starts[np.isin(attributes[starts, 1], keys)]
+    if not len(starts):
+        return []
+    outside = np.append(np.flatnonzero(iob != 1), len(iob))
+    lasts = outside[np.searchsorted(outside, starts, side="right")] - 1
+
+    text = doc.text if text is None else text
+    entities = []
+    for start, end, label in zip(attributes[starts, 2].tolist(), (attributes[lasts, 2] + attributes[lasts, 3]).tolist(), attributes[starts, 1].tolist()):
+        entity_type, label_name = table[label]
+        entities.append({"value": text[start:end], "type": entity_type, "label": label_name, "start": start + offset, "end": end + offset})
     return entities
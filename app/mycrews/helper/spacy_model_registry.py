@@ -0,0 +1,181 @@
+import gc
+import os
+import threading
+from collections import OrderedDict
+from pathlib import Path
+from typing import List
+
+import spacy
+from spacy.util import get_model_meta, get_package_path, is_package, load_config
+
+# Components that set doc.ents, kept by the entities-only mode
+ENTITY_COMPONENTS = {"ner", "entity_ruler", "span_ruler"}
+# Factories of shared embedding components that other components can listen to
+EMBEDDING_FACTORIES = {"tok2vec", "transformer", "curated_transformer"}
+
+def _current_rss() -> int:
+    """Resident set size of the current process in bytes, or 0 when it cannot be read."""
+    try:
+        with open("/proc/self/statm") as statm:
+            return int(statm.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, IndexError):
+        return 0
+
+def _package_size(model_name: str) -> int:
+    """Size on disk of an installed model package in bytes, used when the RSS cannot be read."""
+    total = 0
+    path = Path(model_name) if Path(model_name).exists() else get_package_path(model_name)
+    for root, _, files in os.walk(path):
+        total += sum(os.path.getsize(os.path.join(root, name)) for name in files)
+    return total
+
+def _model_config(model_name: str):
+    """Read the config of an installed model package, or of a model directory, without loading it."""
+    if Path(model_name).exists():
+        return load_config(Path(model_name) / "config.cfg")
+    package_path = get_package_path(model_name)
+    meta = get_model_meta(package_path)
+    return load_config(package_path / f"{meta['lang']}_{meta['name']}-{meta['version']}" / "config.cfg")
+
+def _listened_upstreams(block) -> set:
+    """Names of the embedding components a component config listens to ("*" means any of them)."""
+    upstreams = set()
+    if isinstance(block, dict):
+        if "Listener" in str(block.get("@architectures", "")) and "upstream" in block:
+            upstreams.add(block["upstream"])
+        for value in block.values():
+            upstreams |= _listened_upstreams(value)
+    return upstreams
+
+def entities_only_exclusions(config) -> List[str]:
+    """
+    Components of a pipeline config that entity recognition does not depend on.
+
+    Entity components are kept along with the embedding components they listen to; everything else
+    (tagger, morphologizer, parser, lemmatizer, attribute_ruler, senter...) can be excluded from loading.
+    """
+    pipeline = list(config["nlp"]["pipeline"])
+    components = config["components"]
+    keep = {name for name in pipeline if name in ENTITY_COMPONENTS or components.get(name, {}).get("factory") in ENTITY_COMPONENTS}
+    for name in list(keep):
+        for upstream in _listened_upstreams(components.get(name, {})):
+            if upstream == "*":
+                keep |= {other for other in pipeline if components.get(other, {}).get("factory") in EMBEDDING_FACTORIES}
+            else:
+                keep.add(upstream)
+    return [name for name in pipeline if name not in keep]
+
+class SpacyModelRegistry:
+    """
+    Registry of SpaCy pipelines by language, loading each pipeline on first use.
+
+    Loaded pipelines are kept in least recently used order. When a memory budget is set and the
+    estimated footprint of the loaded pipelines goes over it, the least recently used languages are
+    unloaded (the pipeline being returned is never unloaded). The footprint of a pipeline is estimated
+    by the growth of the process RSS while loading it.
+
+    The registry behaves like the former `nlp` dictionary: `lang in registry`, `registry[lang]` and
+    `registry.keys()` work on every configured language, loaded or not.
+
+    Args:
+        models (List[dict]): Available models, each with "lang" and "modelName".
+        memory_budget_mb (float, optional): Budget for loaded pipelines in megabytes. 0 means unlimited.
+        exclude (List[str], optional): Pipeline components not loaded at all, e.g. ["parser", "lemmatizer"].
+        preload (List[str], optional): Languages loaded right away instead of on first use.
+        entities_only (bool, optional): Also exclude every component that entity recognition does not depend on.
+        allow_download (bool, optional): Download models that are not installed when they are first used. Otherwise
+            models are only loaded from installed packages or model directories.
+    """
+
+    def __init__(self, models: List[dict], memory_budget_mb: float = 0, exclude: List[str] = [], preload: List[str] = [], entities_only: bool = False,
+                 allow_download: bool = False):
+        self._model_names = {model["lang"]: model["modelName"] for model in models}
+        self.allow_download = allow_download
+        self.memory_budget = int(memory_budget_mb * 1024 * 1024)
+        self.exclude = list(exclude)
+        self.entities_only = entities_only
+        self._loaded = OrderedDict()  # lang -> (pipeline, estimated size in bytes)
+        self._lock = threading.RLock()
+        for lang in preload:
+            self.get(lang)
+
+    def __contains__(self, lang: str) -> bool:
+        return lang in self._model_names
+
+    def __getitem__(self, lang: str):
+        return self.get(lang)
+
+    def keys(self):
+        return self._model_names.keys()
+
+    def loaded(self) -> List[str]:
+        """Languages currently loaded, from least to most recently used."""
+        with self._lock:
+            return list(self._loaded.keys())
+
+    def memory_usage(self) -> int:
+        """Estimated footprint of the loaded pipelines in bytes."""
+        with self._lock:
+            return sum(size for _, size in self._loaded.values())
+
+    def get(self, lang: str):
+        """
+        Return the pipeline of a language, loading it when needed.
+
+        Raises:
+            ValueError: If the language is not configured.
+        """
+        if lang not in self._model_names:
+            raise ValueError(f"Language model '{lang}' not available. Available options: {list(self._model_names.keys())}")
+
+        with self._lock:
+            if lang in self._loaded:
+                self._loaded.move_to_end(lang)
+                return self._loaded[lang][0]
+
+            # Loads are serialized so the RSS growth can be attributed to a single pipeline
+            pipeline, size = self._load(self._model_names[lang])
+            self._loaded[lang] = (pipeline, size)
+            self._evict(keep=lang)
+            return pipeline
+
+    def unload(self, lang: str) -> bool:
+        """Unload a language. Returns False when it was not loaded."""
+        with self._lock:
+            if self._loaded.pop(lang, None) is None:
+                return False
+        gc.collect()
+        return True
+
+    def _load(self, model_name: str):
+        if not Path(model_name).exists() and not is_package(model_name):
+            if not self.allow_download:
+                raise OSError(f"Spacy model '{model_name}' is not installed. Install it with the image "
+                              f"(python -m spacy download {model_name}) or set SPACY_ALLOW_DOWNLOAD=1.")
+            from spacy.cli import download
+            download(model_name)
+
+        exclude = list(self.exclude)
+        if self.entities_only:
+            exclude += [name for name in entities_only_exclusions(_model_config(model_name)) if name not in exclude]
+
+        rss_before = _current_rss()
+        pipeline = spacy.load(model_name, exclude=exclude)
+        size = _current_rss() - rss_before if rss_before else 0
+        if size <= 0:
+            size = _package_size(model_name)
+        return pipeline, size
+
+    def _evict(self, keep: str):
+        if not self.memory_budget:
+            return
+        evicted = False
+        while self.memory_usage() > self.memory_budget and len(self._loaded) > 1:
+            lang = next(iter(self._loaded))
+            if lang == keep:
+                self._loaded.move_to_end(lang)
+                continue
+            del self._loaded[lang]
+            evicted = True
+        if evicted:
+            gc.collect()
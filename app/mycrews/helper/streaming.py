@@ -0,0 +1,139 @@
+import asyncio
+import codecs
+import json
+import os
+from typing import Any, AsyncIterator, Iterator, Optional
+
+# Longest text sent in a single progress event, larger agent steps are truncated
+STREAM_MAX_EVENT_TEXT = int(os.getenv("STREAM_MAX_EVENT_TEXT", "4000"))
+
+def sse_event(event: str, data: Any) -> str:
+    """Format one Server-Sent Event with a JSON payload."""
+    return f"event: {event}\ndata: {json.dumps(data, ensure_ascii=False, default=str)}\n\n"
+
+def _truncate(text: Optional[str]) -> Optional[str]:
+    if text is None or len(text) <= STREAM_MAX_EVENT_TEXT:
+        return text
+    return text[:STREAM_MAX_EVENT_TEXT] + "..."
+
+def _step_text(step) -> str:
+    # Agent steps are AgentAction, AgentFinish or ToolResult objects depending on the step
+    for attribute in ("result", "output", "text"):
+        value = getattr(step, attribute, None)
+        if value:
+            return str(value)
+    return str(step)
+
+def structured_output(output) -> Optional[dict]:
+    # Pydantic output of tasks bound to an output model, otherwise their JSON output
+    if output.pydantic is not None:
+        return output.pydantic.model_dump(exclude_unset=True)
+    return output.json_dict
+
+def crew_event_stream(pool, inputs: dict, executor, on_done=None) -> AsyncIterator[tuple]:
+    """
+    Start a crew and return an async iterator of `(event, data)` progress tuples while it runs.
+
+    The crew is checked out of a CrewPool for this execution only, and the callbacks used to report
+    progress are cleared when it goes back, so they never leak into other executions. With the
+    sequential process, a task starts when the previous one finishes.
+
+    Events: "task_started" and "task_finished" (with the intermediate output) per crew task, "step" per
+    agent step, then "result" with the final output and token usage (total and per task), or "error".
+
+    Args:
+        pool (CrewPool): Pool of the crew to run.
+        inputs (dict): Kickoff inputs.
+        executor: BoundedExecutor running the blocking kickoff. A saturated executor raises
+            ExecutorSaturatedError right away, before anything is streamed.
+        on_done (callable, optional): Called with the final event and its data ("result" or "error") as soon as
+            the crew finishes, from the event loop, even when the iterator is no longer read (client gone).
+    """
+    loop = asyncio.get_running_loop()
+    events = asyncio.Queue()
+    tasks = []
+    finished = {"count": 0}
+
+    def emit(event: str, data: dict):
+        loop.call_soon_threadsafe(events.put_nowait, (event, data))
+
+    def task_info(index: int) -> dict:
+        return {"index": index, "description": tasks[index].description, "agent": tasks[index].agent.role if tasks[index].agent else None}
+
+    def on_task(output):
+        index = finished["count"]
+        finished["count"] += 1
+        emit("task_finished", {**task_info(index), "raw": output.raw, "json_dict": structured_output(output)})
+        if finished["count"] < len(tasks):
+            emit("task_started", task_info(finished["count"]))
+
+    def on_step(step):
+        emit("step", {"task_index": finished["count"], "text": _truncate(_step_text(step))})
+
+    def on_start(crew):
+        tasks.extend(crew.tasks)
+        if tasks:
+            emit("task_started", task_info(0))
+
+    # Submitted before streaming starts, so a saturated executor can still be answered with a 429
+    tasks_token_usage = []
+    future = executor.submit(pool.kickoff, inputs, task_callback=on_task, step_callback=on_step, on_start=on_start, on_finish=tasks_token_usage.extend)
+    final = []
+
+    def finish(_):
+        # Runs when the crew finishes, whether the stream is still read or not
+        try:
+            result = future.result()
+            token_usage = result.token_usage.model_dump() if hasattr(result.token_usage, "model_dump") else result.token_usage
+            final.append(("result", {"raw": result.raw, "json_dict": structured_output(result), "token_usage": token_usage, "tasks_token_usage": tasks_token_usage,
+                                     "tasks_output": [{"description": output.description, "raw": output.raw} for output in result.tasks_output]}))
+        except (Exception, asyncio.CancelledError) as e:
+            final.append(("error", {"message": str(e) or type(e).__name__}))
+        try:
+            if on_done is not None:
+                on_done(*final[0])
+        finally:
+            events.put_nowait(None)
+
+    future.add_done_callback(finish)
+
+    async def progress():
+        while True:
+            item = await events.get()
+            if item is None:
+                break
+            yield item
+        yield final[0]
+
+    return progress()
+
+def iter_request_text(request, loop: asyncio.AbstractEventLoop) -> Iterator[str]:
+    """
+    Read the body of a request as UTF-8 text pieces, from a thread other than the event loop's.
+
+    Each piece is pulled from the event loop only when the consumer asks for it, so a large body is
+    never held in memory as a whole: only the piece being processed is.
+
+    Args:
+        request: The Starlette request whose body is read.
+        loop (asyncio.AbstractEventLoop): The event loop serving the request.
+    """
+    decoder = codecs.getincrementaldecoder("utf-8")(errors="replace")
+    body = request.stream().__aiter__()
+
+    async def next_piece():
+        try:
+            return await body.__anext__()
+        except StopAsyncIteration:
+            return None
+
+    while True:
+        data = asyncio.run_coroutine_threadsafe(next_piece(), loop).result()
+        if data is None:
+            tail = decoder.decode(b"", final=True)
+            if tail:
+                yield tail
+            return
+        text = decoder.decode(data)
+        if text:
+            yield text
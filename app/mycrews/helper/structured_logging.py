@@ -0,0 +1,211 @@
+import atexit
+import contextvars
+import copy
+import json
+import logging
+import logging.handlers
+import os
+import queue
+import random
+import sys
+import time
+import uuid
+from typing import Dict, Optional
+
+# Logging settings: root level, per-logger levels ("crewai=WARNING,app.access=INFO"), output format (json or text),
+# longest logged field value, share of DEBUG payload records kept and records buffered before dropping
+LOG_LEVEL = os.getenv("LOG_LEVEL", "INFO").upper()
+LOG_LEVELS = os.getenv("LOG_LEVELS", "httpx=WARNING,LiteLLM=WARNING,crewai=WARNING")
+LOG_FORMAT = os.getenv("LOG_FORMAT", "json")
+LOG_MAX_FIELD_LENGTH = int(os.getenv("LOG_MAX_FIELD_LENGTH", "2000"))
+LOG_PAYLOAD_SAMPLE_RATE = float(os.getenv("LOG_PAYLOAD_SAMPLE_RATE", "0.1"))
+LOG_QUEUE_SIZE = int(os.getenv("LOG_QUEUE_SIZE", "10000"))
+
+# Console output of crews and agents (crewai verbose mode), synchronous and very large, so off unless asked for
+CREW_VERBOSE = os.getenv("CREW_VERBOSE", "0") == "1"
+
+# Correlation ids of the current request and task, added to every record logged while they are set.
+# Context variables follow asyncio tasks, and executor calls (see executor.py) copy them into their thread.
+request_id_var: contextvars.ContextVar[Optional[str]] = contextvars.ContextVar("request_id", default=None)
+task_id_var: contextvars.ContextVar[Optional[str]] = contextvars.ContextVar("task_id", default=None)
+
+def truncate(value, limit: int = LOG_MAX_FIELD_LENGTH):
+    """Value as logged: strings (and reprs of other objects) longer than `limit` are cut, with the cut size."""
+    if value is None or isinstance(value, (bool, int, float)):
+        return value
+    if isinstance(value, (dict, list)):
+        try:
+            value = json.dumps(value, default=str, ensure_ascii=False)
+        except (TypeError, ValueError):
+            value = str(value)
+    text = value if isinstance(value, str) else str(value)
+    if len(text) > limit:
+        return f"{text[:limit]}... [{len(text) - limit} more characters]"
+    return text
+
+def log_payload(logger: logging.Logger, message: str, **fields):
+    """
+    Log large values (crew outputs, task outputs, prompts) at DEBUG, for a LOG_PAYLOAD_SAMPLE_RATE share of calls.
+
+    Nothing is converted to text unless the record is kept, so a disabled DEBUG level costs a level check.
+    """
+    if not logger.isEnabledFor(logging.DEBUG) or random.random() >= LOG_PAYLOAD_SAMPLE_RATE:
+        return
+    logger.debug(message, extra={"fields": {name: truncate(value) for name, value in fields.items()}})
+
+class ContextFilter(logging.Filter):
+    """Add the request and task ids of the current context to every record."""
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        record.request_id = request_id_var.get()
+        record.task_id = task_id_var.get()
+        return True
+
+class JsonFormatter(logging.Formatter):
+    """One JSON object per line: time, level, logger, message, correlation ids, extra fields and exception."""
+
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            "time": self.formatTime(record, "%Y-%m-%dT%H:%M:%S") + f".{int(record.msecs):03d}",
+            "level": record.levelname,
+            "logger": record.name,
+            "message": truncate(record.getMessage()),
+        }
+        for name in ("request_id", "task_id"):
+            if getattr(record, name, None):
+                entry[name] = getattr(record, name)
+        entry.update(getattr(record, "fields", None) or {})
+        if record.exc_info:
+            entry["exception"] = self.formatException(record.exc_info)
+        elif record.exc_text:
+            entry["exception"] = record.exc_text
+        return json.dumps(entry, default=str, ensure_ascii=False)
+
+class TextFormatter(logging.Formatter):
+    """Human readable lines for local runs, with the correlation ids and extra fields after the message."""
+
+    def __init__(self):
+        super().__init__("%(asctime)s %(levelname)s %(name)s: %(message)s")
+
+    def format(self, record: logging.LogRecord) -> str:
+        line = super().format(record)
+        fields = {name: getattr(record, name, None) for name in ("request_id", "task_id")}
+        fields.update(getattr(record, "fields", None) or {})
+        extra = " ".join(f"{name}={value}" for name, value in fields.items() if value is not None)
+        return f"{line} [{extra}]" if extra else line
+
+class DroppingQueueHandler(logging.handlers.QueueHandler):
+    """
+    Queue handler that never blocks the caller: when the queue is full the record is dropped and counted.
+
+    Records are only prepared in the calling thread (message merged with its arguments and exception text
+    rendered); formatting and console writes happen in the listener thread.
+    """
+
+    def __init__(self, log_queue: queue.Queue):
+        super().__init__(log_queue)
+        self.dropped = 0
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        # Other handlers (e.g. test log capture) may still use the original record
+        record = copy.copy(record)
+        if record.exc_info and not record.exc_text:
+            record.exc_text = logging.Formatter().formatException(record.exc_info)
+        record.msg = record.getMessage()
+        record.args = None
+        record.exc_info = None
+        return record
+
+    def enqueue(self, record: logging.LogRecord):
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+
+def parse_levels(levels: str) -> Dict[str, str]:
+    """Per-logger levels from "name=LEVEL" pairs separated by commas."""
+    parsed = {}
+    for pair in filter(None, (pair.strip() for pair in levels.split(","))):
+        name, separator, level = pair.partition("=")
+        if not separator or not name.strip():
+            raise ValueError(f"Invalid LOG_LEVELS entry '{pair}', expected logger=LEVEL")
+        parsed[name.strip()] = level.strip().upper()
+    return parsed
+
+_listener: Optional[logging.handlers.QueueListener] = None
+
+def setup_logging(level: str = LOG_LEVEL, levels: str = LOG_LEVELS, log_format: str = LOG_FORMAT,
+                  stream=None) -> DroppingQueueHandler:
+    """
+    Route the root logger through a bounded queue to a single listener thread writing to `stream` (stderr).
+
+    Calling it again replaces the previous setup. Returns the queue handler, whose `dropped` counter tells how
+    many records were lost to a full queue.
+    """
+    global _listener
+    if log_format not in ("json", "text"):
+        raise ValueError(f"Invalid LOG_FORMAT '{log_format}'. Available options: ['json', 'text']")
+    stop_logging()
+
+    output = logging.StreamHandler(stream or sys.stderr)
+    output.setFormatter(JsonFormatter() if log_format == "json" else TextFormatter())
+    log_queue = queue.Queue(LOG_QUEUE_SIZE)
+    handler = DroppingQueueHandler(log_queue)
+    handler.addFilter(ContextFilter())
+
+    root = logging.getLogger()
+    for previous in [h for h in root.handlers if isinstance(h, DroppingQueueHandler)]:
+        root.removeHandler(previous)
+    root.addHandler(handler)
+    root.setLevel(level)
+    for name, logger_level in parse_levels(levels).items():
+        logging.getLogger(name).setLevel(logger_level)
+
+    _listener = logging.handlers.QueueListener(log_queue, output, respect_handler_level=True)
+    _listener.start()
+    return handler
+
+def stop_logging():
+    """Write the records still queued and stop the listener thread."""
+    global _listener
+    if _listener is not None:
+        _listener.stop()
+        _listener = None
+
+atexit.register(stop_logging)
+
+class RequestContextMiddleware:
+    """
+    ASGI middleware giving every HTTP request a request id and logging one access record when it ends.
+
+    The id comes from the X-Request-ID header when the client sends one, and is sent back in the response.
+    Access records go to the "app.access" logger with the method, path, status and duration.
+    """
+
+    def __init__(self, app):
+        self.app = app
+        self.logger = logging.getLogger("app.access")
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+
+        headers = dict(scope.get("headers") or [])
+        request_id = headers.get(b"x-request-id", b"").decode("latin-1")[:128] or uuid.uuid4().hex
+        token = request_id_var.set(request_id)
+        start = time.perf_counter()
+        status = {"code": 500}
+
+        async def send_with_request_id(message):
+            if message["type"] == "http.response.start":
+                status["code"] = message["status"]
+                message["headers"] = list(message.get("headers", [])) + [(b"x-request-id", request_id.encode("latin-1"))]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_request_id)
+        finally:
+            if self.logger.isEnabledFor(logging.INFO):
+                self.logger.info("%s %s %s", scope["method"], scope["path"], status["code"], extra={"fields": {
+                    "status": status["code"], "duration_ms": round((time.perf_counter() - start) * 1000, 2)}})
+            request_id_var.reset(token)
@@ -0,0 +1,172 @@
+import ast
+import json
+import os
+from typing import Any, Iterator, List, Optional, Tuple, Type, TypeVar
+
+from pydantic import BaseModel, ValidationError
+
+from app.mycrews.helper.metrics import metrics
+
+# LLM conversions tried by crews when an output can't be parsed or repaired locally (0 never calls the LLM again)
+STRUCTURED_OUTPUT_LLM_ATTEMPTS = int(os.getenv("STRUCTURED_OUTPUT_LLM_ATTEMPTS", "1"))
+
+# Outcomes of the crew outputs that were not plain JSON, by output model: parsed around other text, repaired locally,
+# converted by the LLM, or failed
+structured_output_total = metrics.counter("structured_output_total", "Crew outputs that were not plain JSON by output model and outcome (parsed, repaired, converted or failed).", ("model", "outcome"))
+
+Model = TypeVar("Model", bound=BaseModel)
+
+CLOSERS = {"{": "}", "[": "]"}
+
+# Lenient decoder: LLMs often put raw newlines and tabs inside strings
+_decoder = json.JSONDecoder(strict=False)
+
+class StructuredOutputError(ValueError):
+    """
+    Raised when no JSON object matching the output model can be read from an LLM output, even after repair.
+    """
+
+    def __init__(self, model: Type[BaseModel], raw: str, reason: str):
+        excerpt = raw if len(raw) <= 200 else f"{raw[:200]}..."
+        super().__init__(f"Invalid {model.__name__} output: {reason}. Output: {excerpt!r}")
+        self.model = model
+        self.raw = raw
+
+def _scan_object(text: str, start: int) -> Tuple[int, Optional[bool]]:
+    # End of the object opened at `start`, skipping brackets inside strings: complete (True), still open at the
+    # end of the text (False), or mismatched brackets (None, with the index to resume the search from)
+    stack: List[str] = []
+    in_string = escaped = False
+    for index in range(start, len(text)):
+        char = text[index]
+        if in_string:
+            if escaped:
+                escaped = False
+            elif char == "\\":
+                escaped = True
+            elif char == '"':
+                in_string = False
+        elif char == '"':
+            in_string = True
+        elif char in CLOSERS:
+            stack.append(CLOSERS[char])
+        elif char in "}]":
+            if char != stack.pop():
+                return index + 1, None
+            if not stack:
+                return index + 1, True
+    return len(text), False
+
+def iter_json_objects(text: str) -> Iterator[Tuple[str, Any, bool]]:
+    """
+    Top-level JSON object candidates of a text, in order, in linear time.
+
+    Each object is decoded where it starts by the (C) JSON decoder, and the search resumes after it, so text
+    around the objects (prefixes such as "Final Answer:", Markdown fences, comments) is skipped. An object that
+    is not valid JSON is delimited by a bracket scanner, ignoring brackets inside strings, and yielded without
+    value for repair; one still open at the end of the text (a truncated output) is yielded last.
+
+    Yields:
+        Tuple[str, Any, bool]: The candidate, its decoded value (None when it is not valid JSON) and whether
+        it is complete.
+    """
+    index = text.find("{")
+    while index != -1:
+        try:
+            value, end = _decoder.raw_decode(text, index)
+            yield text[index:end], value, True
+        except ValueError:
+            end, complete = _scan_object(text, index)
+            if complete is not None:
+                yield text[index:end], None, complete
+        index = text.find("{", end)
+
+def repair_json(candidate: str, complete: bool = True) -> str:
+    """
+    Cheap repairs of an almost valid JSON object, in a single pass: trailing commas are removed, and a
+    truncated object gets its string and brackets closed.
+    """
+    parts = []
+    stack: List[str] = []
+    in_string = escaped = False
+    pending_comma = None
+    for char in candidate:
+        if in_string:
+            parts.append(char)
+            if escaped:
+                escaped = False
+            elif char == "\\":
+                escaped = True
+            elif char == '"':
+                in_string = False
+            continue
+        if pending_comma is not None:
+            if char.isspace():
+                pending_comma.append(char)
+                continue
+            # A comma right before a closing bracket is dropped
+            parts.append("".join(pending_comma) if char not in "}]" else "".join(pending_comma[1:]))
+            pending_comma = None
+        if char == ",":
+            pending_comma = [char]
+            continue
+        parts.append(char)
+        if char == '"':
+            in_string = True
+        elif char in CLOSERS:
+            stack.append(CLOSERS[char])
+        elif char in "}]" and stack:
+            stack.pop()
+    if not complete:
+        if in_string:
+            parts.append('"')
+        parts.extend(reversed(stack))
+    return "".join(parts)
+
+def parse_structured_output(raw: str, model: Type[Model]) -> Tuple[Model, str]:
+    """
+    Read the first JSON object of an LLM output that validates against `model`, without calling the LLM.
+
+    Every object candidate is tried in order (see iter_json_objects). A candidate that is not valid JSON gets
+    one cheap repair attempt: `repair_json`, then Python literal syntax (single quotes, True/None) through
+    ast.literal_eval.
+
+    Returns:
+        Tuple[BaseModel, str]: The validated output and how it was obtained, "parsed" or "repaired".
+
+    Raises:
+        StructuredOutputError: If no candidate validates.
+    """
+    reason = "no JSON object found"
+    for candidate, value, complete in iter_json_objects(raw):
+        try:
+            if value is not None:
+                return model.model_validate(value), "parsed"
+            return model.model_validate(_decoder.decode(repair_json(candidate, complete))), "repaired"
+        except ValidationError as e:
+            reason = f"{e.error_count()} validation errors"
+        except ValueError as e:
+            reason = f"invalid JSON ({e})"
+            try:
+                return model.model_validate(ast.literal_eval(candidate)), "repaired"
+            except (ValueError, SyntaxError, TypeError, MemoryError, RecursionError):
+                pass
+    raise StructuredOutputError(model, raw, reason)
+
+def read_structured_output(raw: str, model: Type[Model], output=None) -> Model:
+    """
+    Structured output of a crew: `output`, the structured output the crew produced (a model instance or its
+    dict) when there is one, otherwise parsed from its raw output.
+
+    Raises:
+        StructuredOutputError: If the raw output holds no valid object either.
+    """
+    if isinstance(output, model):
+        return output
+    if output:
+        try:
+            return model.model_validate(output)
+        except ValidationError:
+            pass
+    # Outcomes are counted by the converter, which already saw this output
+    return parse_structured_output(raw, model)[0]
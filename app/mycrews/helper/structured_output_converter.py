@@ -0,0 +1,36 @@
+import logging
+
+from crewai.utilities.converter import Converter, ConverterError
+
+from app.mycrews.helper.structured_output import STRUCTURED_OUTPUT_LLM_ATTEMPTS, StructuredOutputError, parse_structured_output, structured_output_total
+
+logger = logging.getLogger(__name__)
+
+# Kept apart from structured_output, which the API imports to read crew outputs without loading crewai
+class StructuredOutputConverter(Converter):
+    """
+    Output converter of the crew tasks bound to an output model (Task.converter_cls).
+
+    Crews call it when the task output is not plain valid JSON. It parses and repairs the output locally first,
+    and only then asks the LLM to convert it, at most STRUCTURED_OUTPUT_LLM_ATTEMPTS times. When everything
+    fails the raw output is kept (and read_structured_output reports the failure) instead of failing the crew.
+    """
+
+    def to_pydantic(self, current_attempt=1):
+        try:
+            output, outcome = parse_structured_output(self.text, self.model)
+            structured_output_total.inc(model=self.model.__name__, outcome=outcome)
+            return output
+        except StructuredOutputError as e:
+            logger.warning("%s", e)
+        if STRUCTURED_OUTPUT_LLM_ATTEMPTS < 1:
+            structured_output_total.inc(model=self.model.__name__, outcome="failed")
+            return ConverterError(f"Could not parse a {self.model.__name__} output")
+        self.max_attempts = STRUCTURED_OUTPUT_LLM_ATTEMPTS
+        try:
+            output = super().to_pydantic(current_attempt)
+        except ConverterError as e:
+            structured_output_total.inc(model=self.model.__name__, outcome="failed")
+            return e
+        structured_output_total.inc(model=self.model.__name__, outcome="converted")
+        return output
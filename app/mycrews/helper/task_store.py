@@ -0,0 +1,194 @@
+import abc
+import json
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Optional
+
+# Task store settings: backend ("memory" or "sqlite"), how long results are kept, how many results the
+# memory backend holds, where the SQLite database lives and how often expired results are removed
+TASK_STORE_BACKEND = os.getenv("TASK_STORE_BACKEND", "memory")
+TASK_STORE_TTL_SECONDS = float(os.getenv("TASK_STORE_TTL_SECONDS", "86400"))
+TASK_STORE_MAX_ENTRIES = int(os.getenv("TASK_STORE_MAX_ENTRIES", "10000"))
+TASK_STORE_PATH = os.getenv("TASK_STORE_PATH", "task_store.sqlite3")
+TASK_STORE_CLEANUP_INTERVAL_SECONDS = float(os.getenv("TASK_STORE_CLEANUP_INTERVAL_SECONDS", "60"))
+
+class TaskStore(abc.ABC):
+    """
+    Storage of task status and results, keyed by task id.
+
+    Records are dictionaries with "status" and "result", as in the former `task_storage` dict, and the
+    store keeps the same dictionary interface: `store[task_id] = record`, `store[task_id]`,
+    `task_id in store` and `store.get(task_id)`. Results must be JSON serializable. Every record expires
+    `ttl_seconds` after its last update and `purge_expired` removes expired records.
+    """
+
+    def __init__(self, ttl_seconds: float = TASK_STORE_TTL_SECONDS):
+        self.ttl_seconds = ttl_seconds
+
+    @abc.abstractmethod
+    def set(self, task_id: str, status: str, result: Any = None, **fields):
+        """Create or replace the record of a task. Extra fields are stored alongside status and result."""
+
+    @abc.abstractmethod
+    def get(self, task_id: str) -> Optional[dict]:
+        """Return the record of a task, or None when it does not exist or has expired."""
+
+    @abc.abstractmethod
+    def delete(self, task_id: str) -> bool:
+        ...
+
+    @abc.abstractmethod
+    def purge_expired(self) -> int:
+        """Remove expired records, returning how many were removed."""
+
+    @abc.abstractmethod
+    def __len__(self) -> int:
+        ...
+
+    def __setitem__(self, task_id: str, record: dict):
+        record = dict(record)
+        self.set(task_id, record.pop("status"), record.pop("result", None), **record)
+
+    def __getitem__(self, task_id: str) -> dict:
+        record = self.get(task_id)
+        if record is None:
+            raise KeyError(task_id)
+        return record
+
+    def __contains__(self, task_id: str) -> bool:
+        return self.get(task_id) is not None
+
+    def _expires_at(self) -> float:
+        return time.time() + self.ttl_seconds if self.ttl_seconds > 0 else float("inf")
+
+class MemoryTaskStore(TaskStore):
+    """
+    Task store in the memory of the current process, with TTL and LRU eviction.
+
+    Only suited to a single worker: other processes cannot see its records.
+
+    Args:
+        ttl_seconds (float, optional): Lifetime of a record after its last update. 0 keeps records forever.
+        max_entries (int, optional): Maximum number of records; the least recently used are evicted first.
+    """
+
+    def __init__(self, ttl_seconds: float = TASK_STORE_TTL_SECONDS, max_entries: int = TASK_STORE_MAX_ENTRIES):
+        super().__init__(ttl_seconds)
+        self.max_entries = max_entries
+        self._records = OrderedDict()  # task_id -> (expires_at, record)
+        self._lock = threading.Lock()
+
+    def set(self, task_id: str, status: str, result: Any = None, **fields):
+        record = {"status": status, "result": result, **fields}
+        with self._lock:
+            self._records[task_id] = (self._expires_at(), record)
+            self._records.move_to_end(task_id)
+            while len(self._records) > self.max_entries:
+                self._records.popitem(last=False)
+
+    def get(self, task_id: str) -> Optional[dict]:
+        with self._lock:
+            entry = self._records.get(task_id)
+            if entry is None:
+                return None
+            if entry[0] <= time.time():
+                del self._records[task_id]
+                return None
+            self._records.move_to_end(task_id)
+            return dict(entry[1])
+
+    def delete(self, task_id: str) -> bool:
+        with self._lock:
+            return self._records.pop(task_id, None) is not None
+
+    def purge_expired(self) -> int:
+        now = time.time()
+        with self._lock:
+            expired = [task_id for task_id, (expires_at, _) in self._records.items() if expires_at <= now]
+            for task_id in expired:
+                del self._records[task_id]
+        return len(expired)
+
+    def __len__(self) -> int:
+        return len(self._records)
+
+class SQLiteTaskStore(TaskStore):
+    """
+    Task store in a local SQLite database, shared by every worker process on the same host.
+
+    The database runs in WAL mode, so readers do not block the writer, and lookups go through the
+    primary key while expiration goes through an index on `expires_at`. Each thread uses its own connection.
+
+    Args:
+        path (str, optional): Path of the database file.
+        ttl_seconds (float, optional): Lifetime of a record after its last update. 0 keeps records forever.
+    """
+
+    def __init__(self, path: str = TASK_STORE_PATH, ttl_seconds: float = TASK_STORE_TTL_SECONDS):
+        super().__init__(ttl_seconds)
+        self.path = path
+        self._local = threading.local()
+        with self._connection() as connection:
+            connection.execute(
+                "CREATE TABLE IF NOT EXISTS tasks ("
+                " task_id TEXT PRIMARY KEY,"
+                " status TEXT NOT NULL,"
+                " result TEXT,"
+                " fields TEXT,"
+                " updated_at REAL NOT NULL,"
+                " expires_at REAL NOT NULL)"
+            )
+            connection.execute("CREATE INDEX IF NOT EXISTS tasks_expires_at ON tasks (expires_at)")
+
+    def _connection(self) -> sqlite3.Connection:
+        # Connections are per thread and per process, a forked worker must not reuse its parent's connection
+        connection = getattr(self._local, "connection", None)
+        if connection is None or self._local.pid != os.getpid():
+            connection = sqlite3.connect(self.path, timeout=30, isolation_level=None, check_same_thread=False)
+            connection.execute("PRAGMA journal_mode=WAL")
+            connection.execute("PRAGMA synchronous=NORMAL")
+            self._local.connection = connection
+            self._local.pid = os.getpid()
+        return connection
+
+    def set(self, task_id: str, status: str, result: Any = None, **fields):
+        self._connection().execute(
+            "INSERT INTO tasks (task_id, status, result, fields, updated_at, expires_at) VALUES (?, ?, ?, ?, ?, ?)"
+            " ON CONFLICT (task_id) DO UPDATE SET status = excluded.status, result = excluded.result,"
+            " fields = excluded.fields, updated_at = excluded.updated_at, expires_at = excluded.expires_at",
+            (task_id, status, json.dumps(result), json.dumps(fields) if fields else None, time.time(), self._expires_at()),
+        )
+
+    def get(self, task_id: str) -> Optional[dict]:
+        row = self._connection().execute(
+            "SELECT status, result, fields FROM tasks WHERE task_id = ? AND expires_at > ?", (task_id, time.time())
+        ).fetchone()
+        if row is None:
+            return None
+        status, result, fields = row
+        return {"status": status, "result": json.loads(result), **(json.loads(fields) if fields else {})}
+
+    def delete(self, task_id: str) -> bool:
+        return self._connection().execute("DELETE FROM tasks WHERE task_id = ?", (task_id,)).rowcount > 0
+
+    def purge_expired(self) -> int:
+        return self._connection().execute("DELETE FROM tasks WHERE expires_at <= ?", (time.time(),)).rowcount
+
+    def __len__(self) -> int:
+        return self._connection().execute("SELECT COUNT(*) FROM tasks WHERE expires_at > ?", (time.time(),)).fetchone()[0]
+
+def create_task_store(backend: str = TASK_STORE_BACKEND) -> TaskStore:
+    """
+    Create the task store selected by TASK_STORE_BACKEND.
+
+    Raises:
+        ValueError: If the backend is unknown.
+    """
+    if backend == "memory":
+        return MemoryTaskStore()
+    if backend == "sqlite":
+        return SQLiteTaskStore()
+    raise ValueError(f"Unknown task store backend '{backend}'. Available options: ['memory', 'sqlite']")
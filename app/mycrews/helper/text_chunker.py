@@ -0,0 +1,85 @@
+import re
+from typing import Iterable, Iterator, NamedTuple
+
+# Sentence ends, where a chunk is cut when there is no paragraph break nearby
+SENTENCE_BOUNDARY = re.compile(r"[.!?;]\s+|\n")
+
+class Chunk(NamedTuple):
+    """
+    A piece of a larger text.
+
+    `text` covers the characters [start, start + len(text)) of the whole text. It includes `overlap`
+    characters of context on both sides of the range [own_start, own_end) the chunk is responsible for,
+    so entities crossing a cut are seen whole by the chunk where they start.
+    """
+    start: int
+    own_start: int
+    own_end: int
+    text: str
+
+def _find_cut(buffer: str, start: int, chunk_size: int) -> int:
+    # Prefer the last paragraph break, then the last sentence end, then the last space in the second
+    # half of the chunk, so chunks never get too small. Cut anywhere as a last resort.
+    lower, upper = start + chunk_size // 2, start + chunk_size
+    paragraph = buffer.rfind("\n\n", lower, upper)
+    if paragraph != -1:
+        return paragraph + 2
+    sentence = None
+    for sentence in SENTENCE_BOUNDARY.finditer(buffer, lower, upper):
+        pass
+    if sentence is not None:
+        return sentence.end()
+    space = buffer.rfind(" ", lower, upper)
+    return space + 1 if space != -1 else upper
+
+def iter_chunks(pieces: Iterable[str], chunk_size: int, overlap: int = 0) -> Iterator[Chunk]:
+    """
+    Split a text given as a stream of pieces into overlapping chunks cut at paragraph or sentence boundaries.
+
+    Only about `chunk_size + 2 * overlap` characters (plus the current piece) are buffered at any time, so a
+    text of any size can be split while it is being read, e.g. from a request body.
+
+    Args:
+        pieces (Iterable[str]): The text, in pieces of any size. A plain string is a single piece.
+        chunk_size (int): Number of characters each chunk is responsible for, at most.
+        overlap (int, optional): Characters of context added on both sides of each chunk.
+
+    Returns:
+        Iterator[Chunk]: The chunks in text order. Their own ranges cover the whole text without gaps.
+    """
+    if chunk_size <= 0:
+        raise ValueError(f"chunk_size must be positive, got {chunk_size}")
+    if isinstance(pieces, str):
+        pieces = [pieces]
+
+    buffer = ""  # Text from the absolute offset buffer_start on
+    buffer_start = 0
+    own_start = 0
+    pieces = iter(pieces)
+    exhausted = False
+    while True:
+        # A chunk is emitted once its right context has been read, or at the end of the text
+        remaining = len(buffer) - (own_start - buffer_start)
+        if not exhausted and remaining < chunk_size + overlap:
+            piece = next(pieces, None)
+            if piece is None:
+                exhausted = True
+            else:
+                buffer += piece
+            continue
+        if exhausted and remaining <= chunk_size:
+            break
+
+        cut = _find_cut(buffer, own_start - buffer_start, chunk_size) + buffer_start
+        start = max(own_start - overlap, buffer_start)
+        yield Chunk(start, own_start, cut, buffer[start - buffer_start:cut + overlap - buffer_start])
+        own_start = cut
+        # Keep only the left context of the next chunk
+        dropped = max(own_start - overlap, buffer_start) - buffer_start
+        buffer = buffer[dropped:]
+        buffer_start += dropped
+
+    end = buffer_start + len(buffer)
+    if own_start < end or own_start == 0:
+        start = max(own_start - overlap, buffer_start)
+        yield Chunk(start, own_start, end, buffer[start - buffer_start:])
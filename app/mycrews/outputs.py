@@ -0,0 +1,20 @@
+from typing import List, Optional
+from pydantic import BaseModel, ConfigDict
+
+# Output models of the crew tasks. They import nothing from crewai, so the API can read crew outputs
+# without loading the crews.
+
+# Output of the entity recognizer task: entities keep every field the agent gives (e.g. "value" and offsets from the tool)
+class RecognizedEntity(BaseModel):
+    model_config = ConfigDict(extra="allow")
+
+    type: str
+    text: Optional[str] = None
+
+class EntityRecognizerOutput(BaseModel):
+    entities: List[RecognizedEntity]
+
+# Output of the poem analysis task
+class PoemAnalysisOutput(BaseModel):
+    poem: str
+    critical: str
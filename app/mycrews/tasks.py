@@ -1,20 +1,24 @@
-from crewai import Task
-from mycrews.agents import crewaiPoetAgent, crewaiPhilosofyAgent
+from crewai import Agent, Task
+from mycrews.outputs import PoemAnalysisOutput
+from app.mycrews.helper.structured_output_converter import StructuredOutputConverter
 
-# CrewAI Tasks
-crewaiCreatePoemTask = Task(
-  description =  "Create a poem based on theme: {text}.",
-  expected_output="a poem based on given theme",
-  agent=crewaiPoetAgent
-)  
+# Factories building new, unshared tasks, used by the crew pools (see helper/crew_pool.py)
+def create_poem_task(agent: Agent) -> Task:
+  return Task(
+    description =  "Create a poem based on theme: {text}.",
+    expected_output="a poem based on given theme",
+    agent=agent
+  )
 
-# CrewAI Tasks
-crewaiPoemAnalisysTask = Task(
-  description =  "Create a critical analisys of poem",
-  expected_output="""return a json {poem: str, critical: str}, 
-  'poem': is the entire poem created and 'critical' is the philosofy critical created. 
-  Nothing more is expected, only the json content.
-  No comment your work, just created the json with required content
-  """,
-  agent=crewaiPhilosofyAgent
-)
\ No newline at end of file
+def create_poem_analysis_task(agent: Agent) -> Task:
+  return Task(
+    description =  "Create a critical analisys of poem",
+    expected_output="""return a json {poem: str, critical: str}, 
+    'poem': is the entire poem created and 'critical' is the philosofy critical created. 
+    Nothing more is expected, only the json content.
+    No comment your work, just created the json with required content
+    """,
+    agent=agent,
+    output_pydantic=PoemAnalysisOutput,
+    converter_cls=StructuredOutputConverter
+  )
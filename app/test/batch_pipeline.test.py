@@ -0,0 +1,28 @@
+import asyncio
+
+from app.mycrews.helper.batch_pipeline import pipelined_map
+
+# Test header: Test that items move to their next stage as soon as they can.
+# This test verifies that concurrency is bounded, started items are finished before new ones begin, and a failed item skips its next stages.
+def test_pipelined_map():
+    calls, running = [], {"now": 0, "most": 0}
+
+    def stage(name):
+        async def run(value):
+            running["now"] += 1
+            running["most"] = max(running["most"], running["now"])
+            calls.append((name, value))
+            await asyncio.sleep(0.01)
+            running["now"] -= 1
+            if value == 2:
+                raise ValueError("bad item")
+            return value * 10
+        return run
+
+    stages = []
+    results = asyncio.run(pipelined_map([0, 1, 2, 3], (stage("first"), stage("second")), 2,
+                                        on_stage=lambda index, index_stage, value: stages.append((index, index_stage))))
+    assert running["most"] == 2
+    assert calls.index(("second", 0)) < calls.index(("first", 2))
+    assert results[:2] == [0, 100] and isinstance(results[2], ValueError) and results[3] == 300
+    assert (2, 1) not in stages and len(stages) == 7
@@ -0,0 +1,6 @@
+# Tests are named *.test.py and imported with --import-mode=importlib (see pytest.ini). Without this conftest,
+# pytest registers a stand-in "app" module for test/ and imports of app.mycrews fail.
+import os
+
+# app.main exits without an OpenAI key; tests never call the API, so any key does (like the benchmarks)
+os.environ.setdefault("OPENAI_API_KEY", "fake")
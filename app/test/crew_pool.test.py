@@ -0,0 +1,68 @@
+import threading
+from types import SimpleNamespace
+
+import pytest
+
+from app.mycrews.helper.crew_pool import CrewPool, CrewPoolTimeoutError
+
+def fake_crew():
+    agent = SimpleNamespace(llm=SimpleNamespace(model="gpt-4o"), step_callback=None)
+    task = SimpleNamespace(agent=agent, description="Summarize {topic}", callback=None)
+    return SimpleNamespace(agents=[agent], tasks=[task], task_callback=None, step_callback=None)
+
+# Test header: Test that concurrent executions get distinct crews.
+# This test verifies that crews are built lazily up to the pool size, never shared while in use, and reused afterwards.
+def test_acquire_isolates_and_reuses_crews():
+    pool = CrewPool("test", fake_crew, size=2, warmup=0)
+    with pool.acquire() as first, pool.acquire() as second:
+        assert first is not second
+        with pytest.raises(CrewPoolTimeoutError):
+            with pool.acquire(timeout=0.01):
+                pass
+    with pool.acquire() as again:
+        assert again in (first, second)
+    assert pool.stats()["created"] == 2
+    assert pool.models() == ["gpt-4o"]
+
+# Test header: Test that a waiting execution gets the crew released by another one.
+# This test verifies that callbacks set for an execution are cleared before the crew is handed out again.
+def test_release_clears_callbacks_and_wakes_waiters():
+    pool = CrewPool("test", fake_crew, size=1, warmup=1)
+    assert pool.warm_up() == 1
+    released = threading.Event()
+    with pool.acquire() as crew:
+        crew.step_callback = crew.agents[0].step_callback = print
+        waiter = threading.Thread(target=lambda: pool.acquire(timeout=5).__enter__() and released.set())
+        waiter.start()
+    waiter.join(timeout=5)
+    assert released.is_set()
+    assert crew.step_callback is None and crew.agents[0].step_callback is None
+    assert pool.stats()["waits"] == 1
+
+# Test header: Test that pool descriptions wait for the first crew build.
+# This test verifies that models and prompt tokens asked while the only crew is being built come from that crew, not empty values.
+def test_models_wait_for_the_build_in_flight():
+    building, release = threading.Event(), threading.Event()
+    def slow_crew():
+        building.set()
+        release.wait(5)
+        return fake_crew()
+    pool = CrewPool("test", slow_crew, size=1, warmup=0, acquire_timeout=5)
+    builder = threading.Thread(target=lambda: pool.acquire().__enter__())
+    builder.start()
+    building.wait(5)
+    threading.Timer(0.1, release.set).start()
+    assert pool.models() == ["gpt-4o"]
+    assert pool.prompt_tokens({"topic": "the news"}) > 0
+    builder.join()
+    assert pool.stats()["created"] == 1
+
+# Test header: Test that a warmed up pool describes itself without building crews.
+# This test verifies that warm_up builds the first crew even with no warmup, so models never builds nor waits afterwards.
+def test_warm_up_records_models_without_warmup():
+    builds = []
+    pool = CrewPool("test", lambda: builds.append(1) or fake_crew(), size=2, warmup=0)
+    assert pool.warm_up() == 1
+    assert pool.warm_up() == 0
+    assert pool.models() == ["gpt-4o"]
+    assert len(builds) == 1
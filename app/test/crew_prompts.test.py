@@ -0,0 +1,40 @@
+from types import SimpleNamespace
+
+import pytest
+
+from app.mycrews.helper import crew_prompts
+from app.mycrews.helper.crew_prompts import TokenBudgetExceededError, check_prompt_budget, compact_observation, split_to_budget
+
+def fake_pool(overhead: int = 100):
+    # Prompts of a crew whose text input adds one token per word
+    return SimpleNamespace(name="test", prompt_tokens=lambda inputs: overhead + len(inputs["text"].split()))
+
+# Test header: Test the token budget check of crew requests.
+# This test verifies that requests within budget pass, larger ones are rejected, and chunkable ones pass in "chunk" mode.
+def test_check_prompt_budget(monkeypatch):
+    pool = fake_pool()
+    assert check_prompt_budget(pool, {"text": "word " * 50}, budget=200) == 150
+    with pytest.raises(TokenBudgetExceededError) as error:
+        check_prompt_budget(pool, {"text": "word " * 500}, chunkable=True, budget=200)
+    assert error.value.tokens == 600
+    monkeypatch.setattr(crew_prompts, "CREW_OVER_BUDGET", "chunk")
+    assert check_prompt_budget(pool, {"text": "word " * 500}, chunkable=True, budget=200) == 600
+
+# Test header: Test the split of a text over the token budget.
+# This test verifies that every piece fits the budget, and the pieces cover the whole text in order.
+def test_split_to_budget():
+    pool = fake_pool()
+    text = " ".join(f"Frase {index} termina aqui." for index in range(200))
+    pieces = split_to_budget(pool, text, budget=300)
+    assert len(pieces) > 1
+    assert all(pool.prompt_tokens({"text": piece}) <= 300 for piece in pieces)
+    assert "".join(pieces) == text
+    assert split_to_budget(pool, "curto", budget=300) == ["curto"]
+
+# Test header: Test the compact tool observation.
+# This test verifies that entities are listed once without offsets, and a long list is cut with a note.
+def test_compact_observation():
+    entities = [{"value": "Petrobras", "type": "ORG", "label": "ORG", "start": index, "end": index + 9} for index in range(3)]
+    entities.append({"value": "Maria", "type": "PERSON", "label": "PER", "start": 40, "end": 45})
+    assert compact_observation(entities) == '[{"text":"Petrobras","type":"ORG"},{"text":"Maria","type":"PERSON"}]'
+    assert compact_observation(entities, max_chars=40) == '[{"text":"Petrobras","type":"ORG"}] (1 more entities left out)'
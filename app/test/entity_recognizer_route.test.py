@@ -0,0 +1,104 @@
+import asyncio
+import json
+from types import SimpleNamespace
+
+from starlette.requests import Request
+
+from app import main
+from app.mycrews.helper.entity_router import RoutingStats, escalation_reason
+
+SPACY_ENTITIES = [{"value": "Maria", "type": "PERSON", "label": "PER", "start": 0, "end": 5}]
+CREW_ENTITIES = [{"value": "Maria", "type": "PERSON"}, {"value": "Lisboa", "type": "LOCATION"}]
+
+def route(path: str):
+    return next(route.endpoint for route in main.app.routes if getattr(route, "path", None) == path)
+
+def recognize(monkeypatch, coverage: float, **fields):
+    # Calls the routed entity recognizer with Spacy giving `coverage` and a crew, without models nor LLM.
+    # Returns the response and the paths called, in order.
+    calls = []
+    def spacy(fulltext, lang, types):
+        calls.append("spacy")
+        return SPACY_ENTITIES, coverage
+    def crew(pool, fulltext, types):
+        calls.append("crew")
+        return CREW_ENTITIES, {"total_tokens": 10}
+    async def aget():
+        return SimpleNamespace(models=lambda: ["gpt-4o"])
+    monkeypatch.setattr(main, "spacy_entity_recognizer_with_coverage", spacy)
+    monkeypatch.setattr(main, "run_entity_recognizer_crew", crew)
+    monkeypatch.setattr(main, "entity_recognizer_pool", SimpleNamespace(aget=aget))
+    monkeypatch.setattr(main, "check_prompt_budget", lambda *args: 0)
+    monkeypatch.setattr(main, "ENTITY_ROUTING_MIN_COVERAGE", 0.5)
+    monkeypatch.setattr(main, "routing_stats", RoutingStats())
+
+    http_request = Request({"type": "http", "method": "POST", "path": "/crewai/entityRecognizer", "headers": [(b"cache-control", b"no-store")]})
+    request = main.EntityRecognizerRoutedRequest(fulltext="Maria mora em Lisboa.", **fields)
+    return asyncio.run(route("/crewai/entityRecognizer")(request, SimpleNamespace(), http_request)), calls
+
+def reasons() -> dict:
+    return {served_by: entry["reasons"] for served_by, entry in main.routing_stats.stats()["served_by"].items()}
+
+# Test header: Test why requests escalate from Spacy.
+# This test verifies that languages without a Spacy model and types Spacy doesn't recognize are escalated, and others are not.
+def test_escalation_reason():
+    assert escalation_reason("pt", []) is None
+    assert escalation_reason("pt", ["person", "LOCATION"]) is None
+    assert escalation_reason("xx", []) == "language"
+    assert escalation_reason("pt", ["PERSON", "MONEY"]) == "types"
+
+# Test header: Test the coverage threshold of auto routing.
+# This test verifies that Spacy answers at or above ENTITY_ROUTING_MIN_COVERAGE, and that a lower coverage escalates to the crew.
+def test_auto_routing_coverage_threshold(monkeypatch):
+    response, calls = recognize(monkeypatch, 0.5, routing="auto")
+    assert calls == ["spacy"]
+    assert (response.served_by, response.result, response.coverage) == ("spacy", SPACY_ENTITIES, 0.5)
+    assert reasons() == {"spacy": {"auto": 1}}
+
+    response, calls = recognize(monkeypatch, 0.25, routing="auto")
+    assert calls == ["spacy", "crew"]
+    assert (response.served_by, response.result, response.coverage) == ("crew", CREW_ENTITIES, 0.25)
+    assert main.task_storage[response.task_id]["served_by"] == "crew"
+    assert reasons() == {"crew": {"coverage": 1}}
+
+# Test header: Test auto routing of types Spacy doesn't recognize.
+# This test verifies that the crew gets the request without running Spacy.
+def test_auto_routing_escalates_unsupported_types(monkeypatch):
+    response, calls = recognize(monkeypatch, 1.0, routing="auto", types=["PERSON", "MONEY"])
+    assert calls == ["crew"]
+    assert response.served_by == "crew" and response.coverage is None
+    assert reasons() == {"crew": {"types": 1}}
+
+# Test header: Test the forced routing modes.
+# This test verifies that "spacy" answers from Spacy whatever the coverage, rejects what Spacy can't serve, and "crew" always runs the crew.
+def test_forced_routing_modes(monkeypatch):
+    response, calls = recognize(monkeypatch, 0.0, routing="spacy")
+    assert calls == ["spacy"] and response.served_by == "spacy"
+    assert reasons() == {"spacy": {"requested": 1}}
+
+    response, calls = recognize(monkeypatch, 0.0, routing="spacy", types=["MONEY"])
+    assert calls == [] and response.status_code == 400
+
+    response, calls = recognize(monkeypatch, 1.0, routing="crew")
+    assert calls == ["crew"] and response.served_by == "crew"
+    assert reasons() == {"crew": {"requested": 1}}
+
+# Test header: Test that a failing entity recognizer crew answers a JSON 500.
+# This test verifies that the synchronous route stores the task as failed and returns the error, instead of raising.
+def test_failing_crew_answers_500_and_stores_failure(monkeypatch):
+    def failing_crew(pool, fulltext, types):
+        raise RuntimeError("LLM unavailable")
+    async def aget():
+        return SimpleNamespace(models=lambda: ["gpt-4o"])
+    monkeypatch.setattr(main, "run_entity_recognizer_crew", failing_crew)
+    monkeypatch.setattr(main, "entity_recognizer_pool", SimpleNamespace(aget=aget))
+    monkeypatch.setattr(main, "check_prompt_budget", lambda *args: 0)
+
+    http_request = Request({"type": "http", "method": "POST", "path": "/crewai/entityRecognizer", "headers": [(b"cache-control", b"no-store")]})
+    request = main.EntityRecognizerRoutedRequest(fulltext="Maria mora em Lisboa.", routing="crew")
+    response = asyncio.run(route("/crewai/entityRecognizer")(request, SimpleNamespace(), http_request))
+
+    body = json.loads(response.body)
+    assert response.status_code == 500
+    assert body["message"] == "Error processing request: LLM unavailable"
+    assert main.task_storage[body["task_id"]] == {"status": "failed", "result": "LLM unavailable", "served_by": "crew"}
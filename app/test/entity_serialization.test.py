@@ -0,0 +1,22 @@
+import json
+
+from app.mycrews.helper.entity_serialization import FastJSONResponse, entity_columns, format_entities
+
+ENTITIES = [
+    {"value": "Maria Silva", "type": "PERSON", "label": "PER", "start": 0, "end": 11},
+    {"value": 12500.0, "type": "MONEY", "unit": "BRL", "start": 20, "end": 32},
+]
+
+# Test header: Test the columnar entity format.
+# This test verifies that item i of every array describes entity i, and that the object format is returned as is.
+def test_entity_columns():
+    assert entity_columns(ENTITIES) == {"values": ["Maria Silva", 12500.0], "types": ["PERSON", "MONEY"], "starts": [0, 20], "ends": [11, 32]}
+    assert entity_columns([]) == {"values": [], "types": [], "starts": [], "ends": []}
+    assert format_entities(ENTITIES, "objects") is ENTITIES
+
+# Test header: Test the fast JSON response.
+# This test verifies that the body is compact UTF-8 JSON holding the same content.
+def test_fast_json_response_body():
+    body = FastJSONResponse({"entities": ENTITIES}).body
+    assert json.loads(body) == {"entities": ENTITIES}
+    assert b" " not in body.replace(b"Maria Silva", b"")
@@ -0,0 +1,47 @@
+import asyncio
+import threading
+
+import pytest
+
+from app.mycrews.helper.executor import BoundedExecutor, ExecutorSaturatedError
+
+# Test header: Test that a full executor rejects calls instead of queueing them.
+# This test verifies that the call after max_workers running and max_pending - max_workers queued ones is rejected right away,
+# that the rejection holds no slot, and that slots come back once the calls finish.
+def test_full_executor_rejects_and_releases_slots():
+    executor = BoundedExecutor("test", max_workers=2, max_pending=5)
+    release = threading.Event()
+
+    async def scenario():
+        futures = [executor.submit(release.wait, 5) for _ in range(executor.max_pending)]
+        assert executor.pending == 5
+        with pytest.raises(ExecutorSaturatedError) as saturated:
+            executor.submit(release.wait, 5)
+        assert saturated.value.max_pending == 5
+        assert executor.pending == 5  # The rejected call took no slot
+
+        release.set()
+        await asyncio.gather(*futures)
+        assert executor.pending == 0
+        # Every slot is free again, the rejected call included
+        return await asyncio.gather(*(executor.run(lambda: True) for _ in range(executor.max_pending)))
+
+    try:
+        assert asyncio.run(scenario()) == [True] * 5
+    finally:
+        release.set()
+        executor.shutdown()
+
+# Test header: Test that a call the pool fails to start gives its slot back.
+# This test verifies that a submission to a shut down executor raises without keeping the slot it took.
+def test_failed_submission_releases_slot():
+    executor = BoundedExecutor("test", max_workers=1, max_pending=1)
+    executor.shutdown()
+
+    async def scenario():
+        for _ in range(2):
+            with pytest.raises(RuntimeError):
+                executor.submit(print)
+            assert executor.pending == 0
+
+    asyncio.run(scenario())
@@ -142,6 +142,14 @@ def test_currency_words_extraction_with_centavos():
                for res in results)
     assert found, "Currency words extraction with centavos failed."
 
+# Test header: Test centavos following a plain number.
+# This test verifies that "e N centavos" is only read as the cents of a currency, not swallowed by the number before it.
+# Example text: "1 e 2 centavos"
+# Expected values: 1.0 with type "NUMBER" and source "1", and 0.02 BRL with type "MONEY" and source "2 centavos"
+def test_centavos_after_plain_number():
+    results = extract_numeric_values("1 e 2 centavos")
+    assert [(res["type"], res["value"], res["source"]) for res in results] == [("NUMBER", 1.0, "1"), ("MONEY", 0.02, "2 centavos")]
+
 # Test header: Test extraction of multiple monetary values expressed in words in the same sentence.
 # This test verifies that multiple currency amounts in the same sentence are processed separately.
 # Example text: "maria vendeu uma gata por vinte e tres reais e sophia comprou um cachorro por vinte e sete doláres"
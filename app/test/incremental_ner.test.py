@@ -0,0 +1,38 @@
+import re
+
+from app.mycrews.helper import incremental_ner
+from app.mycrews.helper.incremental_ner import spacy_entity_recognizer_incremental, split_paragraphs
+from app.mycrews.helper.result_cache import ResultCache
+
+def fake_batch(documents):
+    # Capitalized words as entities, recording the texts sent to Spacy
+    fake_batch.texts.extend(document["text"] for document in documents)
+    return [[{"value": match.group(), "type": "PERSON", "label": "PER", "start": match.start(), "end": match.end()}
+             for match in re.finditer(r"[A-Z]\w+", document["text"])] for document in documents]
+
+# Test header: Test the split of a text into paragraphs.
+# This test verifies that paragraphs are separated by blank lines, which are left out, and single line breaks are kept.
+def test_split_paragraphs():
+    text = "Primeiro\nparágrafo.\n\n  \nSegundo.\n\nTerceiro.\n"
+    assert [text[start:end] for start, end in split_paragraphs(text)] == ["Primeiro\nparágrafo.", "Segundo.", "Terceiro.\n"]
+    assert split_paragraphs("") == []
+
+# Test header: Test the incremental recognition of an edited document.
+# This test verifies that only new or changed paragraphs go through Spacy, reused entities get the offsets of the new text, and other types reuse the paragraphs.
+def test_incremental_recognition(monkeypatch):
+    fake_batch.texts = []
+    monkeypatch.setattr(incremental_ner, "spacy_entity_recognizer_batch", fake_batch)
+    cache = ResultCache(max_entries=100, ttl_seconds=0, disk_path="")
+    original = "Maria mora em Lisboa.\n\nJoão trabalha na Petrobras.\n\nAna visitou Curitiba."
+    entities, reuse = spacy_entity_recognizer_incremental(original, "pt", [], cache=cache)
+    assert len(fake_batch.texts) == 3 and reuse["reused_paragraphs"] == 0
+
+    fake_batch.texts = []
+    edited = "Novo parágrafo sobre Recife.\n\n" + original.replace("Ana visitou", "Ana e Pedro visitaram")
+    entities, reuse = spacy_entity_recognizer_incremental(edited, "pt", [], cache=cache)
+    assert fake_batch.texts == ["Novo parágrafo sobre Recife.", "Ana e Pedro visitaram Curitiba."]
+    assert reuse == {"paragraphs": 4, "reused_paragraphs": 2, "recognized_paragraphs": 2, "characters": len(edited),
+                     "recognized_characters": 59}
+    assert [entity["value"] for entity in entities] == ["Novo", "Recife", "Maria", "Lisboa", "João", "Petrobras", "Ana", "Pedro", "Curitiba"]
+    assert all(edited[entity["start"]:entity["end"]] == entity["value"] for entity in entities)
+    assert spacy_entity_recognizer_incremental(edited, "pt", ["ORG"], cache=cache) == ([], {**reuse, "reused_paragraphs": 4, "recognized_paragraphs": 0, "recognized_characters": 0})
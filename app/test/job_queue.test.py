@@ -0,0 +1,44 @@
+import threading
+from types import SimpleNamespace
+
+from app import main
+from app.mycrews.helper import job_queue, task_store
+from app.mycrews.helper.job_queue import JobQueue, worker_main
+from app.mycrews.helper.task_store import MemoryTaskStore
+
+# Test header: Test that a failing crew job is retried by the job queue.
+# This test verifies that the crew handler raises in a worker, so the job is retried up to its attempts and its task marked failed after the last one.
+def test_failing_crew_job_is_retried(monkeypatch, tmp_path):
+    calls = []
+    def failing_crew(pool, inputs):
+        calls.append(inputs)
+        raise RuntimeError("LLM unavailable")
+    monkeypatch.setattr(main, "run_crew", failing_crew)
+    monkeypatch.setattr(main, "mycrew_pool", SimpleNamespace(get=lambda: None))
+    monkeypatch.setattr(job_queue, "JOB_RETRY_BACKOFF_SECONDS", 0)
+    monkeypatch.setattr(job_queue, "JOB_POLL_INTERVAL_SECONDS", 0.01)
+    monkeypatch.setattr(job_queue, "_in_job_worker", False)
+    worker_storage = MemoryTaskStore()
+    monkeypatch.setattr(task_store, "create_task_store", lambda: worker_storage)
+
+    path = str(tmp_path / "jobs.sqlite3")
+    queue = JobQueue(path)
+    queue.enqueue(main.process_task_crewai_background, ["task-1", "tema"], lane="llm", job_id="task-1", max_attempts=3)
+    stop = threading.Event()
+    def stop_when_finished():
+        while queue.stats()["llm"]["finished"] == 0 and not stop.wait(0.05):
+            pass
+        stop.set()
+    watcher = threading.Thread(target=stop_when_finished)
+    watcher.start()
+    timeout = threading.Timer(20, stop.set)
+    timeout.start()
+    worker_main(path, "llm", stop)
+    timeout.cancel()
+    watcher.join()
+
+    assert len(calls) == 3
+    assert queue.stats()["llm"]["failed"] == 1
+    assert worker_storage["task-1"]["status"] == "failed"
+    assert "LLM unavailable" in worker_storage["task-1"]["result"]
+    assert "task-1" not in main.task_storage
@@ -0,0 +1,28 @@
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from app.mycrews.helper.lazy_subsystem import LazySubsystem, parse_warmup
+
+# Test header: Test that a subsystem is built once, on first use.
+# This test verifies that nothing is built before the first call, and concurrent sync and async calls share one build.
+def test_subsystem_built_once_on_first_use():
+    builds = []
+    subsystem = LazySubsystem("crews", lambda: builds.append(1) or "pool")
+    assert subsystem.if_loaded() is None and builds == []
+
+    with ThreadPoolExecutor(4) as executor:
+        assert list(executor.map(lambda _: subsystem.get(), range(8))) == ["pool"] * 8
+    assert asyncio.run(subsystem.aget()) == "pool"
+    assert subsystem.loaded and builds == [1]
+
+# Test header: Test the parsing of APP_WARMUP.
+# This test verifies that named subsystems, all and empty values are parsed, and unknown names are rejected.
+def test_parse_warmup():
+    subsystems = {name: LazySubsystem(name, lambda: None) for name in ("spacy", "llm", "crews")}
+    assert parse_warmup("", subsystems) == []
+    assert [subsystem.name for subsystem in parse_warmup(" crews, spacy", subsystems)] == ["crews", "spacy"]
+    assert len(parse_warmup("all", subsystems)) == 3
+    with pytest.raises(ValueError):
+        parse_warmup("spacy,gpu", subsystems)
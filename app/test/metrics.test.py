@@ -0,0 +1,32 @@
+import pytest
+
+from app.mycrews.helper.metrics import Metric, MetricsRegistry
+
+# Test header: Test the Prometheus text rendering of the metrics.
+# This test verifies that histogram buckets are cumulative, labels are rendered and a failing gauge does not hide the others.
+def test_render_histogram_counter_and_gauges():
+    registry = MetricsRegistry(enabled=True)
+    latency = registry.histogram("latency_seconds", "Latency.", ("route",), buckets=(0.1, 1))
+    for value in (0.05, 0.5, 5):
+        latency.observe(value, route="/a")
+    registry.counter("tokens_total", "Tokens.", ("kind",)).inc(3, kind="prompt")
+    registry.gauge("depth", "Depth.", lambda: 1 / 0)
+    registry.gauge("size", "Size.", lambda: 7)
+    assert registry.histogram("latency_seconds", "Latency.", ("route",)) is latency
+
+    page = registry.render()
+    assert 'latency_seconds_bucket{route="/a",le="0.1"} 1' in page
+    assert 'latency_seconds_bucket{route="/a",le="1"} 2' in page
+    assert 'latency_seconds_bucket{route="/a",le="+Inf"} 3' in page
+    assert 'latency_seconds_count{route="/a"} 3' in page
+    assert 'tokens_total{kind="prompt"} 3' in page
+    assert "# depth collection failed" in page and "size 7" in page
+
+# Test header: Test that a metric type without samples can't be created.
+# This test verifies that Metric is abstract, so a metric type fails when it is instantiated, not when the page is rendered.
+def test_metric_requires_samples():
+    class Summary(Metric):
+        kind = "summary"
+
+    with pytest.raises(TypeError, match="samples"):
+        Summary("latency_seconds", "Latency.")
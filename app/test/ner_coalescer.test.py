@@ -0,0 +1,22 @@
+import asyncio
+
+from app.mycrews.helper import ner_coalescer
+from app.mycrews.helper.executor import BoundedExecutor
+from app.mycrews.helper.ner_coalescer import NERCoalescer
+
+# Test header: Test that concurrent requests are coalesced into batches.
+# This test verifies that requests of a window run in one batch call, a full batch is flushed right away, and every caller gets its own result.
+def test_concurrent_requests_share_batches(monkeypatch):
+    calls = []
+    def fake_batch(documents, batch_size, n_process):
+        calls.append([document["text"] for document in documents])
+        return [[{"value": document["text"], "types": document["types"]}] for document in documents]
+    monkeypatch.setattr(ner_coalescer, "spacy_entity_recognizer_batch", fake_batch)
+
+    async def requests():
+        coalescer = NERCoalescer(BoundedExecutor("test", 1, 4), window_ms=20, max_batch=3)
+        return await asyncio.gather(*(coalescer.recognize(f"text {index}", "pt", [str(index)]) for index in range(5)))
+
+    results = asyncio.run(requests())
+    assert calls == [["text 0", "text 1", "text 2"], ["text 3", "text 4"]]
+    assert results == [[{"value": f"text {index}", "types": [str(index)]}] for index in range(5)]
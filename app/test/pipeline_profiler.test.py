@@ -0,0 +1,20 @@
+from types import SimpleNamespace
+
+from app.mycrews.helper.pipeline_profiler import PipelineProfiler
+
+# Test header: Test that profiled batches stream their texts.
+# This test verifies that texts are read one batch at a time, every doc goes through each component, and each batch is timed.
+def test_pipe_streams_batches():
+    read = []
+    def texts():
+        for index in range(10):
+            read.append(index)
+            yield f"text {index}"
+    pipeline = SimpleNamespace(make_doc=lambda text: [text], pipeline=[("upper", lambda doc: doc + [doc[0].upper()])])
+    profiler = PipelineProfiler()
+
+    docs = profiler.pipe(pipeline, texts(), "pt", batch_size=4)
+    assert next(docs) == ["text 0", "TEXT 0"]
+    assert read == [0, 1, 2, 3]
+    assert [doc[1] for doc in docs] == [f"TEXT {index}" for index in range(1, 10)]
+    assert profiler.stats()["pt"]["upper"]["calls"] == 3
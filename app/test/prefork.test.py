@@ -0,0 +1,22 @@
+import os
+import time
+
+from app.mycrews.helper.prefork import WorkerBoard
+
+# Test header: Test the worker board shared by a pre-fork master and its workers.
+# This test verifies that a heartbeat written by a forked worker is read by the master, and a stale one is unhealthy.
+def test_worker_board():
+    board = WorkerBoard(2)
+    board.start(0, pid=1234, generation=1, restarts=0)
+    board.start(1, pid=5678, generation=1, restarts=2)
+    time.sleep(0.05)
+    before = board.read(0)["heartbeat_age_seconds"]
+    pid = os.fork()
+    if pid == 0:
+        board.beat(0)
+        os._exit(0)
+    os.waitpid(pid, 0)
+    assert board.read(0)["heartbeat_age_seconds"] < before
+    assert [worker["restarts"] for worker in board.snapshot()] == [0, 2]
+    assert not board.read(1, heartbeat_timeout=0.01)["healthy"]
+    assert board.read(1, heartbeat_timeout=0)["healthy"]
@@ -0,0 +1,48 @@
+from app.mycrews.helper.result_cache import ResultCache, cache_key
+
+# Test header: Test cache keys of equivalent inputs.
+# This test verifies that whitespace differences are normalized while model and type filters change the key.
+def test_cache_key_normalization():
+    assert cache_key("open/test", " o  mar\n", models=["gpt-4o"]) == cache_key("open/test", "o mar", models=["gpt-4o"])
+    assert cache_key("open/test", "o mar", models=["gpt-4o"]) != cache_key("open/test", "o mar", models=["o1-mini"])
+    assert cache_key("spacy", "a  b", normalize=False) != cache_key("spacy", "a b", normalize=False)
+
+# Test header: Test hits and misses of the memory tier.
+# This test verifies the counters and the LRU eviction of the memory tier.
+def test_memory_tier_hits_and_eviction():
+    cache = ResultCache(max_entries=1, disk_path="")
+    first, second = cache_key("spacy", "first"), cache_key("spacy", "second")
+    cache.set(first, ["a"])
+
+    assert cache.get(first) == ["a"]
+    cache.set(second, ["b"])
+    assert cache.get(first) is None
+    assert cache.stats()["endpoints"]["spacy"]["hits"] == 1
+    assert cache.stats()["endpoints"]["spacy"]["misses"] == 1
+
+# Test header: Test the on-disk tier.
+# This test verifies that a result stored by one process (cache instance) is served from disk to another one.
+def test_disk_tier_is_shared(tmp_path):
+    path = str(tmp_path / "cache.sqlite3")
+    key = cache_key("general", "Maria Silva", lang="pt")
+    ResultCache(disk_path=path).set(key, [{"value": "Maria Silva", "type": "PERSON"}])
+
+    cache = ResultCache(disk_path=path)
+    assert cache.get(key) == [{"value": "Maria Silva", "type": "PERSON"}]
+    assert cache.stats()["endpoints"]["general"]["disk_hits"] == 1
+
+# Test header: Test that Spacy cache keys follow the pipeline configuration.
+# This test verifies that the pipeline version of Spacy keys changes with the loaded components and the entity shape.
+def test_spacy_cache_params_follow_pipeline():
+    import os
+    import subprocess
+    import sys
+    from pathlib import Path
+
+    def pipeline(**env):
+        code = "from app.mycrews.helper.spacy_entity_recognizer import spacy_cache_params; print(spacy_cache_params('pt')['pipeline'])"
+        return subprocess.run([sys.executable, "-c", code], env={**os.environ, **env}, cwd=Path(__file__).parents[2], capture_output=True, text=True, check=True).stdout
+    default = pipeline(SPACY_ENTITIES_ONLY="1", SPACY_EXCLUDE_PIPES="parser,lemmatizer")
+    assert "schema=" in default
+    assert pipeline(SPACY_ENTITIES_ONLY="0", SPACY_EXCLUDE_PIPES="parser,lemmatizer") != default
+    assert pipeline(SPACY_ENTITIES_ONLY="1", SPACY_EXCLUDE_PIPES="parser") != default
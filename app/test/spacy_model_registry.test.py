@@ -0,0 +1,73 @@
+from app.mycrews.helper import spacy_model_registry
+from app.mycrews.helper.spacy_model_registry import SpacyModelRegistry, entities_only_exclusions
+
+MB = 1024 * 1024
+MODELS = [{"lang": lang, "modelName": f"{lang}_core_news_sm"} for lang in ("pt", "en", "es", "fr")]
+
+def stub_loader(registry: SpacyModelRegistry, sizes_mb: dict) -> list:
+    # Replaces the load of each model by a stand-in pipeline of the given size, returns the loaded model names
+    loads = []
+    def load(model_name):
+        loads.append(model_name)
+        return object(), sizes_mb[model_name[:2]] * MB
+    registry._load = load
+    return loads
+
+def pipeline_config(listener_upstream=None) -> dict:
+    # Config of a pipeline with a shared tok2vec, whose ner has its own embedding unless it listens to an upstream
+    model = {"@architectures": "spacy.TransitionBasedParser.v2",
+             "tok2vec": {"@architectures": "spacy.Tok2VecListener.v1", "upstream": listener_upstream} if listener_upstream
+                        else {"@architectures": "spacy.HashEmbedCNN.v2"}}
+    return {"nlp": {"pipeline": ["tok2vec", "morphologizer", "parser", "lemmatizer", "attribute_ruler", "ner"]},
+            "components": {"tok2vec": {"factory": "tok2vec"}, "morphologizer": {"factory": "morphologizer"}, "parser": {"factory": "parser"},
+                           "lemmatizer": {"factory": "trainable_lemmatizer"}, "attribute_ruler": {"factory": "attribute_ruler"},
+                           "ner": {"factory": "ner", "model": model}}}
+
+# Test header: Test the eviction of least recently used pipelines over the memory budget.
+# This test verifies that loading past SPACY_MEMORY_BUDGET_MB unloads the least recently used languages, never the one being returned.
+def test_evicts_least_recently_used_over_budget():
+    registry = SpacyModelRegistry(MODELS, memory_budget_mb=100)
+    loads = stub_loader(registry, {"pt": 40, "en": 40, "es": 40, "fr": 150})
+    pt = registry["pt"]
+    registry["en"]
+    assert registry["pt"] is pt and registry.loaded() == ["en", "pt"]
+
+    registry["es"]
+    assert registry.loaded() == ["pt", "es"]
+    assert registry.memory_usage() == 80 * MB
+
+    # A pipeline over the budget on its own is still returned, alone
+    registry["fr"]
+    assert registry.loaded() == ["fr"]
+    registry["en"]
+    assert registry.loaded() == ["en"]
+    assert loads == ["pt_core_news_sm", "en_core_news_sm", "es_core_news_sm", "fr_core_news_sm", "en_core_news_sm"]
+
+# Test header: Test that no pipeline is evicted without a memory budget.
+# This test verifies that a budget of 0 keeps every loaded language.
+def test_unlimited_budget_keeps_every_pipeline():
+    registry = SpacyModelRegistry(MODELS)
+    stub_loader(registry, {"pt": 400, "en": 400, "es": 400, "fr": 400})
+    for lang in ("pt", "en", "es", "fr"):
+        registry[lang]
+    assert registry.loaded() == ["pt", "en", "es", "fr"]
+
+# Test header: Test the components excluded by the entities-only mode.
+# This test verifies that only entity components are kept, with the embedding components they listen to.
+def test_entities_only_exclusions():
+    assert entities_only_exclusions(pipeline_config()) == ["tok2vec", "morphologizer", "parser", "lemmatizer", "attribute_ruler"]
+    assert entities_only_exclusions(pipeline_config("tok2vec")) == ["morphologizer", "parser", "lemmatizer", "attribute_ruler"]
+    assert entities_only_exclusions(pipeline_config("*")) == ["morphologizer", "parser", "lemmatizer", "attribute_ruler"]
+
+# Test header: Test that the entities-only mode excludes components when loading.
+# This test verifies that the exclusions of the model config are added to the configured ones and passed to spacy.load.
+def test_entities_only_load_excludes_components(monkeypatch):
+    calls = []
+    monkeypatch.setattr(spacy_model_registry, "is_package", lambda name: True)
+    monkeypatch.setattr(spacy_model_registry, "_model_config", lambda name: pipeline_config("tok2vec"))
+    monkeypatch.setattr(spacy_model_registry.spacy, "load", lambda name, exclude: calls.append((name, exclude)) or object())
+    monkeypatch.setattr(spacy_model_registry, "_package_size", lambda name: MB)
+
+    registry = SpacyModelRegistry(MODELS, exclude=["parser"], entities_only=True)
+    registry["pt"]
+    assert calls == [("pt_core_news_sm", ["parser", "morphologizer", "lemmatizer", "attribute_ruler"])]
@@ -0,0 +1,61 @@
+import asyncio
+import threading
+from types import SimpleNamespace
+
+from starlette.requests import Request
+
+from app import main
+
+async def disconnect_after_first_event(response):
+    # Reads the "accepted" event, then closes the stream like a client going away
+    first = await response.body_iterator.__anext__()
+    await response.body_iterator.aclose()
+    return first
+
+async def wait_for_status(task_id: str, timeout: float = 5.0) -> dict:
+    deadline = asyncio.get_running_loop().time() + timeout
+    while main.task_storage[task_id]["status"] == "pending" and asyncio.get_running_loop().time() < deadline:
+        await asyncio.sleep(0.01)
+    return main.task_storage[task_id]
+
+# Test header: Test that a streamed crew stores its result when the client disconnects early.
+# This test verifies that the result is written by the crew completion, not by the end of the stream.
+def test_crew_stream_stores_result_after_disconnect():
+    release = threading.Event()
+    def kickoff(inputs, task_callback, step_callback, on_start, on_finish):
+        release.wait(5)
+        on_finish([])
+        return SimpleNamespace(raw=f"poema sobre {inputs['text']}", pydantic=None, json_dict=None, token_usage={"total_tokens": 3}, tasks_output=[])
+
+    async def scenario():
+        main.task_storage["crew-stream"] = {"status": "pending", "result": None}
+        response = main.stream_crew("crew-stream", SimpleNamespace(kickoff=kickoff), {"text": "mar"}, lambda result: result["raw"], None)
+        first = await disconnect_after_first_event(response)
+        release.set()
+        return first, await wait_for_status("crew-stream")
+
+    first, task = asyncio.run(scenario())
+    assert first.startswith("event: accepted")
+    assert task["status"] == "completed" and task["result"] == "poema sobre mar"
+
+# Test header: Test that a streamed poem stores its result when the client disconnects early.
+# This test verifies that the completions keep running and their result is stored after the stream is closed.
+def test_poem_stream_stores_result_after_disconnect(monkeypatch):
+    async def stream(messages, model, usage):
+        for word in ("verso", "final"):
+            await asyncio.sleep(0.05)
+            yield word + " "
+    client = SimpleNamespace(stream=stream)
+    async def aget():
+        return client
+    monkeypatch.setattr(main, "llm_client", SimpleNamespace(aget=aget))
+
+    async def scenario():
+        http_request = Request({"type": "http", "method": "POST", "path": "/open/stream", "headers": [(b"cache-control", b"no-store")]})
+        response = await main.stream_poem_task(main.CrewRequest(objective="mar"), http_request)
+        task_id = (await disconnect_after_first_event(response)).split('"task_id": "')[1].split('"')[0]
+        return await wait_for_status(task_id)
+
+    task = asyncio.run(scenario())
+    assert task["status"] == "completed"
+    assert task["result"] == "Poem: verso final\nEvaluation: verso final"
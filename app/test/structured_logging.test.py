@@ -0,0 +1,29 @@
+import io
+import json
+import logging
+
+from app.mycrews.helper import structured_logging
+from app.mycrews.helper.structured_logging import log_payload, request_id_var, setup_logging, stop_logging, task_id_var, truncate
+
+# Test header: Test that structured records carry the correlation ids and truncated payloads.
+# This test verifies that records written by the listener thread are JSON lines with the request and task ids of the caller.
+def test_records_are_json_with_correlation_ids(monkeypatch):
+    monkeypatch.setattr(structured_logging, "LOG_PAYLOAD_SAMPLE_RATE", 1.0)
+    stream = io.StringIO()
+    setup_logging(level="DEBUG", levels="", stream=stream)
+    logger = logging.getLogger("test.structured_logging")
+    request_token, task_token = request_id_var.set("req-1"), task_id_var.set("task-1")
+    try:
+        logger.info("Crew %s finished", "mycrew", extra={"fields": {"total_tokens": 12}})
+        log_payload(logger, "Crew output", raw="x" * 5000)
+    finally:
+        request_id_var.reset(request_token)
+        task_id_var.reset(task_token)
+        stop_logging()
+
+    records = [json.loads(line) for line in stream.getvalue().splitlines()]
+    assert records[0]["message"] == "Crew mycrew finished"
+    assert records[0]["request_id"] == "req-1" and records[0]["task_id"] == "task-1"
+    assert records[0]["total_tokens"] == 12
+    assert records[1]["raw"].endswith("[3000 more characters]")
+    assert truncate({"a": 1}) == '{"a": 1}'
@@ -0,0 +1,37 @@
+from typing import List
+
+import pytest
+from pydantic import BaseModel
+
+from app.mycrews.helper.structured_output import StructuredOutputError, parse_structured_output, read_structured_output
+
+class EntityOutput(BaseModel):
+    entities: List[dict]
+
+# Test header: Test parsing LLM outputs around the JSON object.
+# This test verifies that prefixes, Markdown fences and braces in strings or other text don't hide the object.
+def test_parse_structured_output_finds_object():
+    raw = 'Thought: done {not json}\nFinal Answer: ```json\n{"entities": [{"text": "a {b}", "type": "PER"}]}\n```'
+    output, outcome = parse_structured_output(raw, EntityOutput)
+    assert output.entities == [{"text": "a {b}", "type": "PER"}]
+    assert outcome == "parsed"
+
+# Test header: Test the cheap repairs of almost valid outputs.
+# This test verifies that trailing commas, truncated outputs and Python literals are repaired without the LLM.
+@pytest.mark.parametrize("raw", [
+    '{"entities": [{"text": "Maria", "type": "PER"},],}',
+    'Final Answer: {"entities": [{"text": "Maria", "type": "PER"}, {"text": "Ma',
+    "{'entities': [{'text': 'Maria', 'type': 'PER'}]}",
+])
+def test_parse_structured_output_repairs(raw):
+    output, outcome = parse_structured_output(raw, EntityOutput)
+    assert output.entities[0] == {"text": "Maria", "type": "PER"}
+    assert outcome == "repaired"
+
+# Test header: Test outputs without a valid object.
+# This test verifies that StructuredOutputError is raised with an excerpt of the output, and that a structured output given by the crew is used as is.
+def test_read_structured_output():
+    with pytest.raises(StructuredOutputError, match="Invalid EntityOutput output"):
+        read_structured_output('I could not find entities. {"result": []}', EntityOutput)
+    given = EntityOutput(entities=[])
+    assert read_structured_output("not parsed", EntityOutput, given) is given
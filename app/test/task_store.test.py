@@ -0,0 +1,78 @@
+import time
+import pytest
+from app.mycrews.helper.task_store import MemoryTaskStore, SQLiteTaskStore, TaskStore
+
+# Both backends must behave the same way through the dictionary interface used by the API.
+@pytest.fixture(params=["memory", "sqlite"])
+def make_store(request, tmp_path):
+    def factory(**kwargs):
+        if request.param == "memory":
+            return MemoryTaskStore(**kwargs)
+        return SQLiteTaskStore(str(tmp_path / "tasks.sqlite3"), **kwargs)
+    return factory
+
+# Test header: Test storing and reading back a task record.
+# This test verifies that a record written with the dict syntax is returned with its status and JSON result.
+def test_set_and_get_record(make_store):
+    store = make_store()
+    store["task-1"] = {"status": "completed", "result": [{"value": "Maria", "type": "PERSON"}]}
+
+    assert "task-1" in store
+    assert store["task-1"] == {"status": "completed", "result": [{"value": "Maria", "type": "PERSON"}]}
+    assert store.get("missing") is None
+    with pytest.raises(KeyError):
+        store["missing"]
+
+# Test header: Test updating a task record.
+# This test verifies that a pending task is replaced by its completed record.
+def test_update_record(make_store):
+    store = make_store()
+    store["task-1"] = {"status": "pending", "result": None}
+    store["task-1"] = {"status": "completed", "result": "done"}
+
+    assert store.get("task-1") == {"status": "completed", "result": "done"}
+    assert len(store) == 1
+
+# Test header: Test expiration of task records.
+# This test verifies that expired records are hidden and then removed by purge_expired.
+def test_expired_records_are_purged(make_store):
+    store = make_store(ttl_seconds=0.05)
+    store["task-1"] = {"status": "completed", "result": "done"}
+    time.sleep(0.1)
+
+    assert store.get("task-1") is None
+    store.purge_expired()
+    assert len(store) == 0
+
+# Test header: Test LRU eviction of the memory backend.
+# This test verifies that the least recently used record is evicted once max_entries is reached.
+def test_memory_store_evicts_least_recently_used():
+    store = MemoryTaskStore(max_entries=2)
+    store["task-1"] = {"status": "completed", "result": 1}
+    store["task-2"] = {"status": "completed", "result": 2}
+    store.get("task-1")
+    store["task-3"] = {"status": "completed", "result": 3}
+
+    assert "task-1" in store
+    assert "task-2" not in store
+    assert "task-3" in store
+
+# Test header: Test sharing the SQLite backend between store instances.
+# This test verifies that a record written by one instance (another worker) is visible to a second one.
+def test_sqlite_store_is_shared(tmp_path):
+    path = str(tmp_path / "tasks.sqlite3")
+    SQLiteTaskStore(path)["task-1"] = {"status": "completed", "result": {"poem": "..."}}
+
+    assert SQLiteTaskStore(path).get("task-1") == {"status": "completed", "result": {"poem": "..."}}
+
+# Test header: Test that an incomplete backend can't be created.
+# This test verifies that a store missing one of the backend methods fails when it is instantiated, not when that method is called.
+def test_incomplete_backend_is_rejected():
+    class NoPurgeStore(TaskStore):
+        def set(self, task_id, status, result=None, **fields): pass
+        def get(self, task_id): return None
+        def delete(self, task_id): return False
+        def __len__(self): return 0
+
+    with pytest.raises(TypeError, match="purge_expired"):
+        NoPurgeStore()
@@ -0,0 +1,50 @@
+import spacy
+
+from app.mycrews.helper import spacy_entity_recognizer
+from app.mycrews.helper.spacy_entity_recognizer import spacy_entity_recognizer_chunked
+from app.mycrews.helper.text_chunker import iter_chunks
+
+TEXT = "".join(f"Frase número {index} sem nomes próprios.{' Maria Silva mora em Lisboa.' if index % 7 == 3 else ''}\n"
+               + ("\n" if index % 5 == 4 else "") for index in range(60))
+
+def pieces(text: str, size: int):
+    return (text[start:start + size] for start in range(0, len(text), size))
+
+# Test header: Test that chunk offsets point back into the original text.
+# This test verifies that the text of every chunk, read from a stream of pieces, is the slice of the whole text at its offset.
+def test_chunk_offsets_map_to_original_text():
+    chunks = list(iter_chunks(pieces(TEXT, 37), chunk_size=200, overlap=30))
+    assert len(chunks) > 5
+    for chunk in chunks:
+        assert TEXT[chunk.start:chunk.start + len(chunk.text)] == chunk.text
+        assert chunk.start <= chunk.own_start < chunk.own_end <= chunk.start + len(chunk.text)
+
+# Test header: Test that chunks cover the whole text with the configured overlap.
+# This test verifies that own ranges follow each other without gaps up to the end, and that each chunk adds the overlap on both sides.
+def test_chunks_cover_text_with_overlap():
+    chunk_size, overlap = 200, 30
+    chunks = list(iter_chunks(TEXT, chunk_size, overlap))
+    assert chunks[0].own_start == 0 and chunks[-1].own_end == len(TEXT)
+    for previous, chunk in zip(chunks, chunks[1:]):
+        assert chunk.own_start == previous.own_end
+    for chunk in chunks:
+        assert chunk.own_end - chunk.own_start <= chunk_size
+        assert chunk.start == max(chunk.own_start - overlap, 0)
+        assert chunk.start + len(chunk.text) == min(chunk.own_end + overlap, len(TEXT))
+
+# Test header: Test that an entity in the overlap of two chunks is reported once.
+# This test verifies that chunked recognition keeps an entity only in the chunk whose own range it starts in, with offsets in the whole text.
+def test_entity_in_overlap_is_not_duplicated(monkeypatch):
+    ruler_nlp = spacy.blank("pt")
+    ruler_nlp.add_pipe("entity_ruler").add_patterns([{"label": "PER", "pattern": "Maria Silva"}])
+    monkeypatch.setattr(spacy_entity_recognizer, "nlp", {"pt": ruler_nlp})
+    chunk_size, overlap = 200, 60
+    chunks = list(iter_chunks(TEXT, chunk_size, overlap))
+    starts = [index for index in range(len(TEXT)) if TEXT.startswith("Maria Silva", index)]
+    # At least one occurrence is seen by two chunks, in the overlap between them
+    assert any(sum(chunk.start <= start and start + 11 <= chunk.start + len(chunk.text) for chunk in chunks) > 1 for start in starts)
+
+    entities = list(spacy_entity_recognizer_chunked(TEXT, "pt", chunk_size=chunk_size, overlap=overlap, n_process=1))
+    assert [entity["start"] for entity in entities] == starts
+    assert all(TEXT[entity["start"]:entity["end"]] == entity["value"] == "Maria Silva" for entity in entities)
+    assert {entity["type"] for entity in entities} == {"PERSON"}